@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+from typing import (
+	Any,
+	Dict,
+	Iterable,
+	Optional,
+	Tuple,
+	Union
+)
+
+# Local imports
+from . import utils
+
+__all__ = (
+	'CacheBackend',
+	'MemoryCacheBackend',
+	'SQLiteCacheBackend',
+	'SharedMemoryCacheBackend'
+)
+
+Payload = Dict[str, Any]
+
+class CacheBackend:
+	"""The interface ConnectionState uses to keep raw payloads outside of its object caches.
+
+	Payloads are grouped by namespace ('users', 'channels', 'posts') and keyed by id.
+	When a lookup misses the in-process caches the state asks the backend for the payload
+	and builds the object from it, so a backend shared between processes lets every worker
+	start from a warm cache. Backends are caches, losing an entry is always allowed.
+
+	The state never closes its backend, call close once every client using it is closed.
+	"""
+
+	def get(self, namespace: str, key: str) -> Optional[Payload]:
+		raise NotImplementedError
+
+	def set(self, namespace: str, key: str, value: Payload) -> None:
+		raise NotImplementedError
+
+	def delete(self, namespace: str, key: str) -> None:
+		raise NotImplementedError
+
+	def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Payload]:
+		found = {}
+		for key in keys:
+			value = self.get(namespace, key)
+			if value is not None:
+				found[key] = value
+		return found
+
+	def clear(self, namespace: Optional[str] = None) -> None:
+		raise NotImplementedError
+
+	def close(self) -> None:
+		pass
+
+class MemoryCacheBackend(CacheBackend):
+	"""Keeps payloads in a dict, only visible to the current process."""
+
+	def __init__(self) -> None:
+		self._data: Dict[str, Dict[str, Payload]] = {}
+
+	def __repr__(self) -> str:
+		return f'<MemoryCacheBackend namespaces={len(self._data)}>'
+
+	def get(self, namespace: str, key: str) -> Optional[Payload]:
+		try:
+			return self._data[namespace][key]
+		except KeyError:
+			return None
+
+	def set(self, namespace: str, key: str, value: Payload) -> None:
+		try:
+			self._data[namespace][key] = value
+		except KeyError:
+			self._data[namespace] = {key: value}
+
+	def delete(self, namespace: str, key: str) -> None:
+		try:
+			del self._data[namespace][key]
+		except KeyError:
+			pass
+
+	def clear(self, namespace: Optional[str] = None) -> None:
+		if namespace is None:
+			self._data.clear()
+		else:
+			self._data.pop(namespace, None)
+
+class SQLiteCacheBackend(CacheBackend):
+	"""Keeps payloads in a local SQLite database that processes on one host can share.
+
+	The database runs in WAL mode so readers in other processes don't block on writers.
+	"""
+
+	def __init__(self, path: Union[str, os.PathLike[str]]) -> None:
+		self.path: Union[str, os.PathLike[str]] = path
+		self._lock: threading.Lock = threading.Lock()
+		self._db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+		self._db.execute('PRAGMA journal_mode=WAL')
+		self._db.execute('PRAGMA synchronous=NORMAL')
+		self._db.execute(
+			'CREATE TABLE IF NOT EXISTS cache ('
+			'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+			'PRIMARY KEY (namespace, key)) WITHOUT ROWID'
+		)
+
+	def __repr__(self) -> str:
+		return f'<SQLiteCacheBackend path={self.path!r}>'
+
+	def get(self, namespace: str, key: str) -> Optional[Payload]:
+		with self._lock:
+			row = self._db.execute('SELECT value FROM cache WHERE namespace = ? AND key = ?', (namespace, key)).fetchone()
+		return None if row is None else utils._from_json(row[0])
+
+	def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Payload]:
+		keys = list(keys)
+		found = {}
+		# Stay under SQLite's default limit on bound parameters
+		for i in range(0, len(keys), 500):
+			chunk = keys[i:i + 500]
+			placeholders = ','.join('?' * len(chunk))
+			with self._lock:
+				rows = self._db.execute(
+					f'SELECT key, value FROM cache WHERE namespace = ? AND key IN ({placeholders})',
+					(namespace, *chunk)
+				).fetchall()
+			for key, value in rows:
+				found[key] = utils._from_json(value)
+		return found
+
+	def set(self, namespace: str, key: str, value: Payload) -> None:
+		with self._lock:
+			self._db.execute(
+				'INSERT OR REPLACE INTO cache (namespace, key, value) VALUES (?, ?, ?)',
+				(namespace, key, utils._to_json(value))
+			)
+
+	def delete(self, namespace: str, key: str) -> None:
+		with self._lock:
+			self._db.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (namespace, key))
+
+	def clear(self, namespace: Optional[str] = None) -> None:
+		with self._lock:
+			if namespace is None:
+				self._db.execute('DELETE FROM cache')
+			else:
+				self._db.execute('DELETE FROM cache WHERE namespace = ?', (namespace,))
+
+	def close(self) -> None:
+		with self._lock:
+			self._db.close()
+
+class SharedMemoryCacheBackend(CacheBackend):
+	"""Keeps payloads in a fixed size hash table in a named shared memory block.
+
+	The process that creates the block owns it, other processes attach to it by name with
+	create=False. The table has slots fixed size slots, a key lives in one of probe slots
+	after its hash and payloads that don't fit in a slot aren't cached. When every slot a
+	key can use is taken the first one is overwritten.
+
+	There is no cross process lock. Every slot carries a checksum of its contents that is
+	written last, a read that races a write fails the checksum and counts as a miss.
+	"""
+
+	# checksum, key length, value length
+	_HEADER: struct.Struct = struct.Struct('<IHI')
+	_EMPTY: int = 0
+	_DELETED: int = 0xFFFF
+
+	def __init__(
+		self,
+		name: Optional[str] = None,
+		*,
+		create: bool = True,
+		slots: int = 65536,
+		slot_size: int = 2048,
+		probe: int = 8
+	) -> None:
+		if slot_size <= self._HEADER.size:
+			raise ValueError(f'slot_size must be greater than {self._HEADER.size}')
+
+		self.slots: int = slots
+		self.slot_size: int = slot_size
+		self.probe: int = min(probe, slots)
+		self._owner: bool = create
+		self._shm: shared_memory.SharedMemory = self._open(name, create, slots * slot_size)
+		self._buf: memoryview = self._shm.buf
+
+	def __repr__(self) -> str:
+		return f'<SharedMemoryCacheBackend name={self.name!r} slots={self.slots} slot_size={self.slot_size}>'
+
+	@property
+	def name(self) -> str:
+		return self._shm.name
+
+	@staticmethod
+	def _open(name: Optional[str], create: bool, size: int) -> shared_memory.SharedMemory:
+		if create:
+			return shared_memory.SharedMemory(name=name, create=True, size=size)
+		if sys.version_info >= (3, 13):
+			return shared_memory.SharedMemory(name=name, track=False)
+
+		# Before 3.13 attaching also registers the block with this process's resource
+		# tracker, which unlinks it when the process exits, out from under the owner
+		shm = shared_memory.SharedMemory(name=name)
+		if os.name == 'posix':
+			resource_tracker.unregister(shm._name, 'shared_memory') # type: ignore
+		return shm
+
+	def _home(self, key: bytes) -> int:
+		return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') % self.slots
+
+	def _read_slot(self, index: int) -> Tuple[int, int, int, int]:
+		offset = index * self.slot_size
+		checksum, key_length, value_length = self._HEADER.unpack_from(self._buf, offset)
+		return offset, checksum, key_length, value_length
+
+	def _find(self, key: bytes) -> Tuple[Optional[int], Optional[int]]:
+		# Returns the slot holding the key and the first slot it could be written to
+		home = self._home(key)
+		free = None
+		header = self._HEADER.size
+		for i in range(self.probe):
+			index = (home + i) % self.slots
+			offset, _, key_length, _ = self._read_slot(index)
+			if key_length == self._EMPTY:
+				return None, free if free is not None else index
+			if key_length == self._DELETED:
+				if free is None:
+					free = index
+				continue
+
+			start = offset + header
+			if key_length == len(key) and self._buf[start:start + key_length] == key:
+				return index, index
+		return None, free if free is not None else home
+
+	def get(self, namespace: str, key: str) -> Optional[Payload]:
+		raw_key = f'{namespace}:{key}'.encode('utf-8')
+		index, _ = self._find(raw_key)
+		if index is None:
+			return None
+
+		offset, checksum, key_length, value_length = self._read_slot(index)
+		start = offset + self._HEADER.size
+		end = start + key_length + value_length
+		if end > offset + self.slot_size:
+			return None
+
+		body = bytes(self._buf[start:end])
+		if zlib.crc32(body) != checksum or body[:key_length] != raw_key:
+			# Torn by a concurrent write
+			return None
+		return utils._from_json(body[key_length:])
+
+	def set(self, namespace: str, key: str, value: Payload) -> None:
+		raw_key = f'{namespace}:{key}'.encode('utf-8')
+		raw_value = utils._to_json(value).encode('utf-8')
+		body = raw_key + raw_value
+		if self._HEADER.size + len(body) > self.slot_size or len(raw_key) >= self._DELETED:
+			# Too big to cache, make sure an older version isn't served
+			self.delete(namespace, key)
+			return
+
+		_, index = self._find(raw_key)
+		offset = index * self.slot_size # type: ignore
+		start = offset + self._HEADER.size
+		# Invalidate the slot, write the body and only then the checksum that validates it
+		self._HEADER.pack_into(self._buf, offset, 0, len(raw_key), len(raw_value))
+		self._buf[start:start + len(body)] = body
+		self._HEADER.pack_into(self._buf, offset, zlib.crc32(body), len(raw_key), len(raw_value))
+
+	def delete(self, namespace: str, key: str) -> None:
+		raw_key = f'{namespace}:{key}'.encode('utf-8')
+		index, _ = self._find(raw_key)
+		if index is not None:
+			self._HEADER.pack_into(self._buf, index * self.slot_size, 0, self._DELETED, 0)
+
+	def clear(self, namespace: Optional[str] = None) -> None:
+		if namespace is None:
+			self._buf[:] = bytes(len(self._buf))
+			return
+
+		prefix = f'{namespace}:'.encode('utf-8')
+		header = self._HEADER.size
+		for index in range(self.slots):
+			offset, _, key_length, _ = self._read_slot(index)
+			if key_length in (self._EMPTY, self._DELETED):
+				continue
+			start = offset + header
+			if self._buf[start:start + len(prefix)] == prefix:
+				self._HEADER.pack_into(self._buf, offset, 0, self._DELETED, 0)
+
+	def close(self) -> None:
+		self._buf.release()
+		self._shm.close()
+		if self._owner:
+			try:
+				self._shm.unlink()
+			except FileNotFoundError:
+				# Already removed, e.g. by a process that attached on an older version
+				pass
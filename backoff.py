@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+__all__ = (
+	'ExponentialBackoff',
+	'ReconnectLimiter'
+)
+
+class ExponentialBackoff:
+	"""Computes reconnect delays using decorrelated jitter.
+
+	The first retry after a stable period is taken almost straight away, somewhere in
+	[0, first). Every retry after that waits a random time between base and three times
+	the previous delay, capped at cap, so clients that disconnected together drift apart
+	instead of retrying in lockstep. The sequence starts over once no delay has been asked
+	for in reset_after seconds, i.e. the connection had been up for that long.
+	"""
+
+	def __init__(
+		self,
+		base: float = 1.0,
+		*,
+		cap: float = 60.0,
+		first: float = 1.0,
+		reset_after: float = 300.0
+	) -> None:
+		if base <= 0:
+			raise ValueError('base must be greater than 0')
+		if cap < base:
+			raise ValueError('cap cannot be less than base')
+
+		self._base: float = base
+		self._cap: float = cap
+		self._first: float = first
+		self._reset_after: float = reset_after
+		self._last_invocation: float = time.monotonic()
+		self._previous: float = base
+		self._attempts: int = 0
+		self._random: random.Random = random.Random()
+
+	def __repr__(self) -> str:
+		return f'<ExponentialBackoff attempts={self._attempts} previous={self._previous:.2f}>'
+
+	@property
+	def attempts(self) -> int:
+		return self._attempts
+
+	def reset(self) -> None:
+		self._attempts = 0
+		self._previous = self._base
+
+	def delay(self) -> float:
+		invocation = time.monotonic()
+		interval = invocation - self._last_invocation
+		self._last_invocation = invocation
+		if interval > self._reset_after:
+			self.reset()
+
+		self._attempts += 1
+		if self._attempts == 1:
+			# Most drops are blips, reconnect quickly but still spread out a little
+			self._previous = self._base
+			return self._random.uniform(0, self._first)
+
+		self._previous = min(self._cap, self._random.uniform(self._base, self._previous * 3))
+		return self._previous
+
+class ReconnectLimiter:
+	"""Hands out reconnect slots at least spacing seconds apart.
+
+	Sharing one limiter between clients staggers their reconnects. It is safe to share
+	across event loops and threads.
+	"""
+
+	def __init__(self, *, spacing: float = 0.5) -> None:
+		if spacing < 0:
+			raise ValueError('spacing cannot be negative')
+
+		self.spacing: float = spacing
+		self._lock: threading.Lock = threading.Lock()
+		self._next_slot: float = 0.0
+
+	def __repr__(self) -> str:
+		return f'<ReconnectLimiter spacing={self.spacing}>'
+
+	async def acquire(self) -> float:
+		# Waits for this caller's slot and returns how long that took
+		with self._lock:
+			now = time.monotonic()
+			slot = max(now, self._next_slot)
+			self._next_slot = slot + self.spacing
+
+		delay = slot - now
+		if delay > 0:
+			await asyncio.sleep(delay)
+		return delay
+
+_default_limiter: Optional[ReconnectLimiter] = None
+_default_limiter_lock: threading.Lock = threading.Lock()
+
+def default_reconnect_limiter() -> ReconnectLimiter:
+	# The process wide limiter used by clients created with reconnect_limiter=True
+	global _default_limiter
+
+	with _default_limiter_lock:
+		if _default_limiter is None:
+			_default_limiter = ReconnectLimiter()
+		return _default_limiter
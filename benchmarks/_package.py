@@ -0,0 +1,22 @@
+import importlib.util
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+def load_package(*, bare=False):
+	# The repository root is the package, load it as mattermost without putting the root
+	# on sys.path, its http.py would shadow the standard library's. With bare the package's
+	# __init__ isn't run, so modules that only need the standard library (backends, cache,
+	# utils) can be imported without aiohttp installed.
+	if 'mattermost' in sys.modules:
+		return sys.modules['mattermost']
+
+	spec = importlib.util.spec_from_file_location(
+		'mattermost', ROOT / '__init__.py', submodule_search_locations=[str(ROOT)]
+	)
+	module = importlib.util.module_from_spec(spec)
+	sys.modules['mattermost'] = module
+	if not bare:
+		spec.loader.exec_module(module)
+	return module
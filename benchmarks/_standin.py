@@ -0,0 +1,239 @@
+"""A local stand-in for a Mattermost server, for the benchmarks that need real HTTP.
+
+It answers the routes a client uses to log in, start up, sync members and catch up, plus
+the websocket, over aiohttp on 127.0.0.1. It runs in its own process so serving doesn't
+take time from the client being measured. Everything is generated from the sizes it's
+given so the same sizes always serve the same ids. latency is added to every request,
+a server on the same machine answers far quicker than a real one.
+"""
+import asyncio
+import json
+import multiprocessing
+
+from aiohttp import web
+
+# Posts start here, live events are at BASE and what a catch up finds comes after it
+BASE = 1700000000000
+
+def team_id(team):
+	return f't{team:025d}'
+
+def channel_id(team, channel):
+	return f'c{team:04d}{channel:021d}'
+
+def user_id(user):
+	return f'u{user:025d}'
+
+def _user(user):
+	return {'id': user_id(user), 'username': f'user{user}', 'create_at': 0, 'update_at': 0, 'delete_at': 0}
+
+def post(channel, number, *, team=None):
+	return {
+		'id': f'p{channel[1:5]}{channel[-15:]}{number:06d}',
+		'channel_id': channel,
+		'team_id': team or '',
+		'user_id': user_id(number % 100),
+		'root_id': '',
+		'create_at': BASE + number,
+		'update_at': BASE + number,
+		'edit_at': 0,
+		'delete_at': 0,
+		'props': {},
+		'hashtag': '',
+		'message': f'message {number}',
+		'type': ''
+	}
+
+def _json(data):
+	# Sent without a charset like Mattermost does, the client only decodes exactly application/json
+	return web.Response(body=json.dumps(data).encode(), content_type='application/json')
+
+def posted(channel, number, *, team=None):
+	# The gateway event for a new post, the post itself is sent as a JSON string
+	return {
+		'event': 'posted',
+		'data': {'post': json.dumps(post(channel, number, team=team)), 'team_id': team or ''},
+		'broadcast': {'channel_id': channel, 'team_id': team or ''}
+	}
+
+class _Server:
+	def __init__(self, requests, *, teams, channels, members, posts, latency, frames):
+		self.teams = teams
+		self.channels = channels
+		self.members = members
+		self.posts = posts
+		self.latency = latency
+		self.frames = frames
+		self.requests = requests
+
+	async def start(self):
+		app = web.Application(middlewares=[self._count])
+		app.add_routes([
+			web.get('/api/v4/users/me', self._me),
+			web.get('/api/v4/users/me/teams', self._teams),
+			web.get('/api/v4/users/me/teams/unread', self._unreads),
+			web.get('/api/v4/users/me/teams/{team_id}/channels', self._channels),
+			web.get('/api/v4/users/me/teams/{team_id}/channels/members', self._memberships),
+			web.get('/api/v4/teams/{team_id}/members', self._members),
+			web.post('/api/v4/users/ids', self._users),
+			web.get('/api/v4/channels/{channel_id}/posts', self._posts),
+			web.get('/api/v4/websocket', self._websocket)
+		])
+		runner = web.AppRunner(app, access_log=None)
+		await runner.setup()
+		site = web.TCPSite(runner, '127.0.0.1', 0)
+		await site.start()
+		return runner, site._server.sockets[0].getsockname()[1]
+
+	@web.middleware
+	async def _count(self, request, handler):
+		with self.requests.get_lock():
+			self.requests.value += 1
+		if self.latency:
+			await asyncio.sleep(self.latency)
+		response = await handler(request)
+		# Like a server with rate limiting on, the client only sends one request per
+		# route at a time until it has seen these. The websocket's are already sent
+		if not response.prepared:
+			response.headers.update({'X-Ratelimit-Limit': '1000', 'X-Ratelimit-Remaining': '999', 'X-Ratelimit-Reset': '1'})
+		return response
+
+	def _team_index(self, request):
+		return int(request.match_info['team_id'][1:])
+
+	async def _me(self, request):
+		return _json({'id': 'b' * 26, 'username': 'bot', 'bot': True})
+
+	async def _teams(self, request):
+		return _json([
+			{
+				'id': team_id(team),
+				'name': f'team{team}',
+				'display_name': f'Team {team}',
+				'create_at': 0,
+				'update_at': 0,
+				'delete_at': 0,
+				'description': '',
+				'email': '',
+				'type': 'O',
+				'allowed_domains': '',
+				'invite_id': '',
+				'allow_open_invite': False,
+				'policy_id': None
+			}
+			for team in range(self.teams)
+		])
+
+	async def _unreads(self, request):
+		return _json([
+			{'team_id': team_id(team), 'msg_count': 0, 'mention_count': 0} for team in range(self.teams)
+		])
+
+	async def _channels(self, request):
+		team = self._team_index(request)
+		return _json([
+			{'id': channel_id(team, channel), 'team_id': team_id(team), 'type': 'O', 'name': f'channel{channel}'}
+			for channel in range(self.channels)
+		])
+
+	async def _memberships(self, request):
+		team = self._team_index(request)
+		return _json([
+			{'channel_id': channel_id(team, channel), 'user_id': 'b' * 26, 'msg_count': 0}
+			for channel in range(self.channels)
+		])
+
+	async def _members(self, request):
+		team = team_id(self._team_index(request))
+		page = int(request.query.get('page', 0))
+		per_page = int(request.query.get('per_page', 60))
+		start = page * per_page
+		return _json([
+			{'team_id': team, 'user_id': user_id(user), 'roles': 'team_user', 'delete_at': 0}
+			for user in range(start, min(start + per_page, self.members))
+		])
+
+	async def _users(self, request):
+		ids = await request.json()
+		if 'since' in request.query:
+			# Nobody changed while the client was down
+			return _json([])
+		return _json([_user(int(id[1:])) for id in ids])
+
+	async def _posts(self, request):
+		channel = request.match_info['channel_id']
+		since = int(request.query.get('since', 0))
+		posts = [post(channel, number) for number in range(1, self.posts + 1) if BASE + number > since]
+		return _json({'order': [data['id'] for data in posts], 'posts': {data['id']: data for data in posts}})
+
+	async def _websocket(self, request):
+		socket = web.WebSocketResponse()
+		await socket.prepare(request)
+		await socket.send_str(json.dumps({'event': 'hello', 'data': {'connection_id': 'standin'}, 'broadcast': {}, 'seq': 0}))
+		for seq, frame in enumerate(self.frames, 1):
+			await socket.send_str(json.dumps({**frame, 'seq': seq}))
+		async for _ in socket:
+			pass
+		return socket
+
+def _serve(options, requests, port, stop):
+	async def main():
+		runner, port.value = await _Server(requests, **options).start()
+		try:
+			await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+		finally:
+			await runner.cleanup()
+
+	asyncio.run(main())
+
+class StandIn:
+	"""Serves teams of channels and members, members are the same users in every team.
+
+	Every channel has posts posts after BASE. frames are sent on every websocket after
+	the hello, the socket then stays open until the client closes it.
+	"""
+
+	def __init__(self, *, teams=1, channels=10, members=1000, posts=0, latency=0.0, frames=()):
+		self._options = {
+			'teams': teams,
+			'channels': channels,
+			'members': members,
+			'posts': posts,
+			'latency': latency,
+			'frames': list(frames)
+		}
+		# Spawned, a forked child would inherit the benchmark's running event loop
+		context = multiprocessing.get_context('spawn')
+		self._requests = context.Value('q', 0)
+		self._port = context.Value('i', 0)
+		self._stop = context.Event()
+		self._process = context.Process(
+			target=_serve, args=(self._options, self._requests, self._port, self._stop), daemon=True
+		)
+
+	@property
+	def requests(self):
+		return self._requests.value
+
+	async def start(self):
+		self._process.start()
+		while not self._port.value:
+			if not self._process.is_alive():
+				raise RuntimeError('The stand-in server failed to start')
+			await asyncio.sleep(0.01)
+		return f'http://127.0.0.1:{self._port.value}'
+
+	async def close(self):
+		self._stop.set()
+		await asyncio.get_running_loop().run_in_executor(None, self._process.join)
+
+async def login(client, url, token='token'):
+	# What Client.login does, less the application info it can't fetch yet
+	from mattermost.user import ClientUser
+
+	if client.loop is not asyncio.get_running_loop():
+		await client._async_setup_hook()
+
+	data = await client.http.static_login(url, token)
+	client._connection.user = ClientUser(state=client._connection, data=data)
+	client._connection.load_snapshot()
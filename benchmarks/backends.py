@@ -0,0 +1,85 @@
+"""Measures the lookup latency of every cache backend.
+
+Only needs the standard library, the package's __init__ isn't run.
+
+Usage: python benchmarks/backends.py [--entries 20000] [--lookups 50000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _package import load_package
+
+load_package(bare=True)
+from mattermost.backends import MemoryCacheBackend, SharedMemoryCacheBackend, SQLiteCacheBackend
+
+def _payload(i):
+	return {
+		'id': f'u{i:025d}',
+		'username': f'user{i}',
+		'first_name': 'First',
+		'last_name': 'Last',
+		'nickname': '',
+		'roles': 'system_user',
+		'locale': 'en',
+		'update_at': 1700000000000 + i
+	}
+
+def _percentiles(samples):
+	samples.sort()
+	pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+	return pick(50) / 1000, pick(99) / 1000
+
+def _time(operation, keys):
+	samples = []
+	clock = time.perf_counter_ns
+	for key in keys:
+		start = clock()
+		operation(key)
+		samples.append(clock() - start)
+	return _percentiles(samples)
+
+def _measure(name, backend, entries, lookups):
+	rng = random.Random(0)
+	keys = [f'u{i:025d}' for i in range(entries)]
+	payloads = {key: _payload(i) for i, key in enumerate(keys)}
+	set_p50, set_p99 = _time(lambda key: backend.set('users', key, payloads[key]), keys)
+
+	hits = [rng.choice(keys) for _ in range(lookups)]
+	misses = [f'm{i:025d}' for i in range(lookups)]
+	hit_p50, hit_p99 = _time(lambda key: backend.get('users', key), hits)
+	miss_p50, miss_p99 = _time(lambda key: backend.get('users', key), misses)
+	found = sum(backend.get('users', key) is not None for key in hits[:1000])
+
+	print(
+		f'{name:<14} set {set_p50:6.1f}/{set_p99:6.1f} us  hit {hit_p50:6.1f}/{hit_p99:6.1f} us  '
+		f'miss {miss_p50:6.1f}/{miss_p99:6.1f} us  hit rate {found / 10:.1f}%'
+	)
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--entries', type=int, default=20000)
+	parser.add_argument('--lookups', type=int, default=50000)
+	args = parser.parse_args()
+
+	print('p50/p99 per operation')
+	_measure('memory', MemoryCacheBackend(), args.entries, args.lookups)
+
+	with tempfile.TemporaryDirectory() as directory:
+		backend = SQLiteCacheBackend(os.path.join(directory, 'cache.db'))
+		try:
+			_measure('sqlite', backend, args.entries, args.lookups)
+		finally:
+			backend.close()
+
+	# Twice as many slots as entries, a fuller table probes further and drops more
+	backend = SharedMemoryCacheBackend(slots=args.entries * 2, slot_size=512)
+	try:
+		_measure('shared memory', backend, args.entries, args.lookups)
+	finally:
+		backend.close()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,82 @@
+"""Measures the memory a client keeps under different cache policies.
+
+Each client starts up against a local stand-in server, syncs every team's members and
+then parses a stream of posted events. What is still allocated afterwards, while the
+client is alive, is what its caches hold.
+
+Usage: python benchmarks/cache_policy.py [--teams 5] [--members 20000] [--posts 50000]
+"""
+import argparse
+import asyncio
+import gc
+import random
+import tracemalloc
+
+from _package import load_package
+
+load_package()
+from mattermost.cache import CachePolicy
+from mattermost.client import Client
+
+from _standin import StandIn, channel_id, login, posted, team_id
+
+_POLICIES = {
+	'everything': CachePolicy.all(),
+	'no members': CachePolicy(members=False),
+	'no posts': CachePolicy(posts=False),
+	'no members or posts': CachePolicy(members=False, posts=False),
+	'nothing': CachePolicy.none()
+}
+
+def _events(args):
+	rng = random.Random(0)
+	events = []
+	for number in range(args.posts):
+		team = rng.randrange(args.teams)
+		events.append(posted(channel_id(team, rng.randrange(args.channels)), number, team=team_id(team)))
+	return events
+
+async def _measure(url, policy, args):
+	events = _events(args)
+	gc.collect()
+	tracemalloc.start()
+	client = Client(cache_policy=policy)
+	try:
+		await login(client, url)
+		state = client._connection
+		for team in await state._bootstrap_teams():
+			await state._bootstrap_channels(team)
+			async for _ in team.fetch_members(limit=None, concurrency=8):
+				pass
+
+		parse = state.parsers['POSTED']
+		for event in events:
+			parse(event)
+
+		del event
+		gc.collect()
+		return tracemalloc.get_traced_memory()[0]
+	finally:
+		tracemalloc.stop()
+		await client.close()
+
+async def main(args):
+	standin = StandIn(teams=args.teams, channels=args.channels, members=args.members)
+	url = await standin.start()
+	try:
+		results = {}
+		for name, policy in _POLICIES.items():
+			results[name] = memory = await _measure(url, policy, args)
+			saved = 1 - memory / results['everything']
+			print(f'{name:<20} {memory / 1048576:8.1f} MiB  {saved:4.0%} saved')
+	finally:
+		await standin.close()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--teams', type=int, default=5)
+	parser.add_argument('--channels', type=int, default=50)
+	parser.add_argument('--members', type=int, default=20_000)
+	parser.add_argument('--posts', type=int, default=50_000)
+	args = parser.parse_args()
+	asyncio.run(main(args))
@@ -0,0 +1,101 @@
+"""Measures member chunks being matched to their requests while many teams sync at once.
+
+Every team has a chunk request open and their chunks arrive interleaved, like member
+syncs running in parallel. The indexed lookup ConnectionState uses is timed against
+scanning every request per chunk and adding members one at a time, the way it was
+done before. Members are built before the timing starts, 50 teams of 50k members
+take close to a GiB.
+
+Usage: python benchmarks/chunking.py [--teams 50] [--members 50000] [--chunk 200]
+"""
+import argparse
+import asyncio
+import time
+
+from _package import load_package
+
+load_package()
+from mattermost.client import Client
+from mattermost.member import Member
+from mattermost.state import ChunkRequest
+from mattermost.team import Team
+
+from _standin import team_id, user_id
+
+def _scan(state, team_id, nonce, members, complete):
+	removed = []
+	for key, request in state._chunk_requests.items():
+		if request.team_id == team_id and request.nonce == nonce:
+			request.buffer.extend(members)
+			team = request.resolver(request.team_id)
+			for member in members:
+				if team.get_member(member.id) is None:
+					team._add_member(member)
+			if complete:
+				request.done()
+				removed.append(key)
+
+	for key in removed:
+		del state._chunk_requests[key]
+
+def _prepare(args):
+	state = Client()._connection
+	loop = asyncio.get_running_loop()
+	requests = []
+	chunks = []
+	for index in range(args.teams):
+		team = Team(data={
+			'id': team_id(index),
+			'name': f'team{index}',
+			'display_name': f'Team {index}',
+			'create_at': 0,
+			'update_at': 0,
+			'delete_at': 0,
+			'description': '',
+			'email': '',
+			'type': 'O',
+			'allowed_domains': '',
+			'invite_id': '',
+			'allow_open_invite': False,
+			'policy_id': None
+		}, state=state)
+		state._add_team(team)
+		request = ChunkRequest(team.id, loop, state._get_team)
+		state._add_chunk_request(request)
+		requests.append(request)
+
+		members = [Member(data={'user_id': user_id(user)}, team=team, state=state) for user in range(args.members)]
+		chunks.append([members[start:start + args.chunk] for start in range(0, args.members, args.chunk)])
+
+	# Round robin over the teams, each team's chunks stay in order
+	interleaved = []
+	for position in range(max(len(team_chunks) for team_chunks in chunks)):
+		for request, team_chunks in zip(requests, chunks):
+			if position < len(team_chunks):
+				interleaved.append((request, team_chunks[position], position == len(team_chunks) - 1))
+	return state, interleaved
+
+async def _measure(name, process, args):
+	state, interleaved = _prepare(args)
+	start = time.perf_counter()
+	for request, members, complete in interleaved:
+		process(state, request.team_id, request.nonce, members, complete)
+	elapsed = time.perf_counter() - start
+
+	cached = sum(len(team._members) for team in state._teams.values())
+	print(
+		f'{name:<8} {len(interleaved):>7} chunks  {cached:>9} members cached  {elapsed:7.2f}s  '
+		f'{cached / elapsed:10.0f} members/s'
+	)
+
+async def main(args):
+	await _measure('indexed', lambda state, *chunk: state.process_chunk_requests(*chunk), args)
+	await _measure('scan', _scan, args)
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--teams', type=int, default=50)
+	parser.add_argument('--members', type=int, default=50_000)
+	parser.add_argument('--chunk', type=int, default=200)
+	args = parser.parse_args()
+	asyncio.run(main(args))
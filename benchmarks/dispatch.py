@@ -0,0 +1,52 @@
+"""Measures the cost of Client.dispatch per event.
+
+Usage: python benchmarks/dispatch.py [--number N]
+"""
+import argparse
+import asyncio
+import timeit
+
+from _package import load_package
+
+load_package()
+from mattermost.client import Client
+
+class _Post:
+	__slots__ = ('channel_id', 'user_id', 'root_id')
+
+	def __init__(self) -> None:
+		self.channel_id = 'c' * 26
+		self.user_id = 'u' * 26
+		self.root_id = None
+
+def _report(name: str, seconds: float, number: int) -> None:
+	print(f'{name:<32} {seconds / number * 1e9:8.0f} ns/event')
+
+async def main(number: int) -> None:
+	client = Client()
+	await client._async_setup_hook()
+	post = _Post()
+
+	# Nobody listens, the common case for the many events a bot doesn't handle
+	_report('unhandled event', timeit.timeit(lambda: client.dispatch('typing', post), number=number), number)
+
+	# A wait_for on another channel, the keyed lookup misses
+	waiter = asyncio.ensure_future(client.wait_for('post', channel_id='x' * 26))
+	await asyncio.sleep(0)
+	_report('keyed waiter, other channel', timeit.timeit(lambda: client.dispatch('post', post), number=number), number)
+	waiter.cancel()
+
+	# A handler, every dispatch schedules it
+	@client.event
+	async def on_post(post):
+		pass
+
+	tasks = number // 10
+	_report('handled event', timeit.timeit(lambda: client.dispatch('post', post), number=tasks), tasks)
+	await client._drain(5.0)
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--number', type=int, default=200_000)
+	args = parser.parse_args()
+	asyncio.run(main(args.number))
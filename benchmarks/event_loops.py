@@ -0,0 +1,106 @@
+"""Compares the asyncio and uvloop event loops on the same gateway stream and HTTP workload.
+
+A synthetic stream is recorded once with GatewayRecorder and replayed through a client
+on every loop, with a handler for posts so dispatch schedules work. The HTTP workload
+sends requests to a local stand-in server with a fixed number in flight. uvloop is
+skipped when it isn't installed.
+
+Usage: python benchmarks/event_loops.py [--frames 200000] [--requests 5000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from _package import load_package
+
+load_package()
+from mattermost.client import Client, _get_loop_factory
+from mattermost.replay import GatewayRecorder, GatewayReplayer
+from mattermost.utils import _to_json
+
+from _standin import StandIn, channel_id, login, posted, team_id
+
+def _record(path, frames, channels):
+	rng = random.Random(0)
+	with GatewayRecorder(path) as recorder:
+		for seq in range(1, frames + 1):
+			channel = channel_id(0, rng.randrange(channels))
+			if rng.random() < 0.7:
+				frame = posted(channel, seq, team=team_id(0))
+			else:
+				frame = {'event': 'typing', 'data': {'parent_id': '', 'user_id': 'u' * 26}, 'broadcast': {'channel_id': channel}}
+			recorder.record(_to_json({**frame, 'seq': seq}))
+
+async def _replay(path):
+	client = Client()
+	handled = 0
+
+	@client.event
+	async def on_post(post):
+		nonlocal handled
+		handled += 1
+
+	try:
+		result = await GatewayReplayer(path).replay(client)
+		await client._drain(30.0)
+		return result.events_per_second, handled
+	finally:
+		await client.close()
+
+async def _http(url, requests, concurrency, channels):
+	client = Client()
+	await login(client, url)
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async def send(index):
+		async with semaphore:
+			await client.http.get_channel_posts(channel_id(0, index % channels))
+
+	try:
+		start = time.perf_counter()
+		await asyncio.gather(*(send(index) for index in range(requests)))
+		return requests / (time.perf_counter() - start)
+	finally:
+		await client.close()
+
+async def _run(path, url, args):
+	events_per_second, handled = await _replay(path)
+	requests_per_second = await _http(url, args.requests, args.concurrency, args.channels)
+	return events_per_second, handled, requests_per_second
+
+def main(args):
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, 'stream.ndjson.gz')
+		_record(path, args.frames, args.channels)
+
+		standin = StandIn(channels=args.channels, posts=args.posts)
+		url = asyncio.run(standin.start())
+		try:
+			for name in ('asyncio', 'uvloop'):
+				try:
+					loop_factory = _get_loop_factory(name)
+				except ImportError:
+					print(f'{name:<8} skipped, it is not installed')
+					continue
+
+				with asyncio.Runner(loop_factory=loop_factory) as runner:
+					events_per_second, handled, requests_per_second = runner.run(_run(path, url, args))
+				print(
+					f'{name:<8} replay {events_per_second:9.0f} events/s ({handled} posts handled)  '
+					f'http {requests_per_second:7.0f} requests/s'
+				)
+		finally:
+			asyncio.run(standin.close())
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--frames', type=int, default=200_000)
+	parser.add_argument('--channels', type=int, default=100)
+	parser.add_argument('--posts', type=int, default=20)
+	parser.add_argument('--requests', type=int, default=5000)
+	parser.add_argument('--concurrency', type=int, default=50)
+	args = parser.parse_args()
+	main(args)
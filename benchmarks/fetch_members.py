@@ -0,0 +1,55 @@
+"""Measures Team.fetch_members throughput against a local stand-in server.
+
+Every run syncs the whole team into a fresh client, so the users are fetched in bulk
+for every page too. The stand-in adds latency to every request, with none the pages
+come back faster than a real server could send them and the concurrency doesn't show.
+
+Usage: python benchmarks/fetch_members.py [--members 100000] [--latency 0.02] [--concurrency 1,4,8,16]
+"""
+import argparse
+import asyncio
+import time
+
+from _package import load_package
+
+load_package()
+from mattermost.client import Client
+
+from _standin import StandIn, login
+
+async def _sync(url, *, concurrency, ordered, per_page):
+	client = Client()
+	await login(client, url)
+	try:
+		teams = await client._connection._bootstrap_teams()
+		start = time.perf_counter()
+		count = 0
+		async for _ in teams[0].fetch_members(limit=None, per_page=per_page, concurrency=concurrency, ordered=ordered):
+			count += 1
+		return count, time.perf_counter() - start
+	finally:
+		await client.close()
+
+async def main(args):
+	standin = StandIn(members=args.members, latency=args.latency)
+	url = await standin.start()
+	try:
+		for concurrency in (int(value) for value in args.concurrency.split(',')):
+			for ordered in (True, False):
+				requests = standin.requests
+				count, elapsed = await _sync(url, concurrency=concurrency, ordered=ordered, per_page=args.per_page)
+				print(
+					f'concurrency {concurrency:>3} {"ordered" if ordered else "unordered":<9} {count:>8} members  '
+					f'{elapsed:6.2f}s  {count / elapsed:9.0f} members/s  {standin.requests - requests:>5} requests'
+				)
+	finally:
+		await standin.close()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--members', type=int, default=100_000)
+	parser.add_argument('--per-page', type=int, default=200)
+	parser.add_argument('--latency', type=float, default=0.02)
+	parser.add_argument('--concurrency', default='1,4,8,16')
+	args = parser.parse_args()
+	asyncio.run(main(args))
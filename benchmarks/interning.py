@@ -0,0 +1,90 @@
+"""Measures the memory saved and kept by interning the ids of cached posts.
+
+A client's state caches real Post models built from payloads decoded like the gateway's,
+so every id starts out as its own string. Each run is measured with interning off, with
+the ids the models intern (user, channel, team and root) and with the post ids interned
+as well. Interned strings are never freed, what is still allocated once the state is gone
+is what a long running bot keeps forever. The 1M post runs take several minutes.
+
+Usage: python benchmarks/interning.py [--posts 1000000] [--channels 200] [--users 2000]
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from _package import load_package
+
+load_package()
+from mattermost import utils
+from mattermost.client import Client
+
+def _frames(posts, channels, users):
+	rng = random.Random(0)
+	channel_ids = [f'c{i:025d}' for i in range(channels)]
+	user_ids = [f'u{i:025d}' for i in range(users)]
+	for i in range(posts):
+		yield json.dumps({
+			'id': f'p{i:025d}',
+			'channel_id': rng.choice(channel_ids),
+			'user_id': rng.choice(user_ids),
+			'root_id': f'p{rng.randrange(i):025d}' if i and rng.random() < 0.2 else '',
+			'create_at': 1700000000000 + i,
+			'update_at': 1700000000000 + i,
+			'edit_at': 0,
+			'delete_at': 0,
+			'props': {},
+			'hashtag': '',
+			'message': 'hello',
+			'type': ''
+		})
+
+def _measure(mode, args):
+	intern_id = utils._intern_id
+	if mode == 'plain':
+		utils._intern_id = lambda value: value
+
+	gc.collect()
+	tracemalloc.start()
+	try:
+		start = time.perf_counter()
+		state = Client(max_posts=args.posts)._connection
+		for frame in _frames(args.posts, args.channels, args.users):
+			data = json.loads(frame)
+			if mode == 'post ids':
+				data['id'] = sys.intern(data['id'])
+			state._posts.store(state._materialize_post(data), data)
+		elapsed = time.perf_counter() - start
+		memory = tracemalloc.get_traced_memory()[0]
+
+		del state, data
+		gc.collect()
+		kept = tracemalloc.get_traced_memory()[0]
+	finally:
+		tracemalloc.stop()
+		utils._intern_id = intern_id
+	return memory, kept, elapsed
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--posts', type=int, default=1000000)
+	parser.add_argument('--channels', type=int, default=200)
+	parser.add_argument('--users', type=int, default=2000)
+	args = parser.parse_args()
+
+	# Interned strings outlive the runs, the one interning post ids has to go last
+	results = {mode: _measure(mode, args) for mode in ('plain', 'interned', 'post ids')}
+	for mode, (memory, kept, elapsed) in results.items():
+		print(
+			f'{mode:<9} {memory / 1048576:7.1f} MiB  {memory / args.posts:6.0f} B/post  '
+			f'{kept / 1048576:7.1f} MiB kept after the state is gone  {elapsed:6.2f}s'
+		)
+
+	plain, interned = results['plain'][0], results['interned'][0]
+	print(f'interning saves {(plain - interned) / 1048576:.1f} MiB ({(plain - interned) / plain:.0%})')
+
+if __name__ == '__main__':
+	main()
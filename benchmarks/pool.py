@@ -0,0 +1,66 @@
+"""Measures the memory per client of clients on their own and in a ClientPool.
+
+Every client logs in to a local stand-in server, which leaves it with a session and a
+kept alive connection. On their own every client has its own connector, in the pool
+they all share one.
+
+Usage: python benchmarks/pool.py [--clients 200]
+"""
+import argparse
+import asyncio
+import gc
+import tracemalloc
+
+from _package import load_package
+
+load_package()
+from mattermost.client import Client
+from mattermost.pool import ClientPool
+
+from _standin import StandIn, login
+
+async def _standalone(url, clients):
+	created = [Client() for _ in range(clients)]
+	for client in created:
+		await login(client, url)
+	return created, len({id(client.http.connector) for client in created})
+
+async def _pooled(url, clients):
+	pool = ClientPool()
+	created = [pool.add_client(url, f'token{index}') for index in range(clients)]
+	for entry in pool._entries:
+		pool._prepare(entry)
+		await login(entry.client, url, entry.token)
+	return created, len({id(client.http.connector) for client in created})
+
+async def _measure(name, build, url, clients):
+	gc.collect()
+	tracemalloc.start()
+	try:
+		created, connectors = await build(url, clients)
+		gc.collect()
+		memory = tracemalloc.get_traced_memory()[0]
+	finally:
+		tracemalloc.stop()
+
+	print(f'{name:<10} {clients:>5} clients  {connectors:>5} connectors  {memory / clients / 1024:7.1f} KiB/client')
+	for client in created:
+		await client.close()
+	# Shared connectors aren't closed by the clients using them
+	for connector in {client.http.connector for client in created}:
+		await connector.close()
+
+async def main(clients):
+	standin = StandIn()
+	url = await standin.start()
+	try:
+		await _measure('standalone', _standalone, url, clients)
+		await _measure('pooled', _pooled, url, clients)
+	finally:
+		await standin.close()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--clients', type=int, default=200)
+	args = parser.parse_args()
+	asyncio.run(main(args.clients))
@@ -0,0 +1,117 @@
+"""Measures PostCache and CompactPostCache memory and lookup latency.
+
+Posts are synthetic payloads materialized into real Post models by a client's state,
+which has their team and channels cached the way a connected client would. Building runs
+under tracemalloc to count the memory, which makes it several times slower, the 1M runs
+take several minutes.
+
+Usage: python benchmarks/post_cache.py [--sizes 100000,1000000] [--channels 500]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from _package import load_package
+
+load_package()
+from mattermost.cache import CompactPostCache, PostCache
+from mattermost.channel import TextChannel
+from mattermost.client import Client
+from mattermost.team import Team
+
+_TEAM_ID = 't' * 26
+
+def _state(channels):
+	state = Client(max_posts=None)._connection
+	team = Team(data={
+		'id': _TEAM_ID,
+		'name': 'team',
+		'display_name': 'Team',
+		'create_at': 0,
+		'update_at': 0,
+		'delete_at': 0,
+		'description': '',
+		'email': '',
+		'type': 'O',
+		'allowed_domains': '',
+		'invite_id': '',
+		'allow_open_invite': False,
+		'policy_id': None
+	}, state=state)
+	state._add_team(team)
+	for i in range(channels):
+		team._add_channel(TextChannel(state=state, team=team, data={'id': f'{i:026d}', 'type': 'O', 'name': f'channel-{i}'}))
+	return state
+
+def _payloads(size, channels):
+	rng = random.Random(0)
+	channel_ids = [f'{i:026d}' for i in range(channels)]
+	for i in range(size):
+		yield {
+			'id': f'p{i:025d}',
+			'channel_id': rng.choice(channel_ids),
+			'team_id': _TEAM_ID,
+			'user_id': f'u{rng.randrange(1000):025d}',
+			'create_at': 1700000000000 + i,
+			'update_at': 1700000000000 + i,
+			'edit_at': 0,
+			'delete_at': 0,
+			'props': {},
+			'hashtag': '',
+			'message': 'x' * rng.randrange(20, 200),
+			'type': ''
+		}
+
+def _build(state, kind, size, channels):
+	materialize = state._materialize_post
+	if kind == 'objects':
+		cache = PostCache(max_size=None)
+		for data in _payloads(size, channels):
+			cache.add(materialize(data))
+	else:
+		cache = CompactPostCache(max_size=None, materialize=materialize, compress=kind == 'compressed')
+		for data in _payloads(size, channels):
+			cache.add_payload(data)
+	return cache
+
+def _measure(state, kind, size, channels, lookups):
+	tracemalloc.start()
+	start = time.perf_counter()
+	cache = _build(state, kind, size, channels)
+	built = time.perf_counter() - start
+	memory = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+
+	rng = random.Random(1)
+	ids = [f'p{rng.randrange(size):025d}' for _ in range(lookups)]
+	start = time.perf_counter()
+	for post_id in ids:
+		cache.get(post_id)
+	get = (time.perf_counter() - start) / lookups
+
+	channel_ids = [f'{rng.randrange(channels):026d}' for _ in range(lookups // 100)]
+	start = time.perf_counter()
+	for channel_id in channel_ids:
+		cache.channel_posts(channel_id, limit=50)
+	recent = (time.perf_counter() - start) / len(channel_ids)
+
+	print(
+		f'{kind:<12} {size:>9} posts  {memory / size:7.0f} B/post  build {built:6.2f}s  '
+		f'get {get * 1e6:6.2f} us  last 50 {recent * 1e6:8.1f} us'
+	)
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--sizes', default='100000,1000000')
+	parser.add_argument('--channels', type=int, default=500)
+	parser.add_argument('--lookups', type=int, default=100000)
+	args = parser.parse_args()
+
+	state = _state(args.channels)
+	for size in (int(size) for size in args.sizes.split(',')):
+		for kind in ('objects', 'compact', 'compressed'):
+			_measure(state, kind, size, args.channels, args.lookups)
+
+if __name__ == '__main__':
+	main()
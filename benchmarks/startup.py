@@ -0,0 +1,56 @@
+"""Measures the startup cost of creating many clients in one process.
+
+Times creating the clients, their async setup, and on its own how their states' parser
+tables are bound, next to building the table with inspect.getmembers for every instance
+the way ConnectionState used to.
+
+Usage: python benchmarks/startup.py [--clients 1000]
+"""
+import argparse
+import asyncio
+import inspect
+import time
+
+from _package import load_package
+
+load_package()
+from mattermost.client import Client
+
+def _report(name, seconds, clients):
+	print(f'{name:<32} {seconds * 1e3:8.1f} ms  {seconds / clients * 1e6:8.1f} us/client')
+
+def _getmembers(state):
+	return {
+		attr[6:].upper(): func
+		for attr, func in inspect.getmembers(state)
+		if attr.startswith('parse_')
+	}
+
+async def main(clients):
+	start = time.perf_counter()
+	created = [Client() for _ in range(clients)]
+	_report('Client()', time.perf_counter() - start, clients)
+
+	start = time.perf_counter()
+	for client in created:
+		await client._async_setup_hook()
+	_report('async setup', time.perf_counter() - start, clients)
+
+	states = [client._connection for client in created]
+	start = time.perf_counter()
+	for state in states:
+		{key: func.__get__(state) for key, func in state._PARSERS.items()}
+	_report('parser table, class registry', time.perf_counter() - start, clients)
+
+	start = time.perf_counter()
+	for state in states:
+		_getmembers(state)
+	_report('parser table, inspect.getmembers', time.perf_counter() - start, clients)
+
+	await asyncio.gather(*(client.close() for client in created))
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--clients', type=int, default=1000)
+	args = parser.parse_args()
+	asyncio.run(main(args.clients))
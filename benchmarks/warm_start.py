@@ -0,0 +1,82 @@
+"""Measures time-to-ready for a cold start and a warm start from a cache snapshot.
+
+Both start against a local stand-in server. The cold start fetches the teams and
+channels, then syncs every team's members the way a bot that needs them would, and
+writes the snapshot when it closes. The warm start loads the snapshot, fetches the
+teams and channels and only catches up on the users and posts that changed.
+
+Usage: python benchmarks/warm_start.py [--teams 5] [--members 20000] [--latency 0.02]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from _package import load_package
+
+load_package()
+from mattermost.client import Client
+
+from _standin import StandIn, channel_id, login, posted, team_id
+
+async def _start(url, path, *, sync_members):
+	client = Client(snapshot_path=path)
+	await login(client, url)
+	ready = asyncio.ensure_future(client.wait_for('ready'))
+	start = time.perf_counter()
+	connection = asyncio.create_task(client.connect())
+	try:
+		await ready
+		ready_at = time.perf_counter() - start
+		if sync_members:
+			for team in client._connection._teams.values():
+				async for _ in team.fetch_members(limit=None, concurrency=8):
+					pass
+		useful_at = time.perf_counter() - start
+		state = client._connection
+		members = sum(len(team._members) for team in state._teams.values())
+		return ready_at, useful_at, members, len(state._posts or ())
+	finally:
+		await client.close()
+		await connection
+
+async def main(args):
+	# A post in every channel while the cold start is connected gives the warm start a position to catch up from
+	frames = [
+		posted(channel_id(team, channel), 0, team=team_id(team))
+		for team in range(args.teams)
+		for channel in range(args.channels)
+	]
+	standin = StandIn(
+		teams=args.teams,
+		channels=args.channels,
+		members=args.members,
+		posts=args.posts,
+		latency=args.latency,
+		frames=frames
+	)
+	url = await standin.start()
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, 'snapshot.json.gz')
+		try:
+			for name, sync_members in (('cold', True), ('warm', False)):
+				requests = standin.requests
+				ready_at, useful_at, members, posts = await _start(url, path, sync_members=sync_members)
+				print(
+					f'{name}  ready {ready_at:6.2f}s  members cached {useful_at:6.2f}s  {members:>7} members  '
+					f'{posts:>5} posts  {standin.requests - requests:>5} requests'
+				)
+			print(f'snapshot {os.path.getsize(path) / 1024:.0f} KiB')
+		finally:
+			await standin.close()
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--teams', type=int, default=5)
+	parser.add_argument('--channels', type=int, default=50)
+	parser.add_argument('--members', type=int, default=20_000)
+	parser.add_argument('--posts', type=int, default=5)
+	parser.add_argument('--latency', type=float, default=0.02)
+	args = parser.parse_args()
+	asyncio.run(main(args))
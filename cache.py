@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from itertools import islice
+import time
+import zlib
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Callable,
+	ClassVar,
+	Dict,
+	Iterator,
+	List,
+	NamedTuple,
+	Optional,
+	Tuple,
+	Union
+)
+
+# Local imports
+from . import utils
+
+if TYPE_CHECKING:
+	from .post import Post
+	from .user import User
+	from .payloads.post import Post as PostPayload
+
+__all__ = (
+	'PostCache',
+	'CompactPostCache',
+	'UserCache',
+	'CacheStats',
+	'CachePolicy'
+)
+
+class CacheStats(NamedTuple):
+	"""Hit and miss counters of a cache"""
+	hits: int
+	misses: int
+	evictions: int
+	size: int
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+class CachePolicy:
+	"""Controls which entities the client caches and how many of each it keeps.
+
+	Every entity takes True to cache it with the default limit, False to not cache it
+	at all, or an int to keep at most that many. Members and threads are limited per team.
+	"""
+
+	ENTITIES: ClassVar[Tuple[str, ...]] = ('users', 'members', 'posts', 'threads', 'dms')
+	# None is unbounded, users are held weakly unless they're given a limit
+	DEFAULT_LIMITS: ClassVar[Dict[str, Optional[int]]] = {
+		'users': None,
+		'members': None,
+		'posts': 1000,
+		'threads': None,
+		'dms': 128
+	}
+
+	__slots__ = ENTITIES
+
+	def __init__(
+		self,
+		*,
+		users: Union[bool, int] = True,
+		members: Union[bool, int] = True,
+		posts: Union[bool, int] = True,
+		threads: Union[bool, int] = True,
+		dms: Union[bool, int] = True
+	) -> None:
+		for name, value in zip(self.ENTITIES, (users, members, posts, threads, dms)):
+			if not isinstance(value, (bool, int)):
+				raise TypeError(f'{name} must be a bool or int, not {value.__class__.__name__}')
+			if not isinstance(value, bool) and value <= 0:
+				raise ValueError(f'{name} must be greater than 0, use False to disable it')
+			setattr(self, name, value)
+
+	def __repr__(self) -> str:
+		inner = ' '.join(f'{name}={getattr(self, name)}' for name in self.ENTITIES)
+		return f'<CachePolicy {inner}>'
+
+	@classmethod
+	def all(cls) -> CachePolicy:
+		return cls()
+
+	@classmethod
+	def none(cls) -> CachePolicy:
+		# Events still carry their objects, they just aren't kept afterwards
+		return cls(users=False, members=False, posts=False, threads=False, dms=False)
+
+	def enabled(self, entity: str) -> bool:
+		return getattr(self, entity) is not False
+
+	def limit(self, entity: str) -> Optional[int]:
+		value = getattr(self, entity)
+		if value is True:
+			return self.DEFAULT_LIMITS[entity]
+		if value is False:
+			return 0
+		return value
+
+class PostCache:
+	"""A least recently used cache of posts indexed by id, with a per-channel index.
+
+	Lookups, inserts and evictions are O(1), fetching the last k posts of a channel is O(k).
+	"""
+
+	__slots__ = ('max_size', '_entries', '_channels')
+
+	def __init__(self, max_size: Optional[int] = 1000) -> None:
+		self.max_size: Optional[int] = max_size
+		# post id -> entry, least recently used first
+		self._entries: OrderedDict[str, Any] = OrderedDict()
+		# channel id -> post ids in the order they were added to the cache
+		self._channels: Dict[str, OrderedDict[str, None]] = {}
+
+	def __repr__(self) -> str:
+		return f'<{self.__class__.__name__} size={len(self._entries)} max_size={self.max_size} channels={len(self._channels)}>'
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def __contains__(self, post_id: object) -> bool:
+		return post_id in self._entries
+
+	def __iter__(self) -> Iterator[Post]:
+		load = self._load
+		return (load(entry) for entry in self._entries.values())
+
+	# What an entry is depends on the cache, here it's the Post itself
+	def _load(self, entry: Any) -> Post:
+		return entry
+
+	def _channel_of(self, entry: Any) -> str:
+		return entry.channel.id
+
+	def store(self, post: Post, data: PostPayload) -> None:
+		# Called by the state with both the post and the payload it was built from
+		self.add(post)
+
+	def add(self, post: Post) -> None:
+		self._put(post.id, post.channel.id, post)
+
+	def _put(self, post_id: str, channel_id: str, entry: Any) -> None:
+		entries = self._entries
+		previous = entries.get(post_id)
+		if previous is not None:
+			entries.move_to_end(post_id)
+			entries[post_id] = entry
+			previous_channel = self._channel_of(previous)
+			if previous_channel == channel_id:
+				return
+			# Stored again under another channel, the old index would hand it out there
+			self._unindex(post_id, previous_channel)
+		else:
+			entries[post_id] = entry
+
+		try:
+			self._channels[channel_id][post_id] = None
+		except KeyError:
+			self._channels[channel_id] = OrderedDict(((post_id, None),))
+
+		if self.max_size is not None:
+			while len(entries) > self.max_size:
+				evicted_id, evicted = entries.popitem(last=False)
+				self._unindex(evicted_id, self._channel_of(evicted))
+
+	def get(self, post_id: str) -> Optional[Post]:
+		try:
+			entry = self._entries[post_id]
+		except KeyError:
+			return None
+
+		self._entries.move_to_end(post_id)
+		return self._load(entry)
+
+	def pop(self, post_id: str) -> Optional[Post]:
+		entry = self._entries.pop(post_id, None)
+		if entry is None:
+			return None
+
+		self._unindex(post_id, self._channel_of(entry))
+		return self._load(entry)
+
+	def _unindex(self, post_id: str, channel_id: str) -> None:
+		channel = self._channels.get(channel_id)
+		if channel is None:
+			return
+
+		channel.pop(post_id, None)
+		if not channel:
+			del self._channels[channel_id]
+
+	def channel_posts(self, channel_id: str, *, limit: Optional[int] = None) -> List[Post]:
+		# The last limit posts cached for the channel, oldest first
+		channel = self._channels.get(channel_id)
+		if not channel:
+			return []
+
+		ids = reversed(channel) if limit is None else islice(reversed(channel), limit)
+		entries = self._entries
+		load = self._load
+		result = [load(entries[post_id]) for post_id in ids]
+		result.reverse()
+		return result
+
+	def remove_channel(self, channel_id: str) -> None:
+		channel = self._channels.pop(channel_id, None)
+		if channel is None:
+			return
+
+		for post_id in channel:
+			self._entries.pop(post_id, None)
+
+	def clear(self) -> None:
+		self._entries.clear()
+		self._channels.clear()
+
+class CompactPostCache(PostCache):
+	"""A PostCache that keeps the encoded payloads instead of Post objects.
+
+	Posts are only built when they're read from the cache, and a new Post is built every
+	time, so edits have to be stored again to be kept. With compress the payloads are also
+	zlib compressed, trading CPU on every read for memory.
+	"""
+
+	__slots__ = ('compress', '_materialize')
+
+	def __init__(
+		self,
+		max_size: Optional[int] = 1000,
+		*,
+		materialize: Callable[[PostPayload], Post],
+		compress: bool = False
+	) -> None:
+		super().__init__(max_size)
+		self.compress: bool = compress
+		self._materialize: Callable[[PostPayload], Post] = materialize
+
+	# Entries are (channel id, encoded payload)
+	def _load(self, entry: Tuple[str, bytes]) -> Post:
+		return self._materialize(self._decode(entry[1]))
+
+	def _channel_of(self, entry: Tuple[str, bytes]) -> str:
+		return entry[0]
+
+	def _encode(self, data: PostPayload) -> bytes:
+		raw = utils._to_json(data).encode('utf-8')
+		if self.compress:
+			return zlib.compress(raw)
+		return raw
+
+	def _decode(self, raw: bytes) -> PostPayload:
+		if self.compress:
+			raw = zlib.decompress(raw)
+		return utils._from_json(raw)
+
+	def store(self, post: Post, data: PostPayload) -> None:
+		self.add_payload(data)
+
+	def add(self, post: Post) -> None:
+		raise TypeError('CompactPostCache stores payloads, use add_payload')
+
+	def add_payload(self, data: PostPayload) -> None:
+		# Every entry keeps its channel id, one shared string per channel
+		channel_id = utils._intern_id(data['channel_id'])
+		self._put(data['id'], channel_id, (channel_id, self._encode(data)))
+
+	def get_payload(self, post_id: str) -> Optional[PostPayload]:
+		# Reads a post's payload without building the Post
+		entry = self._entries.get(post_id)
+		if entry is None:
+			return None
+		return self._decode(entry[1])
+
+class UserCache:
+	"""A least recently used cache of users that keeps strong references.
+
+	Users are evicted once there are more than max_size of them, and are treated as
+	missing once they've been cached for longer than ttl seconds. Either limit can be None.
+	"""
+
+	__slots__ = ('max_size', 'ttl', 'evictions', '_users')
+
+	def __init__(self, max_size: Optional[int] = None, *, ttl: Optional[float] = None) -> None:
+		self.max_size: Optional[int] = max_size
+		self.ttl: Optional[float] = ttl
+		self.evictions: int = 0
+		# user id -> (user, expiry), least recently used first
+		self._users: OrderedDict[str, Tuple[User, float]] = OrderedDict()
+
+	def __repr__(self) -> str:
+		return f'<UserCache size={len(self._users)} max_size={self.max_size} ttl={self.ttl}>'
+
+	def __len__(self) -> int:
+		return len(self._users)
+
+	def __contains__(self, user_id: object) -> bool:
+		return self.get(user_id) is not None # type: ignore
+
+	def __getitem__(self, user_id: str) -> User:
+		user, expires = self._users[user_id]
+		if expires < time.monotonic():
+			del self._users[user_id]
+			self.evictions += 1
+			raise KeyError(user_id)
+
+		self._users.move_to_end(user_id)
+		return user
+
+	def __setitem__(self, user_id: str, user: User) -> None:
+		expires = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+		users = self._users
+		users[user_id] = (user, expires)
+		users.move_to_end(user_id)
+		if self.max_size is not None:
+			while len(users) > self.max_size:
+				users.popitem(last=False)
+				self.evictions += 1
+
+	def get(self, user_id: str, default: Optional[User] = None) -> Optional[User]:
+		try:
+			return self[user_id]
+		except KeyError:
+			return default
+
+	def pop(self, user_id: str, default: Optional[User] = None) -> Optional[User]:
+		try:
+			return self._users.pop(user_id)[0]
+		except KeyError:
+			return default
+
+	def values(self) -> Iterator[User]:
+		return (user for user, _ in self._users.values())
+
+	def clear(self) -> None:
+		self._users.clear()
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import logging
+import time
+from typing import (
+	TYPE_CHECKING,
+	Dict,
+	List,
+	NamedTuple,
+	Optional,
+	Set,
+	Tuple
+)
+
+# Local imports
+from . import utils
+
+if TYPE_CHECKING:
+	from .state import ConnectionState
+	from .payloads.post import Post as PostPayload
+
+__all__ = (
+	'CatchUpEngine',
+	'CatchUpReport'
+)
+
+_log = logging.getLogger(__name__)
+
+class CatchUpReport(NamedTuple):
+	"""What a catch up fetched and how long it took"""
+	channels: int
+	posts: int
+	# Channels whose fetch failed, they keep their position for the next catch up
+	failed: int
+	elapsed: float
+
+class CatchUpEngine:
+	"""Recovers the posts a client missed while it wasn't connected.
+
+	The engine remembers the newest update_at it has seen in every channel. A catch up
+	asks each of those channels for the posts changed since then, concurrency channels
+	at a time, and replays them through the state in the order they changed: new posts
+	as post events, edits as post_edit and deletions as post_delete.
+
+	Only the max_channels most recently active channels are tracked, a channel that
+	falls out isn't caught up on. Channels the client can't see any more are forgotten.
+	"""
+
+	def __init__(self, state: ConnectionState, *, concurrency: int = 8, max_channels: Optional[int] = 1000) -> None:
+		if concurrency <= 0:
+			raise ValueError('concurrency must be greater than 0')
+		if max_channels is not None and max_channels <= 0:
+			raise ValueError('max_channels must be greater than 0')
+
+		self.concurrency: int = concurrency
+		self.max_channels: Optional[int] = max_channels
+		self._state: ConnectionState = state
+		# channel id -> newest update_at seen in it, in milliseconds, least recently active first
+		self._last_seen: OrderedDict[str, int] = OrderedDict()
+		# (post id, update_at) of live events received while a catch up is running,
+		# so the fetched copies of those aren't handled twice
+		self._live: Optional[Set[Tuple[str, int]]] = None
+
+	def __repr__(self) -> str:
+		return f'<CatchUpEngine channels={len(self._last_seen)} concurrency={self.concurrency} max_channels={self.max_channels}>'
+
+	@property
+	def channels(self) -> int:
+		return len(self._last_seen)
+
+	def observe(self, data: PostPayload) -> None:
+		# Called by the state for every post event it handles
+		channel_id = utils._intern_id(data['channel_id'])
+		update_at = data.get('update_at') or data.get('create_at') or 0
+		last_seen = self._last_seen
+		if update_at > last_seen.get(channel_id, 0):
+			last_seen[channel_id] = update_at
+		if channel_id in last_seen:
+			last_seen.move_to_end(channel_id)
+			self._trim()
+
+		if self._live is not None:
+			self._live.add((data['id'], update_at))
+
+	def positions(self) -> Dict[str, int]:
+		# A copy of every channel's position, e.g. to save in a snapshot
+		return dict(self._last_seen)
+
+	def restore(self, positions: Dict[str, int]) -> None:
+		# Puts back what positions returned, keeping any newer position already seen
+		last_seen = self._last_seen
+		for channel_id, update_at in positions.items():
+			channel_id = utils._intern_id(channel_id)
+			if update_at > last_seen.get(channel_id, 0):
+				last_seen[channel_id] = update_at
+		self._trim()
+
+	def _trim(self) -> None:
+		if self.max_channels is None:
+			return
+
+		last_seen = self._last_seen
+		while len(last_seen) > self.max_channels:
+			last_seen.popitem(last=False)
+
+	def forget(self, channel_id: str) -> None:
+		self._last_seen.pop(channel_id, None)
+
+	def clear(self) -> None:
+		self._last_seen.clear()
+
+	def begin(self) -> List[Tuple[str, int]]:
+		# Takes every channel's position and starts recording the live events. A new
+		# connection has to call this before handling any of its events, or the ones
+		# already buffered move the positions past what was missed.
+		self._live = set()
+		return list(self._last_seen.items())
+
+	async def catch_up(self, *, dispatch: bool = True, positions: Optional[List[Tuple[str, int]]] = None) -> CatchUpReport:
+		# positions is what begin returned, taken now when not given
+		start = time.perf_counter()
+		state = self._state
+		semaphore = asyncio.Semaphore(self.concurrency)
+		if positions is None:
+			positions = self.begin()
+
+		async def fetch(channel_id: str, since: int) -> List[PostPayload]:
+			async with semaphore:
+				data = await state.http.get_channel_posts(channel_id, since=since)
+			posts = data.get('posts') or {}
+			return [posts[post_id] for post_id in data.get('order') or ()]
+
+		try:
+			results = await asyncio.gather(*(fetch(channel_id, since) for channel_id, since in positions), return_exceptions=True)
+
+			missed: List[PostPayload] = []
+			failed = 0
+			for (channel_id, since), result in zip(positions, results):
+				if isinstance(result, BaseException):
+					if isinstance(result, asyncio.CancelledError):
+						raise result
+					failed += 1
+					# Live events may have moved it on, which would skip what was missed,
+					# unless the channel was forgotten in the meantime
+					if channel_id in self._last_seen:
+						self._last_seen[channel_id] = since
+					_log.warning(f'Could not catch up on channel {channel_id}: {result!r}')
+				else:
+					missed.extend(result)
+
+			live = self._live
+			missed = [
+				data for data in missed
+				if (data['id'], data.get('update_at') or data.get('create_at') or 0) not in live
+			]
+		finally:
+			self._live = None
+
+		# Replayed in the order things happened across every channel
+		missed.sort(key=lambda data: (data.get('update_at') or 0, data.get('create_at') or 0))
+		since_by_channel = dict(positions)
+		for data in missed:
+			if dispatch:
+				self._replay(data, since_by_channel.get(data['channel_id'], 0))
+			else:
+				state._merge_post(data)
+			self.observe(data)
+
+		report = CatchUpReport(
+			channels=len(positions),
+			posts=len(missed),
+			failed=failed,
+			elapsed=time.perf_counter() - start
+		)
+		_log.debug(f'Caught up on {report.posts} posts in {report.channels} channels in {report.elapsed:.2f}s')
+		return report
+
+	def _replay(self, data: PostPayload, since: int) -> None:
+		# Anything created before the channel's position already went out as a post event
+		state = self._state
+		created = (data.get('create_at') or 0) > since
+		if data.get('delete_at'):
+			# Posts created and deleted while away were never seen, there's nothing to report
+			if not created:
+				state._handle_post_delete(data)
+		elif created:
+			state._handle_post(data)
+		else:
+			state._handle_post_edit(data)
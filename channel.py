@@ -25,6 +25,7 @@ import mattermost.abc
 from . import utils
 from .utils import MISSING
 from .errors import ClientException
+from .mixins import Hashable
 from .http import handle_post_parameters
 from .threads import Thread
 
@@ -64,7 +65,7 @@ class TextChannel(mattermost.abc.Postable, mattermost.abc.TeamChannel, Hashable)
 
 	def __init__(self, *, state: ConnectionState, team: Team, data: TextChannelPayload) -> None:
 		self._state: ConnectionState = state
-		self.id: str = data['id']
+		self.id: str = utils._intern_id(data['id'])
 		self._type: str = data['type']
 		self._update(team, data)
 
@@ -72,7 +73,8 @@ class TextChannel(mattermost.abc.Postable, mattermost.abc.TeamChannel, Hashable)
 		return ''
 
 	def _update(self, team: Team, data: TextChannelPayload) -> None:
-		...
+		self.team: Team = team
+		self.name: str = data['name']
 
 	async def _get_channel(self) -> Self:
 		return self
@@ -156,7 +158,7 @@ class DMChannel(mattermost.abc.Postable, mattermost.abc.PrivateChannel, Hashable
 		self._state: ConnectionState = state
 		self.recipient: Optional[User] = state.store_user(data['recipients'][0]) # TODO: Look at the mm api for DMs
 		self.me: ClientUser = me
-		self.id: str = data['id']
+		self.id: str = utils._intern_id(data['id'])
 
 	async def _get_channel(self) -> Self:
 		return self
@@ -190,8 +192,8 @@ class GroupChannel(mattermost.abc.Postable, mattermost.abc.PrivateChannel, Hasha
 class PartialPostable(mattermost.abc.Postable, Hashable):
 	def __init__(self, state: ConnectionState, id: str, team_id: Optional[str] = None, type: Optional[str] = None) -> None:
 		self._state: ConnectionState = state
-		self.id: str = id
-		self.team_id: str = team_id
+		self.id: str = utils._intern_id(id)
+		self.team_id: str = utils._intern_id(team_id)
 		self.type: str = type
 
 	def __repr__(self) -> str:
@@ -7,9 +7,11 @@ from __future__ import annotations
 import asyncio
 from cgitb import handler
 import datetime
+import functools
 import logging
 import sys
 import os
+import tracemalloc
 from typing import (
 	TYPE_CHECKING,
 	Any,
@@ -17,24 +19,35 @@ from typing import (
 	Coroutine,
 	Dict,
 	List,
+	Literal,
 	Optional,
+	NamedTuple,
 	Sequence,
+	Set,
 	Tuple,
-	Type
+	Type,
+	TypeVar,
+	Union
 )
 
 import aiohttp
 
 # Local imports
+from .backoff import ExponentialBackoff, ReconnectLimiter, default_reconnect_limiter
+from .cache import CacheStats
 from .user import User, ClientUser
 from .team import Team
 from .channel import PartialPostable
 from .enums import Status
 from .errors import *
+from .executor import EventExecutor, ExecutorStats
 from .gateway import *
 from .http import HTTPClient
+from .memory import CacheAccountant, CacheStatsReporter, CacheUsage
 from .mentions import AllowedMentions
-from .state import ConnectionState
+from .monitor import LoopLagMonitor
+from .replay import GatewayRecorder
+from .state import ConnectionState, ReadyReport
 from . import utils
 from .utils import MISSING
 
@@ -53,6 +66,53 @@ __all__ = (
 
 _log = logging.getLogger(__name__)
 
+CoroT = TypeVar('CoroT', bound=Callable[..., Coroutine[Any, Any, Any]])
+
+def _get_loop_factory(event_loop: str) -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+	# None means the default asyncio loop
+	if event_loop == 'asyncio':
+		return None
+
+	if event_loop not in ('uvloop', 'auto'):
+		raise ValueError(f"event_loop must be 'asyncio', 'uvloop' or 'auto', not {event_loop!r}")
+
+	try:
+		import uvloop
+	except ImportError:
+		if event_loop == 'uvloop':
+			raise
+		_log.info('uvloop is not installed, using the asyncio event loop')
+		return None
+
+	_log.info(f'Using the uvloop {uvloop.__version__} event loop')
+	return uvloop.new_event_loop
+
+def _channel_id_of(obj: Any) -> Optional[str]:
+	return getattr(obj, 'channel_id', None) or getattr(getattr(obj, 'channel', None), 'id', None)
+
+def _listener_keys(obj: Any) -> List[Tuple[str, str]]:
+	# The ids a keyed wait_for can be registered under, pulled off an event's first argument
+	keys = []
+	channel_id = _channel_id_of(obj)
+	if channel_id is not None:
+		keys.append(('channel_id', channel_id))
+
+	user_id = getattr(obj, 'user_id', None) or getattr(getattr(obj, 'author', None), 'id', None)
+	if user_id is not None:
+		keys.append(('user_id', user_id))
+
+	root_id = getattr(obj, 'root_id', None)
+	if root_id:
+		keys.append(('root_id', root_id))
+	return keys
+
+class DrainReport(NamedTuple):
+	"""What happened to the pending work when the client was closed with drain"""
+	completed_handlers: int
+	dropped_handlers: int
+	dropped_requests: int
+	elapsed: float
+
 class _LoopSentinel:
 	__slots__ = ()
 
@@ -68,16 +128,18 @@ _loop: Any = _LoopSentinel()
 
 class Client:
 	"""Respresents a client connection to Mattermost"""
-	def __init__(self, *, **options: Any) -> None:
+	def __init__(self, **options: Any) -> None:
 		self.loop: asyncio.AbstractEventLoop = _loop
 		# self.ws is set in the connect method
 		self.ws: MattermostWebSocket = None # type: ignore
 		self._listeners: Dict[str, List[Tuple[asyncio.Future, Callable[..., bool]]]] = {}
+		# event -> (key name, id) -> waiters, checked only when the event's first argument matches the key
+		self._keyed_listeners: Dict[str, Dict[Tuple[str, str], List[Tuple[asyncio.Future, Callable[..., bool]]]]] = {}
 		# shard stuff, idk if needed here
 		# self.shard_id: Optional[int] = options.get('shard_id')
 		# self.shard_count: Optional[int] = options.get('shard_count')
 
-		proxy = Optional[str] = options.pop('proxy', None)
+		proxy: Optional[str] = options.pop('proxy', None)
 		proxy_auth: Optional[aiohttp.BasicAuth] = options.pop('proxy_auth', None)
 		unsync_clock: bool = options.pop('assume_unsync_clock', True) # idk what this is
 		http_trace: Optional[aiohttp.TraceConfig] = options.pop('http_trace', None)
@@ -100,7 +162,38 @@ class Client:
 		}
 
 		self._enable_debug_events: bool = options.pop('enable_debug_events', False)
+		# When set, handlers run on a fixed pool of workers instead of a task per event
+		self._max_event_workers: Optional[int] = options.pop('max_event_workers', None)
+		self._max_event_queue: int = options.pop('max_event_queue', 1000)
+		self._executor: Optional[EventExecutor] = None
+		# Handler tasks that are still running, closing waits for or cancels them
+		self._handler_tasks: Set[asyncio.Task] = set()
+		# Path to record the raw gateway frames to, see GatewayReplayer
+		self._record_gateway: Optional[str] = options.pop('record_gateway', None)
+		self._gateway_recorder: Optional[GatewayRecorder] = None
+		self._loop_monitor: Optional[LoopLagMonitor] = None
+		# Spaces reconnects out between clients, True uses the process wide limiter
+		reconnect_limiter: Union[ReconnectLimiter, bool, None] = options.pop('reconnect_limiter', None)
+		if reconnect_limiter is True:
+			reconnect_limiter = default_reconnect_limiter()
+		self._reconnect_limiter: Optional[ReconnectLimiter] = reconnect_limiter or None
+		# (count, per) to space out websocket actions, Mattermost publishes no limit so it's off by default
+		self._gateway_rate_limit: Optional[Tuple[int, float]] = options.pop('gateway_rate_limit', None)
+		# Gateway ping round trips, kept across reconnects
+		self._latencies: LatencyTracker = LatencyTracker(window=options.pop('latency_window', 100))
+		if options.pop('monitor_loop_lag', False):
+			self._loop_monitor = LoopLagMonitor(
+				interval=options.pop('loop_lag_interval', 0.25),
+				threshold=options.pop('loop_lag_threshold', 1.0)
+			)
+		# Seconds between cache usage logs, with trace_memory debug logs also get tracemalloc diffs
+		cache_stats_interval: Optional[float] = options.pop('cache_stats_interval', None)
+		self._trace_memory: bool = options.pop('trace_memory', False)
 		self._connection: ConnectionState = self._get_state(**options) # I'm not sure I need intents
+		self._cache_accountant: CacheAccountant = CacheAccountant(self._connection)
+		self._cache_reporter: Optional[CacheStatsReporter] = None
+		if cache_stats_interval is not None:
+			self._cache_reporter = CacheStatsReporter(self._cache_accountant, interval=cache_stats_interval)
 		# self._connection.shard_count = self.shard_count
 		self._closed: bool = False
 		self._ready: asyncio.Event = MISSING
@@ -108,8 +201,19 @@ class Client:
 		self._connection._get_websocket = self._get_websocket
 		self._connection._get_client = lambda: self
 
+		# event name -> bound on_<event> coroutine, so dispatch doesn't have to
+		# build the method name and getattr on every single event
+		self._event_handlers: Dict[str, Callable[..., Coroutine[Any, Any, Any]]] = {}
+		self._refresh_event_handlers()
+
 		# Not doing voice support
 
+	def __setattr__(self, name: str, value: Any) -> None:
+		super().__setattr__(name, value)
+		# Handlers assigned directly on the instance need to show up in the dispatch table
+		if name.startswith('on_') and '_event_handlers' in self.__dict__:
+			self._refresh_event_handlers()
+
 	async def __aenter__(self) -> Self:
 		await self._async_setup_hook()
 		return self
@@ -135,9 +239,15 @@ class Client:
 
 	@property
 	def latency(self) -> float:
+		# The most recent gateway ping round trip in seconds
 		ws = self.ws
 		return float('nan') if not ws else ws.latency
 
+	@property
+	def latency_stats(self) -> LatencyStats:
+		# p50/p95/p99 of the recent gateway ping round trips in seconds
+		return self._latencies.stats()
+
 	def is_ws_ratelimited(self) -> bool:
 		if self.ws:
 			return self.ws.is_ratelimited()
@@ -155,9 +265,22 @@ class Client:
 	# def emojis(self) -> Sequence[Emoji]:
 	# 	return self._connection.emojis
 
+	def user_cache_stats(self) -> CacheStats:
+		# Hits and misses of the user cache, see the max_users and user_ttl options
+		return self._connection.user_cache_stats()
+
+	@property
+	def ready_report(self) -> Optional[ReadyReport]:
+		# Per phase timings of the startup pipeline, None until the client is ready
+		return self._connection.ready_report
+
+	def dm_cache_stats(self) -> CacheStats:
+		# Hits, misses and evictions of the DM channel cache, sized by CachePolicy.dms
+		return self._connection.dm_cache_stats()
+
 	@property
 	def cached_posts(self) -> Sequence[Post]:
-		...
+		return self._connection.cached_posts
 
 	@property
 	def private_channels(self) -> Sequence[PrivateChannel]:
@@ -202,57 +325,189 @@ class Client:
 		event_name: str,
 		*args: Any,
 		**kwargs: Any
-	) -> asyncio.Task:
+	) -> Optional[asyncio.Task]:
+		if self._executor is not None:
+			# Handlers for the same channel are kept in order by the executor
+			key = _channel_id_of(args[0]) if args else None
+			wrapped = functools.partial(self._run_event, coro, event_name, *args, **kwargs)
+			self._executor.submit(wrapped, event_name, key=key)
+			return None
+
+		if self.loop is MISSING:
+			# Closed while the event was on its way, e.g. the disconnect after close()
+			return None
+
 		wrapped = self._run_event(coro, event_name, *args, **kwargs)
-		return self.loop.create_task(wrapped, name=f'mattermost.py: {event_name}')
+		# event_name is the handler, e.g. on_post, the loop monitor attributes stalls by it
+		task = self.loop.create_task(wrapped, name=f'mattermost.py: {event_name}')
+		self._handler_tasks.add(task)
+		task.add_done_callback(self._handler_tasks.discard)
+		return task
+
+	@property
+	def loop_monitor(self) -> Optional[LoopLagMonitor]:
+		# The loop lag monitor, set when the client was created with monitor_loop_lag=True
+		return self._loop_monitor
+
+	def cache_stats(self) -> Dict[str, CacheUsage]:
+		# Entries and estimated deep size of every cache, sizes are re-sampled as caches grow
+		return self._cache_accountant.usage()
+
+	def event_executor_stats(self) -> Optional[ExecutorStats]:
+		# Queue depth and handler latency of the event executor, None when it isn't enabled
+		if self._executor is None:
+			return None
+		return self._executor.stats()
+
+	def _refresh_event_handlers(self) -> None:
+		# Rebuilds the event name -> handler table from the on_ coroutines
+		# defined on the class and the instance
+		handlers = {}
+		for attr in dir(self):
+			if not attr.startswith('on_'):
+				continue
+
+			coro = getattr(self, attr, None)
+			if coro is not None and asyncio.iscoroutinefunction(coro):
+				handlers[attr[3:]] = coro
+		self._event_handlers = handlers
+
+	def event(self, coro: CoroT, /) -> CoroT:
+		# Registers a coroutine as an event handler, its name must be on_<event>
+		if not asyncio.iscoroutinefunction(coro):
+			raise TypeError('event registered must be a coroutine function')
+
+		setattr(self, coro.__name__, coro)
+		_log.debug(f'{coro.__name__} has successfully been registered as an event')
+		return coro
 
 	def dispatch(self, event: str, /, *args: Any, **kwargs: Any) -> None:
-		_log.debug(f'Dispatching event {event}')
-		method = f'on_{event}'
 		listeners = self._listeners.get(event)
-		if listeners:
-			removed = []
-			for i, (future, condition) in enumerate(listeners):
-				if future.cancelled():
-					removed.append(i)
+		keyed = self._keyed_listeners.get(event)
+		coro = self._event_handlers.get(event)
+		if listeners is None and keyed is None and coro is None:
+			# Nobody is interested in this event
+			return
+
+		if _log.isEnabledFor(logging.DEBUG):
+			_log.debug('Dispatching event %s', event)
+
+		if keyed and args:
+			for key in _listener_keys(args[0]):
+				waiters = keyed.get(key)
+				if waiters is None:
 					continue
-					
-				try:
-					result = condition(*args)
-				except Exception as exc:
-					future.set_exception(exc)
-					removed.append(i)
-				else:
-					if result:
-						if len(args) == 0:
-							future.set_result(None)
-						elif len(args) == 1:
-							future.set_result(args[0])
-						else:
-							future.set_result(args)
-						removed.append(i)
-			if len(removed) == len(listeners):
+
+				if self._resolve_listeners(waiters, args):
+					del keyed[key]
+			if not keyed:
+				self._keyed_listeners.pop(event, None)
+
+		if listeners:
+			if self._resolve_listeners(listeners, args):
 				self._listeners.pop(event)
+
+		if coro is not None:
+			self._schedule_event(coro, f'on_{event}', *args, **kwargs)
+
+	def _resolve_listeners(self, listeners: List[Tuple[asyncio.Future, Callable[..., bool]]], args: Tuple[Any, ...]) -> bool:
+		# Completes the waiters whose check passes and returns whether the list is now empty
+		removed = []
+		for i, (future, condition) in enumerate(listeners):
+			if future.cancelled():
+				removed.append(i)
+				continue
+				
+			try:
+				result = condition(*args)
+			except Exception as exc:
+				future.set_exception(exc)
+				removed.append(i)
 			else:
-				for idx in reversed(removed):
-					del listeners[idx]
+				if result:
+					if len(args) == 0:
+						future.set_result(None)
+					elif len(args) == 1:
+						future.set_result(args[0])
+					else:
+						future.set_result(args)
+					removed.append(i)
 
-		try:
-			coro = getattr(self, method)
-		except AttributeError:
-			pass
-		else:
-			self._schedule_event(coro, method, *args, **kwargs)
+		if len(removed) == len(listeners):
+			return True
+
+		for idx in reversed(removed):
+			del listeners[idx]
+		return False
+
+	def wait_for(
+		self,
+		event: str,
+		/,
+		*,
+		check: Optional[Callable[..., bool]] = None,
+		timeout: Optional[float] = None,
+		channel_id: Optional[str] = None,
+		user_id: Optional[str] = None,
+		root_id: Optional[str] = None
+	) -> Coroutine[Any, Any, Any]:
+		# Waits for an event to be dispatched that passes check.
+		# When any of channel_id, user_id or root_id are given the waiter is indexed
+		# under that id so dispatch only runs its check for events carrying it,
+		# otherwise check is run against every event of that type.
+		future = self.loop.create_future()
+		if check is None:
+			def _check(*args: Any) -> bool:
+				return True
+			check = _check
+
+		ev = event.lower()
+		keys = [(name, value) for name, value in (('root_id', root_id), ('channel_id', channel_id), ('user_id', user_id)) if value is not None]
+		if not keys:
+			self._listeners.setdefault(ev, []).append((future, check))
+			return asyncio.wait_for(future, timeout)
+
+		# Index under the most selective key, the remaining keys are checked with the predicate
+		index, *extra = keys
+		if extra:
+			predicate = check
+
+			def _keyed_check(*args: Any) -> bool:
+				available = set(_listener_keys(args[0])) if args else set()
+				return all(key in available for key in extra) and predicate(*args)
+			check = _keyed_check
+
+		self._keyed_listeners.setdefault(ev, {}).setdefault(index, []).append((future, check))
+		# A waiter that times out or is cancelled would otherwise stay indexed until an
+		# event with its id shows up, which may be never
+		future.add_done_callback(lambda fut: self._remove_keyed_listener(ev, index, fut))
+		return asyncio.wait_for(future, timeout)
+
+	def _remove_keyed_listener(self, event: str, key: Tuple[str, str], future: asyncio.Future) -> None:
+		keyed = self._keyed_listeners.get(event)
+		if keyed is None:
+			return
+
+		waiters = keyed.get(key)
+		if waiters is None:
+			return
+
+		waiters[:] = [waiter for waiter in waiters if waiter[0] is not future]
+		if not waiters:
+			del keyed[key]
+			if not keyed:
+				del self._keyed_listeners[event]
 
 	async def on_error(self, event_method: str, /, *args: Any, **kwargs: Any) -> None:
 		_log.exception(f'Ignoring exception in {event_method}')
 
-	async def _call_before_identity_hook(self, *, initial: bool = False) -> None:
-		await self.before_identity_hook(initial=initial)
+	async def _call_before_identify_hook(self, *, initial: bool = False) -> None:
+		await self.before_identify_hook(initial=initial)
 
-	async def before_identity_hook(self, *, initial: bool = False) -> None:
-		if not initial:
-			await asyncio.sleep(5.0)
+	async def before_identify_hook(self, *, initial: bool = False) -> None:
+		# Called before authenticating every websocket connection. Reconnects are
+		# already spaced out by the backoff in connect, so by default this does nothing.
+		pass
 
 	async def _async_setup_hook(self) -> None:
 		# Called whenever the client needs to initialize asyncio objects with a running loop
@@ -262,6 +517,20 @@ class Client:
 		self._connection.loop = loop
 
 		self._ready = asyncio.Event()
+		if self._max_event_workers is not None and self._executor is None:
+			self._executor = EventExecutor(workers=self._max_event_workers, max_queue=self._max_event_queue)
+			self._executor.start()
+
+		if self._record_gateway is not None and self._gateway_recorder is None:
+			self._gateway_recorder = GatewayRecorder(self._record_gateway)
+
+		if self._loop_monitor is not None:
+			self._loop_monitor.start()
+
+		if self._cache_reporter is not None:
+			if self._trace_memory and not tracemalloc.is_tracing():
+				tracemalloc.start()
+			self._cache_reporter.start()
 
 	async def setup_hook(self) -> None:
 		# A coroutine to be called to setup the bot, by default this is blank.
@@ -284,6 +553,7 @@ class Client:
 
 		data = await self.http.static_login(url, token)
 		self._connection.user = ClientUser(state=self._connection, data=data)
+		self._connection.load_snapshot()
 		self._application = await self.application_info()
 		if self._connection.application_id is None:
 			self._connection.application_id = self._application.id
@@ -298,30 +568,151 @@ class Client:
 		# This is a loop that runs the entire event system and miscellaneius aspects
 		# of the library. Control is not resumed until the WebSocket connection is terminated.
 		backoff = ExponentialBackoff()
-		ws_params = {
+		ws_params: Dict[str, Any] = {
 			'initial': True
 		}
-		# TODO: Finish this
-		...
-
-	async def close(self) -> None:
-		# Closes the connection to Mattermost
+		while not self.is_closed():
+			try:
+				coro = MattermostWebSocket.from_client(self, **ws_params)
+				self.ws = await asyncio.wait_for(coro, timeout=60.0)
+				ws_params['initial'] = False
+				while True:
+					if self._executor is not None:
+						# Stop reading while the handlers are backed up
+						await self._executor.wait_for_capacity()
+					await self.ws.poll_event()
+			except ReconnectWebSocket as exc:
+				_log.info(f'Got a request to {exc.op} the websocket.')
+				self.dispatch('disconnect')
+				if not reconnect:
+					await self.close()
+					return
+				resume = exc.resume
+			except (OSError, ConnectionClosed, aiohttp.ClientError, asyncio.TimeoutError) as exc:
+				self.dispatch('disconnect')
+				if not reconnect:
+					await self.close()
+					if isinstance(exc, ConnectionClosed) and exc.code == 1000:
+						# Closed on purpose, nothing to report
+						return
+					raise
+
+				if self.is_closed():
+					return
+
+				resume = True
+
+			if self.is_closed():
+				return
+
+			# Resume with the same connection so the server can replay what we missed
+			if resume and self.ws is not None and self.ws.connection_id is not None:
+				ws_params.update(connection_id=self.ws.connection_id, sequence=self.ws.sequence)
+			else:
+				ws_params.pop('connection_id', None)
+				ws_params.pop('sequence', None)
+
+			retry = backoff.delay()
+			_log.warning(f'Attempting a reconnect in {retry:.2f}s (attempt {backoff.attempts})')
+			await asyncio.sleep(retry)
+			if self._reconnect_limiter is not None:
+				# Take a turn with the other clients in this process
+				waited = await self._reconnect_limiter.acquire()
+				if waited:
+					_log.debug(f'Reconnect staggered by {waited:.2f}s')
+
+	async def close(self, *, drain: bool = False, timeout: float = 30.0) -> Optional[DrainReport]:
+		# Closes the connection to Mattermost.
+		# With drain, the gateway stops being read first and running handlers and
+		# outgoing requests get up to timeout seconds to finish before everything is
+		# closed. What didn't finish is cancelled, logged and returned.
 		if self._closed:
-			return
+			return None
 
 		self._closed = True
-		await self._connection.close()
-
 		if self.ws is not None and self.ws.open:
 			await self.ws.close(code=1000) # Figure out what this is
 
+		report = None
+		if drain:
+			report = await self._drain(timeout)
+
+		# After the drain, the handlers it waited on still use the state
+		await self._connection.close()
+
 		await self.http.close()
 
+		if self._executor is not None:
+			await self._executor.close()
+			self._executor = None
+
+		if self._gateway_recorder is not None:
+			self._gateway_recorder.close()
+			self._gateway_recorder = None
+
+		if self._loop_monitor is not None:
+			self._loop_monitor.stop()
+
+		if self._cache_reporter is not None:
+			self._cache_reporter.stop()
+
 		if self._ready is not MISSING:
 			self._ready.clear()
 
 		self.loop = MISSING
 
+		return report
+
+	async def _drain(self, timeout: float) -> DrainReport:
+		loop = asyncio.get_running_loop()
+		start = loop.time()
+		deadline = start + timeout
+		# close may be called from inside a handler, which can't wait on itself
+		current = asyncio.current_task()
+		tasks = {task for task in self._handler_tasks if task is not current}
+		pending_handlers = len(tasks)
+		if self._executor is not None:
+			pending_handlers += self._executor.queue_depth + self._executor.stats().running
+
+		if tasks:
+			_, not_done = await asyncio.wait(tasks, timeout=max(0.0, deadline - loop.time()))
+		else:
+			not_done = set()
+
+		if self._executor is not None:
+			try:
+				await asyncio.wait_for(self._executor.join(), timeout=max(0.0, deadline - loop.time()))
+			except asyncio.TimeoutError:
+				pass
+
+		try:
+			await asyncio.wait_for(self.http.wait_until_idle(), timeout=max(0.0, deadline - loop.time()))
+		except asyncio.TimeoutError:
+			pass
+
+		for task in not_done:
+			task.cancel()
+
+		dropped_handlers = len(not_done)
+		if self._executor is not None:
+			dropped_handlers += await self._executor.close()
+			self._executor = None
+
+		report = DrainReport(
+			completed_handlers=pending_handlers - dropped_handlers,
+			dropped_handlers=dropped_handlers,
+			dropped_requests=self.http.inflight_requests,
+			elapsed=loop.time() - start
+		)
+		if report.dropped_handlers or report.dropped_requests:
+			_log.warning(
+				f'Drain timed out after {report.elapsed:.2f}s, dropping {report.dropped_handlers} event handlers '
+				f'and {report.dropped_requests} requests'
+			)
+		else:
+			_log.info(f'Drained {report.completed_handlers} event handlers in {report.elapsed:.2f}s')
+		return report
+
 	def clear(self) -> None:
 		# Clears the internal state of the bot
 		self._closed = False
@@ -343,9 +734,14 @@ class Client:
 		log_handler: Optional[logging.Handler] = MISSING,
 		log_formatter: logging.Formatter = MISSING,
 		log_level: int = MISSING,
-		root_logger: bool = False
+		root_logger: bool = False,
+		event_loop: Literal['asyncio', 'uvloop', 'auto'] = 'asyncio'
 	) -> None:
 		# A blocking call that abstracts away the event loop initialization from you.
+		# event_loop picks the loop implementation: the stdlib one, uvloop, or
+		# uvloop when it is installed and the stdlib one otherwise.
+		loop_factory = _get_loop_factory(event_loop)
+
 		async def runner():
 			async with self:
 				await self.start(url, token, reconnect=reconnect)
@@ -359,7 +755,16 @@ class Client:
 			)
 
 		try:
-			asyncio.run(runner())
+			if loop_factory is None:
+				asyncio.run(runner())
+			elif sys.version_info >= (3, 11):
+				with asyncio.Runner(loop_factory=loop_factory) as asyncio_runner:
+					asyncio_runner.run(runner())
+			else:
+				# asyncio.Runner isn't available, uvloop has to be installed as the policy
+				import uvloop
+				asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+				asyncio.run(runner())
 		except KeyboardInterrupt:
 			# Nothing to do here, asyncio.run handles loop cleanup
 			return
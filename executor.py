@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import logging
+import time
+from typing import (
+	Any,
+	Callable,
+	Coroutine,
+	Deque,
+	Dict,
+	Hashable,
+	List,
+	NamedTuple,
+	Optional,
+	Tuple
+)
+
+__all__ = (
+	'EventExecutor',
+	'ExecutorStats'
+)
+
+_log = logging.getLogger(__name__)
+
+_Job = Tuple[Callable[..., Coroutine[Any, Any, Any]], str, float]
+
+class ExecutorStats(NamedTuple):
+	"""A snapshot of an EventExecutor's queue and handler timings"""
+	queued: int
+	running: int
+	processed: int
+	max_queue: int
+	# Time between submission and a worker picking the handler up
+	mean_wait: float
+	max_wait: float
+	# Time spent running the handler itself
+	mean_latency: float
+	max_latency: float
+
+class EventExecutor:
+	"""Runs event handlers on a fixed pool of workers.
+
+	Handlers sharing a key (the channel id of the event) run one at a time in the order
+	they were submitted, handlers for different keys run in parallel. The number of queued
+	handlers is bounded by max_queue, producers are expected to await wait_for_capacity
+	before reading more events.
+	"""
+
+	def __init__(self, *, workers: int = 8, max_queue: int = 1000) -> None:
+		if workers <= 0:
+			raise ValueError('workers must be greater than 0')
+		if max_queue <= 0:
+			raise ValueError('max_queue must be greater than 0')
+
+		self.workers: int = workers
+		self.max_queue: int = max_queue
+		# key -> handlers waiting for that key, a key is either in _ready or being run by one worker
+		self._pending: Dict[Hashable, Deque[_Job]] = {}
+		self._ready: asyncio.Queue[Hashable] = asyncio.Queue()
+		self._tasks: List[asyncio.Task] = []
+		# Set by close, handlers may swallow the cancellation meant for their worker
+		self._closing: bool = False
+		self._queued: int = 0
+		self._running: int = 0
+		self._not_full: asyncio.Event = asyncio.Event()
+		self._not_full.set()
+		self._idle: asyncio.Event = asyncio.Event()
+		self._idle.set()
+
+		self._processed: int = 0
+		self._total_wait: float = 0.0
+		self._max_wait: float = 0.0
+		self._total_latency: float = 0.0
+		self._max_latency: float = 0.0
+
+	def __repr__(self) -> str:
+		return f'<EventExecutor workers={self.workers} queued={self._queued} running={self._running}>'
+
+	@property
+	def queue_depth(self) -> int:
+		return self._queued
+
+	def is_full(self) -> bool:
+		return self._queued >= self.max_queue
+
+	def start(self) -> None:
+		if self._tasks:
+			return
+
+		self._closing = False
+		loop = asyncio.get_running_loop()
+		self._tasks = [
+			loop.create_task(self._worker(), name=f'mattermost.py: event worker {i}')
+			for i in range(self.workers)
+		]
+
+	def submit(self, coro: Callable[[], Coroutine[Any, Any, Any]], event_name: str, *, key: Optional[Hashable] = None) -> None:
+		# Events without a channel don't need ordering against anything
+		if key is None:
+			key = object()
+
+		job = (coro, event_name, time.perf_counter())
+		self._queued += 1
+		self._idle.clear()
+		if self._queued >= self.max_queue:
+			self._not_full.clear()
+
+		try:
+			self._pending[key].append(job)
+		except KeyError:
+			self._pending[key] = deque((job,))
+			self._ready.put_nowait(key)
+
+	async def wait_for_capacity(self) -> None:
+		# Applies backpressure to the caller until the queue drops below max_queue
+		await self._not_full.wait()
+
+	async def join(self) -> None:
+		# Waits until every submitted handler has finished
+		await self._idle.wait()
+
+	async def _worker(self) -> None:
+		task = asyncio.current_task()
+		name = task.get_name() if task is not None else None
+		while not self._closing:
+			key = await self._ready.get()
+			pending = self._pending[key]
+			coro, event_name, submitted = pending.popleft()
+			self._queued -= 1
+			self._running += 1
+			if self._queued < self.max_queue:
+				self._not_full.set()
+
+			if task is not None:
+				# Lets anything inspecting the running task attribute it to the handler,
+				# event_name is the handler's name so this matches the loop monitor's prefix
+				task.set_name(f'mattermost.py: {event_name}')
+
+			start = time.perf_counter()
+			try:
+				await coro()
+			except asyncio.CancelledError:
+				raise
+			except Exception:
+				_log.exception(f'Unhandled exception in event executor while running {event_name}')
+			finally:
+				end = time.perf_counter()
+				self._record(start - submitted, end - start)
+				self._running -= 1
+				if task is not None:
+					task.set_name(name)
+				if pending:
+					self._ready.put_nowait(key)
+				else:
+					del self._pending[key]
+
+				if not self._queued and not self._running:
+					self._idle.set()
+
+	def _record(self, wait: float, latency: float) -> None:
+		self._processed += 1
+		self._total_wait += wait
+		self._total_latency += latency
+		if wait > self._max_wait:
+			self._max_wait = wait
+		if latency > self._max_latency:
+			self._max_latency = latency
+
+	def stats(self) -> ExecutorStats:
+		processed = self._processed
+		return ExecutorStats(
+			queued=self._queued,
+			running=self._running,
+			processed=processed,
+			max_queue=self.max_queue,
+			mean_wait=self._total_wait / processed if processed else 0.0,
+			max_wait=self._max_wait,
+			mean_latency=self._total_latency / processed if processed else 0.0,
+			max_latency=self._max_latency
+		)
+
+	async def close(self) -> int:
+		# Cancels the workers and returns the number of handlers that were queued or cut off
+		dropped = self._queued + self._running
+		self._closing = True
+		for task in self._tasks:
+			task.cancel()
+
+		if self._tasks:
+			await asyncio.gather(*self._tasks, return_exceptions=True)
+		self._tasks = []
+
+		self._pending.clear()
+		self._ready = asyncio.Queue()
+		self._queued = 0
+		self._running = 0
+		self._not_full.set()
+		self._idle.set()
+		return dropped
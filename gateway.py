@@ -3,42 +3,52 @@ from __future__ import annotations
 import asyncio
 from collections import deque
 import concurrent.futures
+import itertools
 import logging
 import struct
-import sys
 import time
 import threading
-import traceback
 import zlib
 
 from typing import (
 	Any,
 	Callable,
 	Coroutine,
+	Deque,
 	TYPE_CHECKING,
+	Iterator,
+	List,
 	NamedTuple,
 	Optional,
-	Dict
+	Dict,
+	Union
 )
 
 import aiohttp
 
 # local imports
+from . import utils
+from .errors import ConnectionClosed
+from .monitor import capture_stack
 
 _log = logging.getLogger(__name__)
 
 __all__ = [
 	'MattermostWebSocket',
 	'KeepAliveHandler',
-	'ReconnectWebSocket'
+	'ReconnectWebSocket',
+	'LatencyTracker',
+	'LatencyStats'
 ]
 
 if TYPE_CHECKING:
 	from typing_extensions import Self
 
 	from .client import Client
+	from .state import ConnectionState
+	from .replay import GatewayRecorder
 
-class ReconnectedWebSocket(Exception):
+class ReconnectWebSocket(Exception):
 	# Signals to safely reconnect the websocket.
 	def __init__(self, *, resume: bool = True) -> None:
 		self.resume: bool = resume
@@ -54,10 +64,93 @@ class EventListener(NamedTuple):
 	result: Optional[Callable[[Dict[str, Any]], Any]]
 	future: asyncio.Future[Any]
 
+class LatencyStats(NamedTuple):
+	"""Round trip percentiles of the gateway pings, in seconds"""
+	p50: float
+	p95: float
+	p99: float
+	samples: int
+
+class LatencyTracker:
+	"""Keeps the most recent gateway round trip times to compute percentiles from"""
+
+	def __init__(self, *, window: int = 100) -> None:
+		self._samples: Deque[float] = deque(maxlen=window)
+		self.last: float = float('inf')
+
+	def __repr__(self) -> str:
+		return f'<LatencyTracker last={self.last} samples={len(self._samples)}>'
+
+	def __len__(self) -> int:
+		return len(self._samples)
+
+	def observe(self, value: float) -> None:
+		self.last = value
+		self._samples.append(value)
+
+	@staticmethod
+	def _pick(ordered: List[float], pct: float) -> float:
+		# Nearest rank percentile
+		if not ordered:
+			return float('nan')
+		return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+	def percentile(self, pct: float) -> float:
+		return self._pick(sorted(self._samples), pct)
+
+	def stats(self) -> LatencyStats:
+		ordered = sorted(self._samples)
+		return LatencyStats(
+			p50=self._pick(ordered, 50),
+			p95=self._pick(ordered, 95),
+			p99=self._pick(ordered, 99),
+			samples=len(ordered)
+		)
+
 class GatewayRateLimiter:
-	def __init__(self) -> None:
-		# This needs to pay attention to the last headers
-		...
+	"""Spaces out the actions sent over the websocket, count every per seconds.
+
+	Mattermost doesn't publish a limit for websocket actions, so this is off unless the
+	client is created with gateway_rate_limit=(count, per). Pings and the authentication
+	challenge don't go through it.
+	"""
+
+	def __init__(self, count: int, per: float) -> None:
+		self.max: int = count
+		self.remaining: int = count
+		self.window: float = 0.0
+		self.per: float = per
+		self.lock: asyncio.Lock = asyncio.Lock()
+
+	def is_ratelimited(self) -> bool:
+		current = time.time()
+		if current > self.window + self.per:
+			return False
+		return self.remaining == 0
+
+	def get_delay(self) -> float:
+		current = time.time()
+		if current > self.window + self.per:
+			self.remaining = self.max
+
+		if self.remaining == self.max:
+			self.window = current
+
+		if self.remaining == 0:
+			return self.per - (current - self.window)
+
+		self.remaining -= 1
+		return 0.0
+
+	async def block(self) -> None:
+		async with self.lock:
+			# Until a slot is free, the send after the wait has to use one up too
+			while True:
+				delta = self.get_delay()
+				if not delta:
+					return
+				_log.warning(f'Websocket is ratelimited, waiting {delta:.2f} seconds')
+				await asyncio.sleep(delta)
 
 class KeepAliveHandler(threading.Thread):
 	def __init__(
@@ -77,7 +170,13 @@ class KeepAliveHandler(threading.Thread):
 		self._last_send: float = time.perf_counter()
 		self._last_recv: float = time.perf_counter()
 		self.latency: float = float('inf')
+		self.latencies: LatencyTracker = ws._latencies
+		self._max_heartbeat_timeout: float = ws._max_heartbeat_timeout
 		self.heartbeat_timeout: float = ws._max_heartbeat_timeout
+		# ping seq -> time it was sent, resolved by the seq_reply. Written by this thread
+		# and the event loop's, so only touched under _pings_lock
+		self._pending_pings: Dict[int, float] = {}
+		self._pings_lock: threading.Lock = threading.Lock()
 
 	def run(self) -> None:
 		while not self._stop_ev.wait(self.interval):
@@ -107,12 +206,10 @@ class KeepAliveHandler(threading.Thread):
 						break
 					except concurrent.futures.TimeoutError:
 						total += 10
-						try:
-							frame = sys._current_frames()[self._main_thread_id]
-						except KeyError:
+						stack = capture_stack(self._main_thread_id)
+						if stack is None:
 							msg = 'Blocking'
 						else:
-							stack = ''.join(traceback.format_stack(frame))
 							msg = f'Blocking\nLoop thread traceback (most recent call last):\n{stack}'
 						_log.warning(msg)
 
@@ -122,8 +219,18 @@ class KeepAliveHandler(threading.Thread):
 				self._last_send = time.perf_counter()
 
 	def get_payload(self) -> Dict[str, Any]:
-		# Need to actually learn what this is
-		return {}
+		now = time.perf_counter()
+		seq = self.ws._next_seq()
+		with self._pings_lock:
+			# Forget pings that were never answered, the timeout check deals with those
+			expired = [ping for ping, sent in self._pending_pings.items() if now - sent > self._max_heartbeat_timeout]
+			for ping in expired:
+				del self._pending_pings[ping]
+			self._pending_pings[seq] = now
+		return {
+			'seq': seq,
+			'action': 'ping'
+		}
 
 	def stop(self) -> None:
 		self._stop_ev.set()
@@ -131,16 +238,232 @@ class KeepAliveHandler(threading.Thread):
 	def tick(self) -> None:
 		self._last_recv = time.perf_counter()
 
-	def ack(self) -> None:
+	def ack(self, seq: int) -> None:
+		# Called with the seq_reply of every action response, only pings are timed
+		with self._pings_lock:
+			sent = self._pending_pings.pop(seq, None)
+		if sent is None:
+			return
+
 		ack_time = time.perf_counter()
 		self._last_ack = ack_time
-		self.latency = ack_time - self._last_send
+		self.latency = ack_time - sent
+		self.latencies.observe(self.latency)
+		self._adjust_timeout()
 		if self.latency > 10:
-			_log.warning(f'Websocket latency is {self.latency}ms')
+			_log.warning(f'Websocket latency is {self.latency:.2f}s')
+
+	def _adjust_timeout(self) -> None:
+		# Allow a ping interval plus a margin scaled from the p99 round trip before
+		# deciding the gateway stopped responding, capped by the configured timeout
+		if self.interval is None or len(self.latencies) < 5:
+			return
+
+		margin = max(10 * self.latencies.percentile(99), 5.0)
+		self.heartbeat_timeout = min(self._max_heartbeat_timeout, self.interval + margin)
 
 class MattermostClientWebSocketResponse(aiohttp.ClientWebSocketResponse):
 	async def close(self, *, code: int = 4000, message: bytes = b'') -> bool:
 		return await super().close(code=code, message=message)
 
 class MattermostWebSocket:
-	"""Implements a WebSocket for Mattermost's gateway v4"""
\ No newline at end of file
+	"""Implements a WebSocket for Mattermost's gateway v4"""
+
+	# Seconds between the pings sent by the KeepAliveHandler
+	HEARTBEAT_INTERVAL: float = 30.0
+
+	if TYPE_CHECKING:
+		token: Optional[str]
+		gateway: str
+		call_hooks: Callable[..., Coroutine[Any, Any, Any]]
+		_connection: ConnectionState
+		_latencies: LatencyTracker
+		_mattermost_parsers: Dict[str, Callable[..., Any]]
+		_dispatch: Callable[..., Any]
+		_initial_identify: bool
+		_max_heartbeat_timeout: float
+
+	def __init__(self, socket: aiohttp.ClientWebSocketResponse, *, loop: asyncio.AbstractEventLoop) -> None:
+		self.socket: aiohttp.ClientWebSocketResponse = socket
+		self.loop: asyncio.AbstractEventLoop = loop
+		self._keep_alive: Optional[KeepAliveHandler] = None
+		self.thread_id: int = threading.get_ident()
+		# Sequence of the last event the server sent, used to resume
+		self.sequence: Optional[int] = None
+		self.connection_id: Optional[str] = None
+		# Sequence numbers for the actions we send, the server echoes them back as seq_reply
+		self._action_seq: Iterator[int] = itertools.count(1)
+		self._close_code: Optional[int] = None
+		self._recorder: Optional[GatewayRecorder] = None
+		self._rate_limiter: Optional[GatewayRateLimiter] = None
+
+	@property
+	def open(self) -> bool:
+		return not self.socket.closed
+
+	def is_ratelimited(self) -> bool:
+		return self._rate_limiter is not None and self._rate_limiter.is_ratelimited()
+
+	@property
+	def latency(self) -> float:
+		heartbeat = self._keep_alive
+		return float('inf') if heartbeat is None else heartbeat.latency
+
+	@classmethod
+	def _for_client(cls, client: Client, socket: Any) -> Self:
+		# Wires up a websocket to the client's state without connecting anything
+		ws = cls(socket, loop=client.loop)
+		ws.token = client.http.token
+		ws._connection = client._connection
+		ws._mattermost_parsers = client._connection.parsers
+		ws._dispatch = client.dispatch
+		ws.call_hooks = client._connection.call_hooks
+		ws._initial_identify = False
+		ws._max_heartbeat_timeout = client._connection.heartbeat_timeout
+		ws._latencies = client._latencies
+		ws._recorder = client._gateway_recorder
+		if client._gateway_rate_limit is not None:
+			ws._rate_limiter = GatewayRateLimiter(*client._gateway_rate_limit)
+		return ws
+
+	@classmethod
+	async def from_client(
+		cls,
+		client: Client,
+		*,
+		initial: bool = False,
+		gateway: Optional[str] = None,
+		connection_id: Optional[str] = None,
+		sequence: Optional[int] = None
+	) -> Self:
+		# Creates the websocket connection and authenticates it
+		gateway = gateway or client.http.gateway_url()
+		url = gateway
+		if connection_id is not None:
+			url = f'{gateway}?connection_id={connection_id}&sequence_number={sequence or 0}'
+
+		socket = await client.http.ws_connect(url)
+		ws = cls._for_client(client, socket)
+		ws.gateway = gateway
+		ws._initial_identify = initial
+
+		await ws.call_hooks('before_identify', initial=initial)
+		await ws.identify()
+
+		# The server greets an authenticated connection with the hello event
+		await ws.poll_event()
+		ws._keep_alive = KeepAliveHandler(ws=ws, interval=cls.HEARTBEAT_INTERVAL)
+		ws._keep_alive.start()
+		_log.info(f'Connected to the gateway with connection id {ws.connection_id}')
+		return ws
+
+	def _next_seq(self) -> int:
+		return next(self._action_seq)
+
+	async def identify(self) -> None:
+		payload = {
+			'seq': self._next_seq(),
+			'action': 'authentication_challenge',
+			'data': {
+				'token': self.token
+			}
+		}
+		# A reconnect mustn't wait behind the actions sent on the previous connection
+		await self.send_as_json(payload, limited=False)
+		_log.debug('Sent the authentication challenge')
+
+	async def received_message(self, msg: Union[str, bytes]) -> None:
+		if type(msg) is bytes:
+			msg = msg.decode('utf-8')
+
+		if self._recorder is not None:
+			self._recorder.record(msg)
+
+		payload = utils._from_json(msg)
+		if self._keep_alive:
+			self._keep_alive.tick()
+
+		if 'seq_reply' in payload:
+			# A response to one of our own actions
+			if payload.get('status') != 'OK':
+				_log.warning(f'Gateway action {payload["seq_reply"]} failed: {payload.get("error")}')
+			elif self._keep_alive:
+				self._keep_alive.ack(payload['seq_reply'])
+			return
+
+		seq = payload.get('seq')
+		if seq is not None:
+			self.sequence = seq
+
+		event = payload.get('event')
+		if event == 'hello':
+			self.connection_id = payload['data'].get('connection_id')
+
+		# Mattermost puts the ids an event applies to in the broadcast rather than
+		# in the data, so parsers get the whole event
+		try:
+			func = self._mattermost_parsers[event.upper()]
+		except (KeyError, AttributeError):
+			_log.debug(f'Unknown event {event}.')
+		else:
+			func(payload)
+
+	async def poll_event(self) -> None:
+		# Polls for a single gateway event and handles it
+		try:
+			msg = await self.socket.receive(timeout=self._max_heartbeat_timeout)
+			if msg.type is aiohttp.WSMsgType.TEXT or msg.type is aiohttp.WSMsgType.BINARY:
+				await self.received_message(msg.data)
+			elif msg.type is aiohttp.WSMsgType.ERROR:
+				_log.debug(f'Received error {msg}')
+				raise WebSocketClosure
+			elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSE):
+				_log.debug(f'Received {msg}')
+				raise WebSocketClosure
+		except (asyncio.TimeoutError, WebSocketClosure) as e:
+			if self._keep_alive:
+				self._keep_alive.stop()
+				self._keep_alive = None
+
+			if isinstance(e, asyncio.TimeoutError):
+				_log.debug('Timed out receiving packet. Attempting a reconnect.')
+				raise ReconnectWebSocket() from None
+
+			code = self._close_code or self.socket.close_code
+			if self._can_handle_close():
+				_log.debug(f'Websocket closed with {code}, attempting a reconnect.')
+				raise ReconnectWebSocket() from None
+			else:
+				_log.debug(f'Websocket closed with {code}, cannot reconnect.')
+				raise ConnectionClosed(self.socket, code=code) from None
+
+	def _can_handle_close(self) -> bool:
+		code = self._close_code or self.socket.close_code
+		return code != 1000
+
+	async def send(self, data: str, /, *, limited: bool = True) -> None:
+		if limited and self._rate_limiter is not None:
+			await self._rate_limiter.block()
+		await self.socket.send_str(data)
+
+	async def send_as_json(self, data: Any, *, limited: bool = True) -> None:
+		try:
+			await self.send(utils._to_json(data), limited=limited)
+		except RuntimeError as exc:
+			if not self._can_handle_close():
+				raise ConnectionClosed(self.socket) from exc
+
+	async def send_heartbeat(self, data: Any) -> None:
+		try:
+			await self.socket.send_str(utils._to_json(data))
+		except RuntimeError as exc:
+			if not self._can_handle_close():
+				raise ConnectionClosed(self.socket) from exc
+
+	async def close(self, code: int = 4000) -> None:
+		if self._keep_alive:
+			self._keep_alive.stop()
+			self._keep_alive = None
+
+		self._close_code = code
+		await self.socket.close(code=code)
@@ -6,7 +6,6 @@ import sys
 from typing import (
 	TYPE_CHECKING,
 	Any,
-	ClassVar,
 	Coroutine,
 	Dict,
 	Iterable,
@@ -39,6 +38,8 @@ if TYPE_CHECKING:
 
 	from types import TracebackType
 
+	from .payloads import channel, member, team, user
+
 	T = TypeVar('T')
 	BE = TypeVar('BE', bound=BaseException)
 	Response = Coroutine[Any, Any, T]
@@ -197,32 +198,21 @@ def handle_post_parameters(
 
 	return MultipartParameters(payload=payload, multipart=multipart, files=files)
 
+# The default API version, each HTTPClient keeps its own
 INTERNAL_API_VERSION: int = 4
 
-def _set_api_version_url(url: str, value: int):
-	global INTERNAL_API_VERSION
-
-	if not isinstance(value, int):
-		raise TypeError(f'Expected int, not {value.__class__!r}')
-
-	if value not in (3, 4):
-		# These are the only version I know of, but this will only support 4
-		raise ValueError(f'Expected either 3 or 4, got {value}')
-
-	INTERNAL_API_VERSION = value
-	Route.BASE = f'{url}/api/v{value}'
-
 class Route:
-	BASE: ClassVar[str] = 'http://localhost/api/v4'
+	# Routes only hold the path, the server is filled in by the HTTPClient
+	# sending them so a process can talk to several servers at once
 
 	def __init__(self, method: str, path: str, *, metadata: Optional[str] = None, **parameters: Any) -> None:
 		self.path: str = path
 		self.method: str = method
 		self.metadata: Optional[str] = metadata
-		url = self.BASE + self.path
+		resolved = path
 		if parameters:
-			url = url.format_map({k: _uriquote(v) if isinstance(v, str) else v for k, v in parameters.items()})
-		self.url: str = url
+			resolved = resolved.format_map({k: _uriquote(v) if isinstance(v, str) else v for k, v in parameters.items()})
+		self.resolved_path: str = resolved
 
 		# Major Params:
 		self._parameters = parameters
@@ -293,7 +283,7 @@ class Ratelimit:
 		if self.dirty:
 			self.remaining = min(int(headers.get('X-Ratelimit-Remaining', 0)), self.limit - self.outgoing)
 		else:
-			self.remaining = int(headers.get('X-Ratelimie-Remaining', 0))
+			self.remaining = int(headers.get('X-Ratelimit-Remaining', 0))
 			self.dirty = True
 
 		reset_after = headers.get('X-Ratelimit-Reset')
@@ -405,6 +395,8 @@ class HTTPClient:
 	) -> None:
 		self.loop: asyncio.AbstractEventLoop = loop
 		self.connector: aiohttp.BaseConnector = connector or MISSING
+		# A connector that was handed to us may be shared with other clients, so it isn't ours to close
+		self._connector_owner: bool = connector is None
 		self.__session: aiohttp.ClientSession = MISSING # filled with static_login
 		# Route key -> Bucket hash
 		self._bucket_hashes: Dict[str, str] = {}
@@ -422,12 +414,40 @@ class HTTPClient:
 		self.http_trace: Optional[aiohttp.TraceConfig] = http_trace
 		self.use_clock: bool = not unsync_clock
 		self.max_ratelimit_timeout: Optional[float] = max(30.0, max_ratelimit_timeout) if max_ratelimit_timeout else None
+		self._inflight: int = 0
+		self._idle: asyncio.Event = MISSING
+		self.base_url: str = 'http://localhost'
+		self.api_version: int = INTERNAL_API_VERSION
 		self.user_agent: str = f'MattermostBot (https://github.com/austinmh12/mattermost.py {__version__}) Python/{sys.version_info[0]}.{sys.version_info[1]} aiohttp/{aiohttp.__version__}'
 
 	def clear(self) -> None:
 		if self.__session and self.__session.closed:
 			self.__session = MISSING
 
+	@property
+	def api_url(self) -> str:
+		return f'{self.base_url}/api/v{self.api_version}'
+
+	def _set_api_version_url(self, url: str, value: int) -> None:
+		if not isinstance(value, int):
+			raise TypeError(f'Expected int, not {value.__class__!r}')
+
+		if value not in (3, 4):
+			# These are the only version I know of, but this will only support 4
+			raise ValueError(f'Expected either 3 or 4, got {value}')
+
+		self.base_url = url
+		self.api_version = value
+
+	def gateway_url(self) -> str:
+		# The websocket lives under the api base, over ws(s)
+		base = self.api_url
+		if base.startswith('https://'):
+			base = 'wss://' + base[len('https://'):]
+		elif base.startswith('http://'):
+			base = 'ws://' + base[len('http://'):]
+		return f'{base}/websocket'
+
 	async def ws_connect(self, url: str, *, compress: int = 0) -> aiohttp.ClientWebSocketResponse:
 		kwargs = {
 			'proxy_auth': self.proxy_auth,
@@ -459,6 +479,15 @@ class HTTPClient:
 			self._try_clear_expired_ratelimits()
 		return value
 
+	@property
+	def inflight_requests(self) -> int:
+		return self._inflight
+
+	async def wait_until_idle(self) -> None:
+		# Waits until no request is being sent
+		if self._inflight:
+			await self._idle.wait()
+
 	async def request(
 		self,
 		route: Route,
@@ -466,9 +495,30 @@ class HTTPClient:
 		files: Optional[Sequence[File]] = None,
 		form: Optional[Iterable[Dict[str, Any]]] = None,
 		**kwargs: Any
+	) -> Any:
+		# Keeps count of the requests in flight so closing can wait for them
+		if self._idle is MISSING:
+			self._idle = asyncio.Event()
+
+		self._inflight += 1
+		self._idle.clear()
+		try:
+			return await self._request(route, files=files, form=form, **kwargs)
+		finally:
+			self._inflight -= 1
+			if not self._inflight:
+				self._idle.set()
+
+	async def _request(
+		self,
+		route: Route,
+		*,
+		files: Optional[Sequence[File]] = None,
+		form: Optional[Iterable[Dict[str, Any]]] = None,
+		**kwargs: Any
 	) -> Any:
 		method = route.method
-		url = route.url
+		url = self.api_url + route.resolved_path
 		route_key = route.key
 		bucket_hash = None
 		try:
@@ -637,10 +687,67 @@ class HTTPClient:
 
 	# Login management
 	async def static_login(self, url: str, token: str) -> user.User:
-		...
+		self._set_api_version_url(url.rstrip('/'), self.api_version)
+
+		if self.connector is MISSING:
+			self.connector = aiohttp.TCPConnector(limit=0)
+			self._connector_owner = True
+
+		self.__session = aiohttp.ClientSession(
+			connector=self.connector,
+			connector_owner=self._connector_owner,
+			ws_response_class=MattermostClientWebSocketResponse,
+			trace_configs=None if self.http_trace is None else [self.http_trace]
+		)
+		if self._global_over is MISSING:
+			# Might already be shared with other clients talking to the same server
+			self._global_over = asyncio.Event()
+			self._global_over.set()
+
+		old_token = self.token
+		self.token = token
+
+		try:
+			data = await self.request(Route('GET', '/users/me'))
+		except HTTPException as exc:
+			self.token = old_token
+			if exc.status == 401:
+				raise LoginFailure('Improper token has been passed.') from exc
+			raise
+
+		return data
 
 	def logout(self) -> Response[None]:
 		...
 
 	# After this goes all the endpoints but I won't do these until the underlying 
-	# functionality of these are done (e.g. Channels, Teams, Users, etc...)
\ No newline at end of file
+	# functionality of these are done (e.g. Channels, Teams, Users, etc...)
+
+	# Teams
+	def get_my_teams(self) -> Response[List[team.Team]]:
+		return self.request(Route('GET', '/users/me/teams'))
+
+	def get_my_team_unreads(self) -> Response[List[Dict[str, Any]]]:
+		return self.request(Route('GET', '/users/me/teams/unread'))
+
+	def get_team_members(self, team_id: str, *, page: int = 0, per_page: int = 60) -> Response[List[member.Member]]:
+		r = Route('GET', '/teams/{team_id}/members', team_id=team_id)
+		return self.request(r, params={'page': page, 'per_page': per_page})
+
+	# Users
+	def get_users_by_ids(self, user_ids: Sequence[str], *, since: Optional[int] = None) -> Response[List[user.User]]:
+		# With since only the users updated after that many milliseconds since the epoch are returned
+		params = {'since': since} if since is not None else None
+		return self.request(Route('POST', '/users/ids'), json=list(user_ids), params=params)
+
+	# Channels
+	def get_my_channels(self, team_id: str) -> Response[List[channel.TextChannel]]:
+		return self.request(Route('GET', '/users/me/teams/{team_id}/channels', team_id=team_id))
+
+	def get_my_channel_members(self, team_id: str) -> Response[List[Dict[str, Any]]]:
+		return self.request(Route('GET', '/users/me/teams/{team_id}/channels/members', team_id=team_id))
+
+	# Posts
+	def get_channel_posts(self, channel_id: str, *, since: Optional[int] = None) -> Response[Dict[str, Any]]:
+		params = {'since': since} if since is not None else None
+		return self.request(Route('GET', '/channels/{channel_id}/posts', channel_id=channel_id), params=params)
@@ -11,7 +11,7 @@ import mattermost.abc
 from . import utils
 from .utils import MISSING
 from .user import BaseUser, User, _UserTag
-from .enums import Status, try_enum
+from .enums import Status
 from .errors import ClientException
 
 __all__ = [
@@ -40,6 +40,7 @@ class _ClientStatus:
 def flatten_user(cls: T) -> T:
 	for attr, value in itertools.chain(BaseUser.__dict__.items(), User.__dict__.items()):
 		...
+	return cls
 
 @flatten_user
 class Member(mattermost.abc.Postable, _UserTag):
@@ -51,6 +52,7 @@ class Member(mattermost.abc.Postable, _UserTag):
 		'scheme_user',
 		'scheme_admin',
 		'explicit_roles',
+		'_user',
 		'_state'
 	)
 
@@ -65,9 +67,18 @@ class Member(mattermost.abc.Postable, _UserTag):
 
 	def __init__(self, *, data: MemberWithUserPayload, team: Team, state: ConnectionState) -> None:
 		self._state: ConnectionState = state
-		self.user_id: str = data['user_id']
+		self.user_id: str = utils._intern_id(data['user_id'])
 		self._user: User = None
 		self.team: Team = team
+		self.roles: str = data.get('roles', '')
+		self.delete_at: int = data.get('delete_at', 0)
+		self.scheme_user: bool = data.get('scheme_user', False)
+		self.scheme_admin: bool = data.get('scheme_admin', False)
+		self.explicit_roles: str = data.get('explicit_roles', '')
+
+	@property
+	def id(self) -> str:
+		return self.user_id
 	
 	def __str__(self) -> str:
 		return str(self._user)
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from itertools import islice
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Callable,
+	Dict,
+	Iterable,
+	Iterator,
+	List,
+	NamedTuple,
+	Optional,
+	Set,
+	Tuple
+)
+
+if TYPE_CHECKING:
+	from .state import ConnectionState
+
+__all__ = (
+	'CacheUsage',
+	'CacheAccountant',
+	'CacheStatsReporter',
+	'deep_sizeof'
+)
+
+_log = logging.getLogger(__name__)
+
+_CONTAINERS = (dict, list, tuple, set, frozenset)
+
+def deep_sizeof(obj: Any, *, seen: Optional[Set[int]] = None) -> int:
+	# The size of obj and everything it owns. Other models it points at (anything with
+	# a _state, e.g. a post's channel or a member's user) are cached on their own and
+	# only count as the reference.
+	if seen is None:
+		seen = set()
+
+	size = 0
+	stack = [obj]
+	while stack:
+		current = stack.pop()
+		ident = id(current)
+		if ident in seen:
+			continue
+		seen.add(ident)
+		size += sys.getsizeof(current)
+
+		if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+			continue
+		if isinstance(current, dict):
+			stack.extend(current.keys())
+			stack.extend(current.values())
+			continue
+		if isinstance(current, _CONTAINERS):
+			stack.extend(current)
+			continue
+		if current is not obj and hasattr(current, '_state'):
+			continue
+
+		for klass in type(current).__mro__:
+			for name in getattr(klass, '__slots__', ()):
+				if name == '_state':
+					continue
+				try:
+					stack.append(getattr(current, name))
+				except AttributeError:
+					pass
+
+		attrs = getattr(current, '__dict__', None)
+		if attrs is not None:
+			size += sys.getsizeof(attrs)
+			stack.extend(value for key, value in attrs.items() if key != '_state')
+	return size
+
+class CacheUsage(NamedTuple):
+	"""How many entries a cache holds and roughly how much memory they take"""
+	entries: int
+	estimated_bytes: int
+
+class _Estimate:
+	__slots__ = ('entries', 'bytes_per_entry', 'measured_at')
+
+	def __init__(self, entries: int, bytes_per_entry: float) -> None:
+		self.entries: int = entries
+		self.bytes_per_entry: float = bytes_per_entry
+		self.measured_at: float = time.monotonic()
+
+def _both_ends(values: Any) -> Iterator[Any]:
+	# Alternates between the oldest and the newest entries, a bounded walk of an LRU
+	# cache sees both ends instead of only the entries about to be evicted
+	return (entry for pair in zip(values, reversed(values)) for entry in pair)
+
+class CacheAccountant:
+	"""Estimates the memory used by each of the state's caches.
+
+	Sizing every entry on every call would cost as much as the caches are big, so each
+	cache's average entry size is measured on a random sample drawn from at most
+	sample_size * 4 entries, and reused until the number of entries drifts by more than
+	drift or the estimate is older than max_age seconds. A full cache stays the same size
+	while its entries are replaced, only max_age notices that. Counting is cheap, so a
+	call only samples the caches that are due.
+	"""
+
+	def __init__(
+		self,
+		state: ConnectionState,
+		*,
+		sample_size: int = 64,
+		drift: float = 0.25,
+		max_age: Optional[float] = 600.0
+	) -> None:
+		self.sample_size: int = sample_size
+		self.drift: float = drift
+		self.max_age: Optional[float] = max_age
+		self._state: ConnectionState = state
+		self._estimates: Dict[str, _Estimate] = {}
+
+	def __repr__(self) -> str:
+		return f'<CacheAccountant caches={len(self._estimates)} sample_size={self.sample_size}>'
+
+	def _caches(self) -> Dict[str, Tuple[int, Callable[[], Iterable[Any]]]]:
+		# name -> (entries, a function lazily iterating the entries to sample from)
+		state = self._state
+		teams = list(state._teams.values())
+		posts = state._posts
+		window = self.sample_size * 4
+
+		def nested(attr: str) -> Callable[[], Iterable[Any]]:
+			# A share of the window from every team rather than all of it from the first
+			share = max(1, -(-window // len(teams))) if teams else 0
+			return lambda: (entry for team in teams for entry in islice(getattr(team, attr).values(), share))
+
+		return {
+			'users': (len(state._users), lambda: state._users.values()),
+			'teams': (len(teams), lambda: teams),
+			'members': (sum(len(team._members) for team in teams), nested('_members')),
+			'channels': (sum(len(team._channels) for team in teams), nested('_channels')),
+			'threads': (sum(len(team._threads) for team in teams), nested('_threads')),
+			'private_channels': (len(state._private_channels), lambda: _both_ends(state._private_channels.values())),
+			# The raw entries, for the compact cache that's the encoded payloads
+			'posts': (len(posts) if posts is not None else 0, lambda: _both_ends(posts._entries.values()) if posts is not None else ())
+		}
+
+	def _sample(self, entries: Iterable[Any]) -> float:
+		# Only ever walks the window, both ends of a small cache meet so repeats are dropped
+		window = {id(entry): entry for entry in islice(entries, self.sample_size * 4)}
+		sample = list(window.values())
+		if len(sample) > self.sample_size:
+			sample = random.sample(sample, self.sample_size)
+
+		if not sample:
+			return 0.0
+		return sum(deep_sizeof(entry) for entry in sample) / len(sample)
+
+	def _is_stale(self, estimate: Optional[_Estimate], count: int) -> bool:
+		if estimate is None:
+			return True
+		if self.max_age is not None and time.monotonic() - estimate.measured_at > self.max_age:
+			return True
+		if not estimate.entries:
+			return count > 0
+		return abs(count - estimate.entries) / estimate.entries > self.drift
+
+	def usage(self) -> Dict[str, CacheUsage]:
+		result = {}
+		for name, (count, entries) in self._caches().items():
+			estimate = self._estimates.get(name)
+			if self._is_stale(estimate, count):
+				estimate = self._estimates[name] = _Estimate(count, self._sample(entries()))
+			result[name] = CacheUsage(entries=count, estimated_bytes=int(count * estimate.bytes_per_entry))
+		return result
+
+	def invalidate(self) -> None:
+		# Forces every cache to be sampled again on the next call
+		self._estimates.clear()
+
+class CacheStatsReporter:
+	"""Logs the cache usage every interval seconds.
+
+	When tracemalloc is tracing and debug logging is enabled, every report also logs
+	the allocation sites that grew the most since the previous report.
+	"""
+
+	def __init__(self, accountant: CacheAccountant, *, interval: float = 300.0, top: int = 10) -> None:
+		if interval <= 0:
+			raise ValueError('interval must be greater than 0')
+
+		self.interval: float = interval
+		self.top: int = top
+		self._accountant: CacheAccountant = accountant
+		self._task: Optional[asyncio.Task] = None
+		self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+	def __repr__(self) -> str:
+		return f'<CacheStatsReporter interval={self.interval} running={self.is_running()}>'
+
+	def is_running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	def start(self) -> None:
+		if self.is_running():
+			return
+		self._task = asyncio.get_running_loop().create_task(self._run(), name='mattermost.py: cache stats')
+
+	def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+		self._snapshot = None
+
+	async def _run(self) -> None:
+		while True:
+			await asyncio.sleep(self.interval)
+			try:
+				self.report()
+			except Exception:
+				_log.exception('Failed to report the cache usage')
+
+	def report(self) -> None:
+		usage = self._accountant.usage()
+		total = sum(cache.estimated_bytes for cache in usage.values())
+		details = ', '.join(
+			f'{name} {cache.entries} ({cache.estimated_bytes / 1024:.0f} KiB)' for name, cache in usage.items()
+		)
+		_log.info(f'Caches hold about {total / 1048576:.1f} MiB: {details}')
+
+		if tracemalloc.is_tracing() and _log.isEnabledFor(logging.DEBUG):
+			self._log_allocations()
+
+	def _log_allocations(self) -> None:
+		snapshot = tracemalloc.take_snapshot().filter_traces((
+			tracemalloc.Filter(False, tracemalloc.__file__),
+			tracemalloc.Filter(False, '<frozen importlib._bootstrap>')
+		))
+		previous, self._snapshot = self._snapshot, snapshot
+		if previous is None:
+			stats: List[Any] = snapshot.statistics('lineno')
+		else:
+			stats = snapshot.compare_to(previous, 'lineno')
+
+		for stat in islice(stats, self.top):
+			_log.debug(f'Allocations: {stat}')
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+__all__ = (
+	'EqualityComparable',
+	'Hashable'
+)
+
+# No __slots__ here, several models still set attributes their own slots don't list
+class EqualityComparable:
+	id: str
+
+	def __eq__(self, other: object) -> bool:
+		return isinstance(other, self.__class__) and other.id == self.id
+
+	def __ne__(self, other: object) -> bool:
+		return not self.__eq__(other)
+
+class Hashable(EqualityComparable):
+	def __hash__(self) -> int:
+		return hash(self.id)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import (
+	Callable,
+	Dict,
+	List,
+	NamedTuple,
+	Optional,
+	Tuple
+)
+
+__all__ = (
+	'LagHistogram',
+	'LoopLagMonitor',
+	'StallReport'
+)
+
+_log = logging.getLogger(__name__)
+
+# Prefix of the tasks running an event handler, made by Client._schedule_event and the
+# event executor. The library's other tasks are named 'mattermost.py: ' and what they do.
+_TASK_PREFIX = 'mattermost.py: on_'
+
+def capture_stack(thread_id: int) -> Optional[str]:
+	# Formats the current stack of another thread, None if the thread is gone
+	try:
+		frame = sys._current_frames()[thread_id]
+	except KeyError:
+		return None
+	return ''.join(traceback.format_stack(frame))
+
+class LagHistogram:
+	"""Counts loop lag samples into fixed buckets, bounds are in seconds."""
+
+	BOUNDS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+	__slots__ = ('counts', 'count', 'total', 'max')
+
+	def __init__(self) -> None:
+		self.counts: List[int] = [0] * (len(self.BOUNDS) + 1)
+		self.count: int = 0
+		self.total: float = 0.0
+		self.max: float = 0.0
+
+	def __repr__(self) -> str:
+		return f'<LagHistogram count={self.count} mean={self.mean:.4f} max={self.max:.4f}>'
+
+	@property
+	def mean(self) -> float:
+		return self.total / self.count if self.count else 0.0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+		self.count += 1
+		self.total += value
+		if value > self.max:
+			self.max = value
+
+	def to_dict(self) -> Dict[str, int]:
+		# Bucket label -> number of samples, e.g. {'<=1ms': 10, ..., '>5000ms': 0}
+		labels = [f'<={bound * 1000:g}ms' for bound in self.BOUNDS]
+		labels.append(f'>{self.BOUNDS[-1] * 1000:g}ms')
+		return dict(zip(labels, self.counts))
+
+	def clear(self) -> None:
+		self.counts = [0] * (len(self.BOUNDS) + 1)
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+
+class StallReport(NamedTuple):
+	"""Describes the loop being blocked for longer than the monitor's threshold"""
+	duration: float
+	# The event whose handler was running, None when the loop wasn't inside a handler
+	event: Optional[str]
+	task_name: Optional[str]
+	stack: Optional[str]
+
+class LoopLagMonitor:
+	"""Measures how late the event loop wakes up and reports what is blocking it.
+
+	A task on the loop sleeps for interval and records how late it woke up in a
+	LagHistogram. A watchdog thread notices when that task hasn't woken for longer than
+	threshold, grabs the stack of the loop thread and the name of the task that is
+	running, which for handlers is the event they're handling.
+	"""
+
+	def __init__(
+		self,
+		*,
+		interval: float = 0.25,
+		threshold: float = 1.0,
+		on_stall: Optional[Callable[[StallReport], None]] = None
+	) -> None:
+		if interval <= 0:
+			raise ValueError('interval must be greater than 0')
+		if threshold <= 0:
+			raise ValueError('threshold must be greater than 0')
+
+		self.interval: float = interval
+		self.threshold: float = threshold
+		self.on_stall: Optional[Callable[[StallReport], None]] = on_stall
+		self.histogram: LagHistogram = LagHistogram()
+		self.stalls: int = 0
+		self.loop: Optional[asyncio.AbstractEventLoop] = None
+		self._thread_id: Optional[int] = None
+		self._probe: Optional[asyncio.Task] = None
+		self._watchdog: Optional[threading.Thread] = None
+		self._stop_ev: threading.Event = threading.Event()
+		self._last_tick: float = time.perf_counter()
+
+	def __repr__(self) -> str:
+		return f'<LoopLagMonitor interval={self.interval} threshold={self.threshold} stalls={self.stalls}>'
+
+	def is_running(self) -> bool:
+		return self._probe is not None and not self._probe.done()
+
+	def start(self) -> None:
+		# Must be called from the loop being monitored
+		if self.is_running():
+			return
+
+		self.loop = loop = asyncio.get_running_loop()
+		self._thread_id = threading.get_ident()
+		self._last_tick = time.perf_counter()
+		self._stop_ev.clear()
+		self._probe = loop.create_task(self._run_probe(), name='mattermost.py: loop lag probe')
+		self._watchdog = threading.Thread(target=self._run_watchdog, name='mattermost.py: loop lag watchdog', daemon=True)
+		self._watchdog.start()
+
+	def stop(self) -> None:
+		self._stop_ev.set()
+		if self._probe is not None:
+			self._probe.cancel()
+			self._probe = None
+		self._watchdog = None
+
+	async def _run_probe(self) -> None:
+		loop = asyncio.get_running_loop()
+		interval = self.interval
+		while True:
+			before = loop.time()
+			await asyncio.sleep(interval)
+			lag = loop.time() - before - interval
+			self.histogram.observe(lag if lag > 0 else 0.0)
+			self._last_tick = time.perf_counter()
+
+	def _run_watchdog(self) -> None:
+		reported_tick = None
+		while not self._stop_ev.wait(self.interval):
+			last_tick = self._last_tick
+			blocked = time.perf_counter() - last_tick - self.interval
+			if blocked < self.threshold or reported_tick == last_tick:
+				continue
+
+			# Only report once per stall
+			reported_tick = last_tick
+			self.stalls += 1
+			report = self._capture(blocked)
+			event = report.event or 'no event handler'
+			if report.stack:
+				_log.warning(f'Event loop blocked for {blocked:.2f}s in {event}\nLoop thread traceback (most recent call last):\n{report.stack}')
+			else:
+				_log.warning(f'Event loop blocked for {blocked:.2f}s in {event}')
+
+			if self.on_stall is not None:
+				try:
+					self.on_stall(report)
+				except Exception:
+					_log.exception('Ignoring exception in loop lag on_stall callback')
+
+	def _capture(self, blocked: float) -> StallReport:
+		task_name = None
+		event = None
+		try:
+			# Reading the loop's current task from another thread is only a dict lookup
+			task = asyncio.current_task(self.loop)
+		except RuntimeError:
+			task = None
+
+		if task is not None:
+			task_name = task.get_name()
+			if task_name.startswith(_TASK_PREFIX):
+				# The handler's name, e.g. on_post
+				event = task_name.partition(': ')[2]
+
+		stack = capture_stack(self._thread_id) if self._thread_id is not None else None
+		return StallReport(duration=blocked, event=event, task_name=task_name, stack=stack)
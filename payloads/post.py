@@ -34,6 +34,8 @@ class PostReference(TypedDict, total=False):
 
 class Post(PartialPost):
 	id: str
+	user_id: str
+	root_id: NotRequired[str]
 	create_at: datetime
 	update_at: datetime
 	delete_at: datetime
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Dict,
+	List,
+	NamedTuple,
+	Optional,
+	Sequence,
+	Type
+)
+
+import aiohttp
+
+# Local imports
+from .client import Client
+from .utils import MISSING
+
+if TYPE_CHECKING:
+	from typing_extensions import Self
+	from types import TracebackType
+
+	from .http import Ratelimit
+
+__all__ = (
+	'ClientPool',
+)
+
+_log = logging.getLogger(__name__)
+
+class _ServerRatelimits:
+	# Rate limit state shared by every client talking to the same server
+	__slots__ = ('buckets', 'bucket_hashes', 'global_over')
+
+	def __init__(self) -> None:
+		self.buckets: Dict[str, Ratelimit] = {}
+		self.bucket_hashes: Dict[str, str] = {}
+		self.global_over: asyncio.Event = asyncio.Event()
+		self.global_over.set()
+
+class _PoolEntry(NamedTuple):
+	client: Client
+	url: str
+	token: str
+
+class ClientPool:
+	"""Hosts many clients on one event loop.
+
+	Every client in the pool uses the same aiohttp connector, and clients logged in
+	to the same server share that server's rate limits.
+	"""
+
+	def __init__(self, *, connector_limit: int = 0, connector_limit_per_host: int = 0) -> None:
+		self.connector_limit: int = connector_limit
+		self.connector_limit_per_host: int = connector_limit_per_host
+		self._entries: List[_PoolEntry] = []
+		self._connector: aiohttp.BaseConnector = MISSING
+		# Server url -> rate limit state
+		self._ratelimits: Dict[str, _ServerRatelimits] = {}
+		self._closed: bool = False
+
+	def __repr__(self) -> str:
+		return f'<ClientPool clients={len(self._entries)} servers={len({entry.url for entry in self._entries})}>'
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	async def __aenter__(self) -> Self:
+		return self
+
+	async def __aexit__(
+		self,
+		exc_type: Optional[Type[BaseException]],
+		exc_value: Optional[BaseException],
+		traceback: Optional[TracebackType]
+	) -> None:
+		await self.close()
+
+	@property
+	def clients(self) -> Sequence[Client]:
+		return [entry.client for entry in self._entries]
+
+	def add_client(self, url: str, token: str, *, client: Optional[Client] = None, **options: Any) -> Client:
+		# Adds a client for the given server and token, options are passed to Client
+		# when no client is given. Clients added after start are started by start_client.
+		if not isinstance(url, str):
+			raise TypeError(f'Expected url to be a str, received {url.__class__!r}')
+
+		if client is None:
+			client = Client(**options)
+		elif options:
+			raise TypeError('Cannot pass client options alongside an existing client')
+
+		url = url.strip().rstrip('/')
+		self._entries.append(_PoolEntry(client=client, url=url, token=token))
+		return client
+
+	def _prepare(self, entry: _PoolEntry) -> None:
+		if self._connector is MISSING:
+			self._connector = aiohttp.TCPConnector(limit=self.connector_limit, limit_per_host=self.connector_limit_per_host)
+
+		http = entry.client.http
+		http.connector = self._connector
+		http._connector_owner = False
+
+		try:
+			shared = self._ratelimits[entry.url]
+		except KeyError:
+			shared = self._ratelimits[entry.url] = _ServerRatelimits()
+
+		http._buckets = shared.buckets
+		http._bucket_hashes = shared.bucket_hashes
+		http._global_over = shared.global_over
+
+	async def _run_client(self, entry: _PoolEntry, *, reconnect: bool) -> None:
+		try:
+			async with entry.client:
+				await entry.client.start(entry.url, entry.token, reconnect=reconnect)
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			# One client failing shouldn't take the rest of the pool down with it
+			_log.exception(f'Client for {entry.url} stopped with an error')
+
+	def start_client(self, client: Client, *, reconnect: bool = True) -> asyncio.Task:
+		# Starts a single client of the pool in the background
+		for entry in self._entries:
+			if entry.client is client:
+				break
+		else:
+			raise ValueError('client is not part of this pool')
+
+		self._prepare(entry)
+		return asyncio.get_running_loop().create_task(self._run_client(entry, reconnect=reconnect))
+
+	async def start(self, *, reconnect: bool = True) -> None:
+		# Starts every client and runs until all of them have stopped
+		for entry in self._entries:
+			self._prepare(entry)
+
+		await asyncio.gather(*(self._run_client(entry, reconnect=reconnect) for entry in self._entries))
+
+	async def close(self) -> None:
+		if self._closed:
+			return
+
+		self._closed = True
+		await asyncio.gather(
+			*(entry.client.close() for entry in self._entries if not entry.client.is_closed()),
+			return_exceptions=True
+		)
+
+		if self._connector is not MISSING:
+			await self._connector.close()
+			self._connector = MISSING
+
+	def run(self, *, reconnect: bool = True) -> None:
+		# A blocking call that runs every client until they all stop
+		async def runner():
+			async with self:
+				await self.start(reconnect=reconnect)
+
+		try:
+			asyncio.run(runner())
+		except KeyboardInterrupt:
+			return
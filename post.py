@@ -25,6 +25,7 @@ from . import utils
 from .errors import HTTPException
 from .member import Member
 from .file import File
+from .mixins import Hashable
 from .utils import MISSING #, escape_mentions # TODO: Figure out mentions in mm
 from .http import handle_post_parameters
 from .team import Team
@@ -80,7 +81,7 @@ class Attachment(Hashable):
 
 	def __init__(self, *, data: AttachmentPayload, state: ConnectionState) -> None:
 		self.id: str = data['id']
-		self.user_id: str = data['user_id']
+		self.user_id: str = utils._intern_id(data['user_id'])
 		self.post_id: str = data['post_id']
 		self.create_at: datetime = data['create_at']
 		self.update_at: datetime = data['update_at']
@@ -166,16 +167,16 @@ class PostReference:
 		self._state: Optional[ConnectionState] = None
 		self.resolved: Optional[Union[Post, DeletedReferencedPost]] = None
 		self.post_id: str = post_id
-		self.channel_id: str = channel_id
-		self.team_id: Optional[str] = team_id
+		self.channel_id: str = utils._intern_id(channel_id)
+		self.team_id: Optional[str] = utils._intern_id(team_id)
 		self.fail_if_not_exists: bool = fail_if_not_exists
 
 	@classmethod
 	def with_state(cls, state: ConnectionState, data: PostReferencePayload) -> Self:
 		self = cls.__new__(cls)
 		self.post_id = data['post_id']
-		self.channel_id = data['channel_id']
-		self.team_id = data.get('team_id')
+		self.channel_id = utils._intern_id(data['channel_id'])
+		self.team_id = utils._intern_id(data.get('team_id'))
 		self.fail_if_not_exists = data['fail_id_not_exists']
 		self._state = state
 		self.resolved = None
@@ -194,7 +195,7 @@ class PostReference:
 
 	@property
 	def cached_post(self) -> Optional[Post]:
-		...
+		return self._state and self._state._get_post(self.post_id)
 
 	def __repr__(self) -> str:
 		return f'<Postreference post_id={self.post_id} channel_id={self.channel_id} team_id={self.team_id!r}'
@@ -283,7 +284,7 @@ class PartialPost(Hashable):
 
 def flatten_handlers(cls: Type[Post]) -> Type[Post]:
 	prefix = len('_handle_')
-	handlers = [key[prefix:], value for key, value in cls.__dict__.items() if key.startswith('_handle_') and key != '_handle_member']
+	handlers = [(key[prefix:], value) for key, value in cls.__dict__.items() if key.startswith('_handle_') and key != '_handle_member']
 	handlers.append(('member', cls._handle_member))
 	cls._HANDLERS = handlers
 	return cls
@@ -299,8 +300,10 @@ class Post(PartialPost, Hashable):
 		'delete_at',
 		'edit_at',
 		'author',
+		'user_id',
 		'channel',
 		'root',
+		'root_id',
 		'original_id',
 		'message',
 		'type',
@@ -342,7 +345,10 @@ class Post(PartialPost, Hashable):
 		self.create_at: datetime = data['create_at']
 		self.update_at: datetime = data['update_at']
 		self.delete_at: datetime = data['delete_at']
+		self.edit_at: datetime = data.get('edit_at', 0)
+		self.user_id: str = utils._intern_id(data['user_id'])
 		# self.root: Optional[Post] = data.get('root_id')
+		self.root_id: Optional[str] = utils._intern_id(data.get('root_id')) or None
 		self.props: Dict[str, Any] = data['props']
 		self.hashtag: str = data['hashtag']
 		self.message: str = data['message']
@@ -350,7 +356,7 @@ class Post(PartialPost, Hashable):
 		try:
 			self.team = channel.team
 		except AttributeError:
-			self.team = state._get_team(data['team_id'])
+			self.team = state._get_team(data.get('team_id'))
 
 	def _add_reaction(self, data, emoji, user_id):
 		...
@@ -361,12 +367,34 @@ class Post(PartialPost, Hashable):
 	def _clear_emoji(self, emoji):
 		...
 
-	def _update(self, data) -> None:
-		...
+	def _update(self, data: PostPayload) -> None:
+		# Applies an edited payload, every key with a _handle_ method is copied over
+		for key, handler in self._HANDLERS:
+			try:
+				value = data[key]
+			except KeyError:
+				continue
+			else:
+				handler(self, value)
 
 	def _handle_edited_timestamp(self, value) -> None:
 		...
 
+	def _handle_update_at(self, value: datetime) -> None:
+		self.update_at = value
+
+	def _handle_edit_at(self, value: datetime) -> None:
+		self.edit_at = value
+
+	def _handle_delete_at(self, value: datetime) -> None:
+		self.delete_at = value
+
+	def _handle_props(self, value: Dict[str, Any]) -> None:
+		self.props = value
+
+	def _handle_hashtag(self, value: str) -> None:
+		self.hashtag = value
+
 	def _handle_pinned(self, value: bool) -> None:
 		self.pinned = value
 
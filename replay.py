@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+import os
+import re
+import time
+import tracemalloc
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Dict,
+	Iterator,
+	NamedTuple,
+	Optional,
+	Tuple,
+	Union
+)
+
+# Local imports
+from . import utils
+from .gateway import MattermostWebSocket
+
+if TYPE_CHECKING:
+	from typing_extensions import Self
+	from types import TracebackType
+
+	from .client import Client
+
+__all__ = (
+	'GatewayRecorder',
+	'GatewayReplayer',
+	'ReplayResult'
+)
+
+_log = logging.getLogger(__name__)
+
+# Pulls the event name out of a raw frame without decoding the whole thing
+_EVENT_RE = re.compile(r'"event"\s*:\s*"([^"]*)"')
+
+class GatewayRecorder:
+	"""Writes raw gateway frames and the time they were received to a gzip compressed NDJSON file.
+
+	Each line is ``{"t": <unix time>, "frame": <raw frame>}``.
+	"""
+
+	def __init__(self, path: Union[str, os.PathLike[str]], *, compresslevel: int = 6) -> None:
+		self.path: Union[str, os.PathLike[str]] = path
+		self.frames: int = 0
+		self._fp = gzip.open(path, 'wt', encoding='utf-8', compresslevel=compresslevel)
+
+	def __repr__(self) -> str:
+		return f'<GatewayRecorder path={self.path!r} frames={self.frames}>'
+
+	def __enter__(self) -> Self:
+		return self
+
+	def __exit__(
+		self,
+		exc_type: Optional[type],
+		exc_value: Optional[BaseException],
+		traceback: Optional[TracebackType]
+	) -> None:
+		self.close()
+
+	@property
+	def closed(self) -> bool:
+		return self._fp.closed
+
+	def record(self, frame: str) -> None:
+		if self._fp.closed:
+			return
+
+		self._fp.write(utils._to_json({'t': time.time(), 'frame': frame}))
+		self._fp.write('\n')
+		self.frames += 1
+
+	def close(self) -> None:
+		if not self._fp.closed:
+			self._fp.close()
+			_log.info(f'Recorded {self.frames} gateway frames to {self.path}')
+
+class ReplayResult(NamedTuple):
+	"""The measurements from replaying a recorded gateway stream"""
+	frames: int
+	elapsed: float
+	events_per_second: float
+	# event name -> number of frames
+	event_counts: Dict[str, int]
+	# event name -> mean seconds spent in received_message, which covers decoding, parsing and dispatch
+	parse_cost: Dict[str, float]
+	# Bytes, from tracemalloc when trace_memory is set otherwise the change in RSS
+	memory_growth: Optional[int]
+
+def _rss() -> Optional[int]:
+	try:
+		with open('/proc/self/statm') as fp:
+			return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+	except (OSError, ValueError, IndexError):
+		pass
+
+	try:
+		import resource
+	except ImportError:
+		return None
+	# Only the peak is available here, it's in KiB on Linux and bytes on macOS
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class GatewayReplayer:
+	"""Feeds a file written by GatewayRecorder through a client's parsers and dispatch."""
+
+	def __init__(self, path: Union[str, os.PathLike[str]]) -> None:
+		self.path: Union[str, os.PathLike[str]] = path
+
+	def __repr__(self) -> str:
+		return f'<GatewayReplayer path={self.path!r}>'
+
+	def frames(self) -> Iterator[Tuple[float, str]]:
+		with gzip.open(self.path, 'rt', encoding='utf-8') as fp:
+			for line in fp:
+				if not line.strip():
+					continue
+				record = utils._from_json(line)
+				yield record['t'], record['frame']
+
+	async def replay(
+		self,
+		client: Client,
+		*,
+		realtime: bool = False,
+		speed: float = 1.0,
+		trace_memory: bool = False
+	) -> ReplayResult:
+		# Replays the recording through the same path MattermostWebSocket.poll_event uses.
+		# By default frames are fed as fast as possible, with realtime the recorded gaps
+		# between frames are kept (divided by speed).
+		if speed <= 0:
+			raise ValueError('speed must be greater than 0')
+
+		if client.loop is not asyncio.get_running_loop():
+			await client._async_setup_hook()
+
+		ws = MattermostWebSocket._for_client(client, None)
+		# Don't record what we're replaying
+		ws._recorder = None
+
+		counts: Dict[str, int] = {}
+		costs: Dict[str, float] = {}
+		frames = 0
+
+		if trace_memory:
+			tracemalloc.start()
+			memory_before = tracemalloc.get_traced_memory()[0]
+		else:
+			memory_before = _rss()
+
+		perf_counter = time.perf_counter
+		first_recorded: Optional[float] = None
+		state = client._connection
+		# Recorded hello frames would otherwise start the bootstrap or a catch up
+		state._replaying = True
+		start = perf_counter()
+		try:
+			for recorded_at, frame in self.frames():
+				if realtime:
+					if first_recorded is None:
+						first_recorded = recorded_at
+					delay = (recorded_at - first_recorded) / speed - (perf_counter() - start)
+					if delay > 0:
+						await asyncio.sleep(delay)
+
+				match = _EVENT_RE.search(frame)
+				event = match.group(1) if match else 'seq_reply'
+
+				before = perf_counter()
+				await ws.received_message(frame)
+				cost = perf_counter() - before
+
+				counts[event] = counts.get(event, 0) + 1
+				costs[event] = costs.get(event, 0.0) + cost
+				frames += 1
+				if not frames & 255:
+					# Let the handlers that were scheduled by dispatch run
+					await asyncio.sleep(0)
+
+			await asyncio.sleep(0)
+		finally:
+			state._replaying = False
+		elapsed = perf_counter() - start
+
+		if trace_memory:
+			memory_growth = tracemalloc.get_traced_memory()[0] - memory_before
+			tracemalloc.stop()
+		else:
+			memory_after = _rss()
+			memory_growth = memory_after - memory_before if memory_before is not None and memory_after is not None else None
+
+		return ReplayResult(
+			frames=frames,
+			elapsed=elapsed,
+			events_per_second=frames / elapsed if elapsed else 0.0,
+			event_counts=counts,
+			parse_cost={event: costs[event] / count for event, count in counts.items()},
+			memory_growth=memory_growth
+		)
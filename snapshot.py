@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import time
+from typing import (
+	TYPE_CHECKING,
+	Any,
+	Dict,
+	List,
+	NamedTuple,
+	Optional,
+	Union
+)
+
+# Local imports
+from . import utils
+from .cache import CompactPostCache
+from .channel import TextChannel
+from .member import Member
+from .team import Team
+
+if TYPE_CHECKING:
+	from .post import Post
+	from .state import ConnectionState
+	from .user import BaseUser, User
+
+__all__ = (
+	'Snapshot',
+	'dump_snapshot',
+	'write_snapshot',
+	'load_snapshot'
+)
+
+_log = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION: int = 2
+
+class Snapshot(NamedTuple):
+	"""What a snapshot put back into the caches"""
+	# Milliseconds since the epoch on the local clock, only informational
+	taken_at: int
+	# The newest update_at the client had seen, on the server's clock like Mattermost's
+	# since parameters. taken_at when the client hadn't seen any post.
+	since: int
+	teams: int
+	channels: int
+	users: int
+	members: int
+	posts: int
+
+# The payloads below hold exactly the keys the constructors read, nothing more
+def _team_payload(team: Team) -> Dict[str, Any]:
+	return {attr: getattr(team, attr) for attr in Team.__slots__}
+
+def _channel_payload(channel: TextChannel) -> Dict[str, Any]:
+	return {'id': channel.id, 'type': channel.type, 'name': channel.name}
+
+def _user_payload(user: BaseUser) -> Dict[str, Any]:
+	return {'id': user.id, 'username': user.name, 'bot': user.bot, 'system': user.system}
+
+def _member_payload(member: Member) -> Dict[str, Any]:
+	return {
+		'user_id': member.user_id,
+		'roles': member.roles,
+		'delete_at': member.delete_at,
+		'scheme_user': member.scheme_user,
+		'scheme_admin': member.scheme_admin,
+		'explicit_roles': member.explicit_roles
+	}
+
+def _post_payload(post: Post) -> Dict[str, Any]:
+	team = post.team
+	return {
+		'id': post.id,
+		'channel_id': post.channel.id,
+		'user_id': post.user_id,
+		'root_id': post.root_id,
+		'team_id': team.id if team is not None else None,
+		'create_at': post.create_at,
+		'update_at': post.update_at,
+		'delete_at': post.delete_at,
+		'edit_at': post.edit_at,
+		'props': post.props,
+		'hashtag': post.hashtag,
+		'message': post.message
+	}
+
+def dump_snapshot(state: ConnectionState) -> Dict[str, Any]:
+	# Reads the caches into plain payloads, this has to run on the event loop
+	posts = state._posts
+	if posts is None:
+		post_payloads = []
+	elif isinstance(posts, CompactPostCache):
+		post_payloads = [posts.get_payload(post_id) for post_id in list(posts._entries)]
+	else:
+		post_payloads = [_post_payload(post) for post in posts]
+
+	teams = list(state._teams.values())
+	return {
+		'version': SNAPSHOT_VERSION,
+		'taken_at': int(time.time() * 1000),
+		'user_id': state.user.id if state.user is not None else None,
+		'teams': [_team_payload(team) for team in teams],
+		'channels': {
+			team.id: [_channel_payload(channel) for channel in team._channels.values()]
+			for team in teams
+		},
+		'members': {
+			team.id: [_member_payload(member) for member in team._members.values()]
+			for team in teams
+		},
+		'users': [_user_payload(user) for user in list(state._users.values())],
+		'posts': post_payloads,
+		# Where every channel's catch up has to start from
+		'catch_up': state.catch_up.positions()
+	}
+
+def write_snapshot(data: Dict[str, Any], path: Union[str, os.PathLike[str]]) -> None:
+	# Blocking, compresses and writes a dump_snapshot result. Goes through a temporary
+	# file so a crash halfway can't leave a truncated snapshot behind.
+	tmp = f'{os.fspath(path)}.tmp'
+	with gzip.open(tmp, 'wb', compresslevel=6) as fp:
+		fp.write(utils._to_json(data).encode('utf-8'))
+	os.replace(tmp, path)
+
+def load_snapshot(state: ConnectionState, path: Union[str, os.PathLike[str]]) -> Optional[Snapshot]:
+	# Fills the state's caches from a snapshot, returns None when there is nothing usable
+	try:
+		with gzip.open(path, 'rb') as fp:
+			data = utils._from_json(fp.read())
+	except FileNotFoundError:
+		return None
+	except (OSError, ValueError) as exc:
+		_log.warning(f'Ignoring unreadable cache snapshot {path}: {exc}')
+		return None
+
+	if data.get('version') != SNAPSHOT_VERSION:
+		_log.info(f'Ignoring cache snapshot {path} written by another version')
+		return None
+	if state.user is not None and data.get('user_id') != state.user.id:
+		_log.info(f'Ignoring cache snapshot {path} taken for another user')
+		return None
+
+	# Held here so users only cached weakly survive until their members reference them
+	users: Dict[str, User] = {}
+	for payload in data['users']:
+		user = state.store_user(payload)
+		users[user.id] = user
+
+	channels = members = 0
+	for payload in data['teams']:
+		team = Team(data=payload, state=state)
+		state._add_team(team)
+		for channel_payload in data['channels'].get(team.id, ()):
+			team._add_channel(TextChannel(state=state, team=team, data=channel_payload))
+			channels += 1
+
+		loaded: List[Member] = []
+		for member_payload in data['members'].get(team.id, ()):
+			member = Member(data=member_payload, team=team, state=state)
+			member._user = users.get(member.user_id)
+			loaded.append(member)
+		team._add_members(loaded)
+		members += len(loaded)
+
+	posts = 0
+	cache = state._posts
+	if cache is not None:
+		for payload in data['posts']:
+			if isinstance(cache, CompactPostCache):
+				cache.add_payload(payload)
+			else:
+				cache.add(state._materialize_post(payload))
+			posts += 1
+
+	positions: Dict[str, int] = data['catch_up']
+	state.catch_up.restore(positions)
+
+	snapshot = Snapshot(
+		taken_at=data['taken_at'],
+		since=max(positions.values(), default=data['taken_at']),
+		teams=len(data['teams']),
+		channels=channels,
+		users=len(users),
+		members=members,
+		posts=posts
+	)
+	_log.info(
+		f'Loaded cache snapshot from {path}: {snapshot.teams} teams, {snapshot.channels} channels, '
+		f'{snapshot.users} users, {snapshot.members} members and {snapshot.posts} posts'
+	)
+	return snapshot
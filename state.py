@@ -1,29 +1,34 @@
 from __future__ import annotations
 
 import asyncio
-from collections import deque, OrderedDict
+from collections import OrderedDict
 import copy
 import logging
 from typing import (
 	Callable,
+	ClassVar,
 	Coroutine,
-	Deque,
 	Dict,
 	List,
+	NamedTuple,
 	Optional,
 	TYPE_CHECKING,
 	Any,
 	Sequence,
+	Tuple,
 	TypeVar,
 	Union
 )
 import weakref
-import inspect
 import os
+import time
 
 
 # Local imports
 from . import utils
+from .backends import CacheBackend
+from .catchup import CatchUpEngine
+from .cache import CachePolicy, CacheStats, PostCache, CompactPostCache, UserCache
 from .enums import Status
 # from .mentions import AllowedMentions
 from .team import Team
@@ -33,6 +38,7 @@ from .channel import *
 from .channel import _channel_factory
 from .member import Member
 from .threads import Thread, ThreadMember
+from .snapshot import Snapshot, dump_snapshot, load_snapshot, write_snapshot
 
 if TYPE_CHECKING:
 	from .abc import PrivateChannel
@@ -50,6 +56,16 @@ if TYPE_CHECKING:
 
 	T = TypeVar('T')
 
+class ReadyReport(NamedTuple):
+	"""How long reaching ready took, overall and per phase of the startup pipeline"""
+	teams: int
+	channels: int
+	# phase name -> seconds, the phases after teams run concurrently
+	phases: Dict[str, float]
+	time_to_ready: float
+	# Whether the caches started from a snapshot and only caught up on changes
+	warm: bool
+
 class ChunkRequest:
 	def __init__(
 		self,
@@ -74,10 +90,8 @@ class ChunkRequest:
 			if team is None:
 				return
 			
-			for member in members:
-				existing = team.get_member(member.id)
-				if existing is None or existing.joined_at is None:
-					team._add_member(member)
+			cached = team._members
+			team._add_members([member for member in members if member.id not in cached])
 
 	async def wait(self) -> List[Member]:
 		future = self.loop.create_future()
@@ -105,12 +119,28 @@ async def logging_coroutine(coroutine: Coroutine[Any, Any, T], *, info: str) ->
 	except Exception:
 		_log.exception(f'Exception occurred during {info}')
 
+def _collect_parsers(cls: type) -> Dict[str, Callable[..., None]]:
+	# EVENT_NAME -> parse_event_name function, subclasses override their bases
+	parsers = {}
+	for klass in reversed(cls.__mro__):
+		for attr, func in klass.__dict__.items():
+			if attr.startswith('parse_') and callable(func):
+				parsers[attr[6:].upper()] = func
+	return parsers
+
 class ConnectionState:
+	# Built once per class rather than looked up on every instance
+	_PARSERS: ClassVar[Dict[str, Callable[..., None]]]
+
 	if TYPE_CHECKING:
 		_get_websocket: Callable[..., MattermostWebSocket]
 		_get_client: Callable[..., Client]
 		_parsers: Dict[str, Callable[[Dict[str, Any]], None]]
 
+	def __init_subclass__(cls, **kwargs: Any) -> None:
+		super().__init_subclass__(**kwargs)
+		cls._PARSERS = _collect_parsers(cls)
+
 	def __init__(
 		self,
 		*,
@@ -126,10 +156,57 @@ class ConnectionState:
 		self.max_posts: Optional[int] = options.get('max_posts', 1000)
 		if self.max_posts is not None and self.max_posts <= 0:
 			self.max_posts = 1000
+		# 'objects' keeps Post objects, 'compact' keeps the encoded payloads and builds posts on access
+		self.post_cache: str = options.get('post_cache', 'objects')
+		if self.post_cache not in ('objects', 'compact'):
+			raise ValueError(f"post_cache must be 'objects' or 'compact', not {self.post_cache!r}")
+		self.compress_posts: bool = options.get('compress_posts', False)
+		# Setting either keeps strong references to users instead of weak ones
+		self.max_users: Optional[int] = options.get('max_users', None)
+		self.user_ttl: Optional[float] = options.get('user_ttl', None)
+		# Which entities are cached at all, max_posts and max_users are kept for compatibility
+		policy: Optional[CachePolicy] = options.get('cache_policy', None)
+		if policy is None:
+			policy = CachePolicy(
+				users=self.max_users if self.max_users is not None else True,
+				posts=self.max_posts if self.max_posts is not None else False
+			)
+		else:
+			self.max_posts = policy.limit('posts') if policy.enabled('posts') else None
+			if policy.users is not True:
+				self.max_users = policy.limit('users') or None
+		self.cache_policy: CachePolicy = policy
+		self._user_hits: int = 0
+		self._user_misses: int = 0
+		self._dm_hits: int = 0
+		self._dm_misses: int = 0
+		self._dm_evictions: int = 0
+		# user id -> DM channel id, outlives the DM cache and with dm_map_path the process too
+		self.dm_map_path: Optional[str] = options.get('dm_map_path', None)
+		self._dm_channel_ids: Dict[str, str] = self._load_dm_map()
+		# Second level store for raw payloads, possibly shared with other processes or
+		# clients. It's handed in, so closing it is left to whoever created it.
+		self.cache_backend: Optional[CacheBackend] = options.get('cache_backend', None)
 		self.dispatch: Callable[..., Any] = dispatch
 		self.handlers: Dict[str, Callable[..., Any]] = handlers
 		self.hooks: Dict[str, Callable[..., Coroutine[Any, Any, Any]]] = hooks
 		self._ready_task: Optional[asyncio.Task] = None
+		# Requests the startup pipeline keeps in flight at once
+		self.bootstrap_concurrency: int = options.get('bootstrap_concurrency', 8)
+		if self.bootstrap_concurrency <= 0:
+			raise ValueError('bootstrap_concurrency must be greater than 0')
+		# Where the caches are saved on close and loaded from at login
+		self.snapshot_path: Optional[str] = options.get('snapshot_path', None)
+		# Fetches the posts missed while disconnected, survives clear() like the DM map
+		self.catch_up: CatchUpEngine = CatchUpEngine(
+			self,
+			concurrency=options.get('catch_up_concurrency', 8),
+			max_channels=options.get('catch_up_max_channels', 1000)
+		)
+		self._connection_id: Optional[str] = None
+		self._catch_up_task: Optional[asyncio.Task] = None
+		# Set by GatewayReplayer, recorded frames mustn't start any network work
+		self._replaying: bool = False
 		# self.application_id: Optional[int] = None
 		# self.application_flags: ApplicationFlags = utils.MISSING
 		self.heartbeat_timeout: float = options.get('heartbeat_timeout', 60.0)
@@ -142,7 +219,8 @@ class ConnectionState:
 		# 	raise TypeError('allowed_mentions parameter must be AllowedMentions')
 
 		# self.allowed_mentions: Optional[AllowedMentions] = allowed_mentions
-		self._chunk_requests: Dict[Union[int, str], ChunkRequest] = {}
+		# (team id, nonce) -> request
+		self._chunk_requests: Dict[Tuple[str, str], ChunkRequest] = {}
 
 		# activity = options.get('activity', None)
 		# if activity:
@@ -163,11 +241,9 @@ class ConnectionState:
 		self._command_tree: Optional[CommandTree] = None
 		self._translator: Optional[Translator] = None # Need to figure out what this is and if it's needed
 
+		# Only binds the class' parser table, see __init_subclass__
 		self.parsers: Dict[str, Callable[[Any], None]]
-		self.parsers = parsers = {}
-		for attr, func in inspect.getmembers(self):
-			if attr.startswith('parse_'):
-				parsers[attr[6:].upper()] = func
+		self.parsers = {key: func.__get__(self) for key, func in self._PARSERS.items()}
 
 		self.clear()
 
@@ -176,9 +252,64 @@ class ConnectionState:
 		if self._translator:
 			await self._translator.unload()
 
+		if self._ready_task is not None and not self._ready_task.done():
+			self._ready_task.cancel()
+
+		if self._catch_up_task is not None and not self._catch_up_task.done():
+			self._catch_up_task.cancel()
+
+		if self.snapshot_path is not None and self.user is not None:
+			data = dump_snapshot(self)
+			try:
+				await asyncio.get_running_loop().run_in_executor(None, write_snapshot, data, self.snapshot_path)
+			except OSError as exc:
+				_log.warning(f'Could not save the cache snapshot to {self.snapshot_path}: {exc}')
+
+		self.save_dm_map()
+
+	def _load_dm_map(self) -> Dict[str, str]:
+		if self.dm_map_path is None:
+			return {}
+
+		try:
+			with open(self.dm_map_path, 'r', encoding='utf-8') as fp:
+				data = utils._from_json(fp.read())
+		except FileNotFoundError:
+			return {}
+		except (OSError, ValueError) as exc:
+			_log.warning(f'Could not load the DM channel map from {self.dm_map_path}: {exc}')
+			return {}
+
+		if not isinstance(data, dict):
+			_log.warning(f'Ignoring the DM channel map in {self.dm_map_path}, expected an object')
+			return {}
+		return {str(user_id): str(channel_id) for user_id, channel_id in data.items()}
+
+	def save_dm_map(self) -> None:
+		if self.dm_map_path is None:
+			return
+
+		# Written to a temporary file first so a crash can't leave a truncated map behind
+		tmp = f'{self.dm_map_path}.tmp'
+		try:
+			with open(tmp, 'w', encoding='utf-8') as fp:
+				fp.write(utils._to_json(self._dm_channel_ids))
+			os.replace(tmp, self.dm_map_path)
+		except OSError as exc:
+			_log.warning(f'Could not save the DM channel map to {self.dm_map_path}: {exc}')
+
 	def clear(self, *, views: bool = True) -> None:
 		self.user: Optional[ClientUser] = None
-		self._users: weakref.WeakValueDictionary[str, User] = weakref.WeakValueDictionary()
+		self.ready_report: Optional[ReadyReport] = None
+		self._snapshot: Optional[Snapshot] = None
+		# channel id -> the client user's membership, team id -> unread counts
+		self._channel_memberships: Dict[str, Dict[str, Any]] = {}
+		self._team_unreads: Dict[str, Dict[str, Any]] = {}
+		self._users: Union[UserCache, weakref.WeakValueDictionary[str, User]]
+		if self.max_users is not None or self.user_ttl is not None:
+			self._users = UserCache(self.max_users, ttl=self.user_ttl)
+		else:
+			self._users = weakref.WeakValueDictionary()
 		# self._emojis: Dict[int, Emoji] = {}
 		# self._stickers: Dict[int, TeamSticker] = {}
 		self._teams: Dict[str, Team] = {} # Teams are equivalent of Discord Guilds and have a str id instead of an int
@@ -188,9 +319,21 @@ class ConnectionState:
 		self._private_channels: OrderedDict[int, PrivateChannel] = OrderedDict()
 		self._private_channel_by_user: Dict[int, DMChannel] = {}
 		if self.max_posts is not None:
-			self._posts: Optional[Deque[Post]] = deque(maxlen=self.max_posts)
+			self._posts: Optional[PostCache] = self._create_post_cache(self.max_posts)
 		else:
-			self._posts: Optional[Deque[Post]] = None
+			self._posts: Optional[PostCache] = None
+
+	def _create_post_cache(self, max_size: int) -> PostCache:
+		if self.post_cache == 'compact':
+			return CompactPostCache(max_size, materialize=self._materialize_post, compress=self.compress_posts)
+		return PostCache(max_size)
+
+	def _materialize_post(self, data: PostPayload) -> Post:
+		channel, _ = self._get_team_channel(data)
+		return Post(channel=channel, data=data, state=self)
+
+	def _add_chunk_request(self, request: ChunkRequest) -> None:
+		self._chunk_requests[(request.team_id, request.nonce)] = request
 
 	def process_chunk_requests(
 		self,
@@ -199,15 +342,17 @@ class ConnectionState:
 		members: List[Member],
 		complete: bool
 	) -> None:
-		removed = []
-		for key, request in self._chunk_requests.items():
-			if request.team_id == team_id and request.nonce == nonce:
-				request.add_members(members)
-				if complete:
-					request.done()
-					removed.append(key)
-
-		for key in removed:
+		if nonce is None:
+			return
+
+		key = (team_id, nonce)
+		request = self._chunk_requests.get(key)
+		if request is None:
+			return
+
+		request.add_members(members)
+		if complete:
+			request.done()
 			del self._chunk_requests[key]
 
 	def call_handlers(self, key: str, *args: Any, **kwargs: Any) -> None:
@@ -238,22 +383,70 @@ class ConnectionState:
 	# Storing/Caching functions
 	def store_user(self, data: Union[UserPayload, PartialUserPayload]) -> User:
 		# Supposidly this is 4x faster than dict.setdefault
-		user_id = str(data['id'])
+		user_id = utils._intern_id(str(data['id']))
 		try:
-			return self._users[user_id]
+			user = self._users[user_id]
 		except KeyError:
+			self._user_misses += 1
 			user = User(state=self, data=data)
-			self._users[user_id] = user
+			if self.cache_policy.users is not False:
+				self._users[user_id] = user
+			if self.cache_backend is not None:
+				self.cache_backend.set('users', user_id, data)
+			return user
+		else:
+			self._user_hits += 1
 			return user
 
 	def create_user(self, data: Union[UserPayload, PartialUserPayload]) -> User:
 		return User(state=self, data=data)
 
 	def get_user(self, id: str) -> Optional[User]:
-		return self._users.get(id)
+		user = self._users.get(id)
+		if user is None and self.cache_backend is not None:
+			data = self.cache_backend.get('users', id)
+			if data is not None:
+				user = User(state=self, data=data)
+				if self.cache_policy.users is not False:
+					self._users[id] = user
+
+		if user is None:
+			self._user_misses += 1
+		else:
+			self._user_hits += 1
+		return user
+
+	def user_cache_stats(self) -> CacheStats:
+		return CacheStats(
+			hits=self._user_hits,
+			misses=self._user_misses,
+			evictions=getattr(self._users, 'evictions', 0),
+			size=len(self._users)
+		)
 
 	# Storing emojis, stickers, and views
 
+	@property
+	def cached_posts(self) -> Sequence[Post]:
+		return utils.SequenceProxy(self._posts if self._posts is not None else [])
+
+	def _get_post(self, post_id: Optional[str]) -> Optional[Post]:
+		if self._posts is None or post_id is None:
+			return None
+
+		post = self._posts.get(post_id)
+		if post is None and self.cache_backend is not None:
+			data = self.cache_backend.get('posts', post_id)
+			if data is not None:
+				post = self._materialize_post(data)
+				self._posts.store(post, data)
+		return post
+
+	def _get_channel_posts(self, channel_id: str, *, limit: Optional[int] = None) -> List[Post]:
+		if self._posts is None:
+			return []
+		return self._posts.channel_posts(channel_id, limit=limit)
+
 	@property
 	def teams(self) -> Sequence[Team]:
 		return utils.SequenceProxy(self._teams.values())
@@ -284,20 +477,58 @@ class ConnectionState:
 		try:
 			value = self._private_channels[channel_id]
 		except KeyError:
-			return None
+			self._dm_misses += 1
+			if self.cache_backend is None or channel_id is None:
+				return None
+
+			data = self.cache_backend.get('channels', channel_id)
+			if data is None:
+				return None
+
+			channel = DMChannel(me=self.user, state=self, data=data)
+			self._add_private_channel(channel)
+			return channel
 		else:
+			self._dm_hits += 1
 			self._private_channels.move_to_end(channel_id)
 			return value
 
 	def _get_private_channel_by_user(self, user_id: Optional[str]) -> Optional[DMChannel]:
-		return self._private_channel_by_user.get(user_id)
+		channel = self._private_channel_by_user.get(user_id)
+		if channel is None:
+			self._dm_misses += 1
+		else:
+			self._dm_hits += 1
+			self._private_channels.move_to_end(channel.id)
+		return channel
+
+	def _get_dm_channel_id(self, user_id: str) -> Optional[str]:
+		# The id of a DM channel that may have been evicted, or opened before a restart
+		return self._dm_channel_ids.get(user_id)
+
+	def dm_cache_stats(self) -> CacheStats:
+		return CacheStats(
+			hits=self._dm_hits,
+			misses=self._dm_misses,
+			evictions=self._dm_evictions,
+			size=len(self._private_channels)
+		)
 	
 	def _add_private_channel(self, channel: PrivateChannel) -> None:
 		channel_id = channel.id
+		if isinstance(channel, DMChannel) and channel.recipient:
+			self._dm_channel_ids[channel.recipient.id] = channel_id
+
+		policy = self.cache_policy
+		if not policy.enabled('dms'):
+			return
+
 		self._private_channels[channel_id] = channel
 
-		if len(self._private_channels) > 128:
+		limit = policy.limit('dms')
+		while limit is not None and len(self._private_channels) > limit:
 			_, to_remove = self._private_channels.popitem(last=False)
+			self._dm_evictions += 1
 			if isinstance(to_remove, DMChannel) and to_remove.recipient:
 				self._private_channel_by_user.pop(to_remove.recipient.id, None)
 
@@ -307,6 +538,261 @@ class ConnectionState:
 	def add_dm_channel(self, data: DMChannelPayload) -> DMChannel:
 		channel = DMChannel(me=self.user, state=self, data=data)
 		self._add_private_channel(channel)
+		if self.cache_backend is not None:
+			self.cache_backend.set('channels', channel.id, data)
 		return channel
 
-	
+	def _get_team_channel(self, data: PartialPostPayload, team_id: Optional[str] = None) -> Tuple[Channel, Optional[Team]]:
+		channel_id = data['channel_id']
+		# DMs come through with an empty team id
+		team = self._get_team(team_id or data.get('team_id') or None)
+		channel = None
+		if team is not None:
+			channel = team._resolve_channel(channel_id)
+
+		if channel is None:
+			channel = self._get_private_channel(channel_id)
+
+		if channel is None:
+			channel = PartialPostable(state=self, id=channel_id, team_id=team.id if team else None)
+		return channel, team
+
+	def load_snapshot(self) -> Optional[Snapshot]:
+		# Called once the client user is known, the startup pipeline then only catches up
+		if self.snapshot_path is None:
+			return None
+
+		self._snapshot = load_snapshot(self, self.snapshot_path)
+		return self._snapshot
+
+	# Startup pipeline, run once the gateway says hello
+	async def _delay_ready(self, start: float, positions: Optional[List[Tuple[str, int]]] = None) -> None:
+		phases: Dict[str, float] = {}
+		semaphore = asyncio.Semaphore(self.bootstrap_concurrency)
+
+		async def bounded(coro: Coroutine[Any, Any, T]) -> T:
+			async with semaphore:
+				return await coro
+
+		async def timed(name: str, coro: Coroutine[Any, Any, Any]) -> Any:
+			phase_start = time.perf_counter()
+			try:
+				return await coro
+			finally:
+				phases[name] = time.perf_counter() - phase_start
+
+		snapshot = self._snapshot
+		try:
+			teams = await timed('teams', bounded(self._bootstrap_teams()))
+			phase_coros = [
+				timed('channels', asyncio.gather(*(bounded(self._bootstrap_channels(team)) for team in teams))),
+				timed('memberships', asyncio.gather(*(bounded(self._bootstrap_memberships(team)) for team in teams))),
+				timed('unreads', bounded(self._bootstrap_unreads()))
+			]
+			if snapshot is not None:
+				# Only what changed while the client was down
+				phase_coros.append(timed('users', self._catch_up_users(snapshot.since, bounded)))
+				# Old news by now, it only goes into the cache
+				phase_coros.append(timed('posts', self.catch_up.catch_up(dispatch=False, positions=positions)))
+			await asyncio.gather(*phase_coros)
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			# Whatever made it into the cache is still usable, don't leave the client waiting forever
+			_log.exception('Fetching the initial state failed, becoming ready with a partial cache')
+
+		self.ready_report = report = ReadyReport(
+			teams=len(self._teams),
+			channels=sum(len(team._channels) for team in self._teams.values()),
+			phases=phases,
+			time_to_ready=time.perf_counter() - start,
+			warm=snapshot is not None
+		)
+		self._snapshot = None
+		timings = ', '.join(f'{name} {elapsed:.2f}s' for name, elapsed in phases.items())
+		_log.info(
+			f'Ready after a {"warm" if report.warm else "cold"} start in {report.time_to_ready:.2f}s '
+			f'with {report.teams} teams and {report.channels} channels ({timings})'
+		)
+
+		self.call_handlers('ready')
+		self.dispatch('ready')
+
+	async def _bootstrap_teams(self) -> List[Team]:
+		teams = []
+		for data in await self.http.get_my_teams():
+			team = self._teams.get(data['id'])
+			if team is None:
+				team = Team(data=data, state=self)
+				self._add_team(team)
+			else:
+				# Loaded from a snapshot, keep its members and channels
+				team._from_data(data)
+			teams.append(team)
+		return teams
+
+	async def _bootstrap_channels(self, team: Team) -> None:
+		for data in await self.http.get_my_channels(team.id):
+			# DMs and group channels are listed for every team, they're cached when they're used
+			if data['type'] in ('O', 'P'):
+				team._add_channel(TextChannel(state=self, team=team, data=data))
+
+	async def _bootstrap_memberships(self, team: Team) -> None:
+		for data in await self.http.get_my_channel_members(team.id):
+			self._channel_memberships[data['channel_id']] = data
+
+	async def _bootstrap_unreads(self) -> None:
+		for data in await self.http.get_my_team_unreads():
+			self._team_unreads[data['team_id']] = data
+
+	async def _catch_up_users(self, since: int, bounded: Callable[..., Coroutine[Any, Any, Any]]) -> None:
+		user_ids = [user.id for user in list(self._users.values())]
+		chunks = [user_ids[i:i + 1000] for i in range(0, len(user_ids), 1000)]
+		for result in await asyncio.gather(*(bounded(self.http.get_users_by_ids(chunk, since=since)) for chunk in chunks)):
+			for data in result:
+				user = self._users.get(data['id'])
+				if user is None:
+					self.store_user(data)
+				else:
+					user._update(data)
+
+	async def _run_catch_up(self, positions: List[Tuple[str, int]]) -> None:
+		report = await self.catch_up.catch_up(positions=positions)
+		if report.posts or report.failed:
+			_log.info(
+				f'Recovered {report.posts} missed posts from {report.channels} channels in {report.elapsed:.2f}s'
+				+ (f', {report.failed} channels failed' if report.failed else '')
+			)
+
+	# Post handling shared by the parsers and the catch up engine
+	def _handle_post(self, data: PostPayload, team_id: Optional[str] = None) -> None:
+		self.catch_up.observe(data)
+		channel, _ = self._get_team_channel(data, team_id)
+		post = Post(channel=channel, data=data, state=self)
+		self.dispatch('post', post)
+		if self._posts is not None:
+			self._posts.store(post, data)
+			if self.cache_backend is not None:
+				self.cache_backend.set('posts', post.id, data)
+
+	def _handle_post_edit(self, data: PostPayload) -> None:
+		self.catch_up.observe(data)
+		self.dispatch('raw_post_edit', data)
+		post = self._get_post(data['id'])
+		if post is not None:
+			older = copy.copy(post)
+			post._update(data)
+			# The compact cache hands out copies so the edit has to be stored again
+			self._posts.store(post, data)
+
+		if self.cache_backend is not None:
+			self.cache_backend.set('posts', data['id'], data)
+
+		if post is not None:
+			self.dispatch('post_edit', older, post)
+
+	def _handle_post_delete(self, data: PostPayload) -> None:
+		self.catch_up.observe(data)
+		self.dispatch('raw_post_delete', data)
+		if self.cache_backend is not None:
+			self.cache_backend.delete('posts', data['id'])
+		post = self._posts.pop(data['id']) if self._posts is not None else None
+		if post is not None:
+			self.dispatch('post_delete', post)
+
+	def _merge_post(self, data: PostPayload) -> None:
+		# Brings the caches up to date with a post without dispatching anything
+		if self._posts is None:
+			return
+
+		if data.get('delete_at'):
+			self._posts.pop(data['id'])
+			if self.cache_backend is not None:
+				self.cache_backend.delete('posts', data['id'])
+		else:
+			self._posts.store(self._materialize_post(data), data)
+			if self.cache_backend is not None:
+				self.cache_backend.set('posts', data['id'], data)
+
+	# Parsers, each gets the full gateway event
+	def parse_hello(self, event: Dict[str, Any]) -> None:
+		connection_id = event['data'].get('connection_id')
+		previous, self._connection_id = self._connection_id, connection_id
+		if self._replaying:
+			return
+
+		if self.ready_report is None:
+			# The caches only need filling on the first connect
+			if self._ready_task is None or self._ready_task.done():
+				# Taken now, the events read before the task runs would move them on
+				positions = self.catch_up.begin() if self._snapshot is not None else None
+				coro = self._delay_ready(time.perf_counter(), positions)
+				self._ready_task = asyncio.create_task(coro, name='mattermost.py: bootstrap')
+			return
+
+		# A resumed connection keeps its id and the server replays what was missed,
+		# a new one means whatever happened in between has to be fetched
+		if connection_id != previous and (self._catch_up_task is None or self._catch_up_task.done()):
+			coro = self._run_catch_up(self.catch_up.begin())
+			self._catch_up_task = asyncio.create_task(coro, name='mattermost.py: catch up')
+
+	def parse_posted(self, event: Dict[str, Any]) -> None:
+		event_data = event['data']
+		# The post itself is sent as a JSON string
+		self._handle_post(utils._from_json(event_data['post']), event_data.get('team_id'))
+
+	def parse_post_edited(self, event: Dict[str, Any]) -> None:
+		self._handle_post_edit(utils._from_json(event['data']['post']))
+
+	def parse_post_deleted(self, event: Dict[str, Any]) -> None:
+		self._handle_post_delete(utils._from_json(event['data']['post']))
+
+	def _forget_channel(self, channel_id: str, team_id: Optional[str]) -> None:
+		# The client can't see the channel any more, nothing in it has to be caught up on
+		self.catch_up.forget(channel_id)
+		if self._posts is not None:
+			self._posts.remove_channel(channel_id)
+
+		team = self._get_team(team_id)
+		if team is not None:
+			channel = team._channels.get(channel_id)
+			if channel is not None:
+				team._remove_channel(channel)
+
+	def parse_channel_deleted(self, event: Dict[str, Any]) -> None:
+		self._forget_channel(event['data']['channel_id'], event['broadcast'].get('team_id') or None)
+
+	def parse_user_removed(self, event: Dict[str, Any]) -> None:
+		# Sent to the removed user with the channel in the data, and to the channel with
+		# the removed user in the data
+		data = event['data']
+		broadcast = event['broadcast']
+		user_id = data.get('user_id') or broadcast.get('user_id')
+		channel_id = data.get('channel_id') or broadcast.get('channel_id')
+		if self.user is None or user_id != self.user.id or not channel_id:
+			return
+
+		self._forget_channel(channel_id, broadcast.get('team_id') or None)
+
+	def parse_user_updated(self, event: Dict[str, Any]) -> None:
+		data: UserPayload = event['data']['user']
+		if self.user is not None and self.user.id == data['id']:
+			self.user._update(data)
+
+		if self.cache_backend is not None:
+			self.cache_backend.set('users', data['id'], data)
+
+		# Whatever was cached is stale now, update it in place so everything
+		# holding the user sees the change and restart its time to live
+		user = self._users.pop(data['id'], None)
+		if user is None:
+			self.dispatch('raw_user_update', data)
+			return
+
+		older = copy.copy(user)
+		user._update(data)
+		self._users[user.id] = user
+		self.dispatch('raw_user_update', data)
+		self.dispatch('user_update', older, user)
+
+ConnectionState._PARSERS = _collect_parsers(ConnectionState)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import copy
 from datetime import datetime
 import unicodedata
@@ -22,6 +23,7 @@ from typing import (
 from . import utils, abc
 from .member import Member
 from .errors import InvalidData
+from .mixins import Hashable
 from .channel import *
 from .channel import _team_channel_factory, _threaded_team_channel_factory
 from .user import User
@@ -38,9 +40,21 @@ if TYPE_CHECKING:
 	from .channel import TextChannel
 	from .state import ConnectionState
 	from .payloads.team import Team as TeamPayload, TeamChannel as TeamChannelPayload
+	from .payloads.member import Member as MemberPayload
 
 	TeamChannel = TextChannel
 
+def _trim(cache: Dict[str, Any], limit: Optional[int]) -> None:
+	# The longest cached entries are dropped once the cache goes over its limit
+	if limit is not None:
+		while len(cache) > limit:
+			del cache[next(iter(cache))]
+
+def _add_bounded(cache: Dict[str, Any], key: str, value: Any, limit: Optional[int]) -> None:
+	cache.pop(key, None)
+	cache[key] = value
+	_trim(cache, limit)
+
 class Team(Hashable):
 	"""Represents a Mattermost team."""
 
@@ -69,25 +83,38 @@ class Team(Hashable):
 		self._from_data(data)
 
 	def _add_channel(self, channel: TeamChannel, /) -> None:
-		...
+		self._channels[channel.id] = channel
 
 	def _remove_channel(self, channel: TeamChannel, /) -> None:
-		...
+		self._channels.pop(channel.id, None)
 
 	def _add_member(self, member: Member, /) -> None:
-		...
+		policy = self._state.cache_policy
+		if policy.enabled('members'):
+			_add_bounded(self._members, member.id, member, policy.limit('members'))
+
+	def _add_members(self, members: Collection[Member], /) -> None:
+		# Bulk version of _add_member that only enforces the limit once
+		policy = self._state.cache_policy
+		if not members or not policy.enabled('members'):
+			return
+
+		self._members.update((member.id, member) for member in members)
+		_trim(self._members, policy.limit('members'))
 
 	def _remove_member(self, member: str, /) -> None:
-		...
+		self._members.pop(member, None)
 
 	def _add_thread(self, thread: Thread, /) -> None:
-		...
+		policy = self._state.cache_policy
+		if policy.enabled('threads'):
+			_add_bounded(self._threads, thread.id, thread, policy.limit('threads'))
 
 	def _remove_thread(self, thread: str, /) -> None:
-		...
+		self._threads.pop(thread, None)
 
 	def _clear_threads(self) -> None:
-		...
+		self._threads.clear()
 
 	def _remove_threads_by_channel(self, channel_id: str) -> None:
 		...
@@ -111,7 +138,7 @@ class Team(Hashable):
 		self.update_at: datetime = team['update_at']
 		self.delete_at: datetime = team['delete_at']
 		self.display_name: str = team['display_name']
-		self.id: str = team['id']
+		self.id: str = utils._intern_id(team['id'])
 		self.description: str = team['description']
 		self.email: str = team['email']
 		self.type: str = team['type']
@@ -122,11 +149,11 @@ class Team(Hashable):
 
 	@property
 	def channels(self) -> Sequence[TeamChannel]:
-		...
+		return utils.SequenceProxy(self._channels.values())
 
 	@property
 	def threads(self) -> Sequence[Thread]:
-		...
+		return utils.SequenceProxy(self._threads.values())
 
 	@property
 	def me(self) -> Member:
@@ -137,23 +164,25 @@ class Team(Hashable):
 		...
 
 	def _resolve_channel(self, id: Optional[str], /) -> Optional[Union[TeamChannel, Thread]]:
-		...
+		if id is None:
+			return None
+		return self._channels.get(id) or self._threads.get(id)
 
 	def get_channel_or_thread(self, channel_id: str, /) -> Optional[Union[Thread, TeamChannel]]:
 		...
 
 	def get_channel(self, channel_id: str, /) -> Optional[TeamChannel]:
-		...
+		return self._channels.get(channel_id)
 
 	def get_thread(self, thread_id: str, /) -> Optional[Thread]:
-		...
+		return self._threads.get(thread_id)
 
 	@property
 	def members(self) -> Sequence[Member]:
-		...
+		return utils.SequenceProxy(self._members.values())
 
 	def get_member(self, user_id: str, /) -> Optional[Member]:
-		...
+		return self._members.get(user_id)
 
 	def get_member_named(self, name: str, /) -> Optional[Member]:
 		...
@@ -194,8 +223,116 @@ class Team(Hashable):
 	async def active_threads(self) -> List[Thread]:
 		...
 
-	async def fetch_members(self, *, limit: Optional[int] = 1000, after: datetime = MISSING) -> AsyncIterator[Member]:
-		...
+	async def fetch_members(
+		self,
+		*,
+		limit: Optional[int] = 1000,
+		after: datetime = MISSING,
+		per_page: int = 200,
+		concurrency: int = 4,
+		ordered: bool = True,
+		cache: bool = True
+	) -> AsyncIterator[Member]:
+		"""Retrieves the team's members, fetching up to concurrency pages at a time.
+
+		With ordered set to False members are yielded as soon as their page arrives instead
+		of in page order. Users that aren't cached yet are fetched in bulk for every page.
+
+		after is accepted so existing calls keep working but is ignored, Mattermost doesn't
+		say when a member joined the team so the list can't be filtered by it.
+		"""
+		if not 0 < per_page <= 200:
+			raise ValueError('per_page must be between 1 and 200')
+		if concurrency <= 0:
+			raise ValueError('concurrency must be greater than 0')
+		if limit is not None and limit <= 0:
+			return
+
+		loop = asyncio.get_running_loop()
+		last_page = None if limit is None else (limit - 1) // per_page
+		# page -> fetch in flight, and page -> members fetched but not yielded yet.
+		# Both count towards the window so a slow page can't let the buffer grow unbounded
+		pending: Dict[int, asyncio.Task[List[Member]]] = {}
+		fetched: Dict[int, List[Member]] = {}
+		next_page = 0
+		next_yield = 0
+		exhausted = False
+		remaining = limit
+
+		def schedule() -> None:
+			nonlocal next_page
+			while (
+				not exhausted
+				and len(pending) + len(fetched) < concurrency
+				and (last_page is None or next_page <= last_page)
+			):
+				coro = self._fetch_member_page(next_page, per_page, cache=cache)
+				pending[next_page] = loop.create_task(coro)
+				next_page += 1
+
+		try:
+			schedule()
+			while pending:
+				finished, _ = await asyncio.wait(pending.values(), return_when=asyncio.FIRST_COMPLETED)
+				for page, task in list(pending.items()):
+					if task in finished:
+						del pending[page]
+						members = task.result()
+						fetched[page] = members
+						if len(members) < per_page:
+							# Every page after a short one is empty
+							exhausted = True
+
+				ready: List[List[Member]] = []
+				if ordered:
+					while next_yield in fetched:
+						ready.append(fetched.pop(next_yield))
+						next_yield += 1
+				else:
+					ready.extend(fetched.pop(page) for page in sorted(fetched))
+
+				# Keep the window full while the caller works through this batch
+				schedule()
+				for members in ready:
+					for member in members:
+						yield member
+						if remaining is not None:
+							remaining -= 1
+							if remaining == 0:
+								return
+		finally:
+			for task in pending.values():
+				task.cancel()
+
+	async def _fetch_member_page(self, page: int, per_page: int, *, cache: bool) -> List[Member]:
+		state = self._state
+		data: List[MemberPayload] = await state.http.get_team_members(self.id, page=page, per_page=per_page)
+
+		users: Dict[str, User] = {}
+		missing: List[str] = []
+		for payload in data:
+			user_id = payload['user_id']
+			user = state.get_user(user_id)
+			if user is None:
+				missing.append(user_id)
+			else:
+				users[user_id] = user
+
+		if missing:
+			for payload in await state.http.get_users_by_ids(missing):
+				# Hands back the cached user if another page stored it first
+				user = state.store_user(payload)
+				users[user.id] = user
+
+		members = []
+		for payload in data:
+			member = Member(data=payload, team=self, state=state)
+			member._user = users.get(payload['user_id'])
+			members.append(member)
+
+		if cache:
+			self._add_members(members)
+		return members
 
 	async def fetch_member(self, member_id: str, /) -> Member:
 		...
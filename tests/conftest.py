@@ -0,0 +1,54 @@
+import importlib.util
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# The repository root is the package, load it as mattermost without putting the root
+# on sys.path, its http.py would shadow the standard library's
+if 'mattermost' not in sys.modules:
+	spec = importlib.util.spec_from_file_location(
+		'mattermost', ROOT / '__init__.py', submodule_search_locations=[str(ROOT)]
+	)
+	module = importlib.util.module_from_spec(spec)
+	sys.modules['mattermost'] = module
+	spec.loader.exec_module(module)
+
+from types import SimpleNamespace
+
+import pytest
+
+from mattermost.client import Client
+
+def _post_payload(id='post', channel_id='channel', update_at=1, **fields):
+	data = {
+		'id': id,
+		'user_id': 'user',
+		'channel_id': channel_id,
+		'create_at': update_at,
+		'update_at': update_at,
+		'edit_at': 0,
+		'delete_at': 0,
+		'props': {},
+		'hashtag': '',
+		'message': 'hello',
+		'type': ''
+	}
+	data.update(fields)
+	return data
+
+def _make_state(**options):
+	# A client's state logged in as 'me', with what it dispatches recorded instead of run
+	state = Client(**options)._connection
+	state.user = SimpleNamespace(id='me')
+	dispatched = []
+	state.dispatch = lambda event, *args: dispatched.append((event, args))
+	return state, dispatched
+
+@pytest.fixture
+def post_payload():
+	return _post_payload
+
+@pytest.fixture
+def make_state():
+	return _make_state
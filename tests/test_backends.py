@@ -0,0 +1,104 @@
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from mattermost.backends import MemoryCacheBackend, SharedMemoryCacheBackend, SQLiteCacheBackend
+
+from conftest import ROOT
+
+@pytest.fixture(params=['memory', 'sqlite', 'shared_memory'])
+def backend(request, tmp_path):
+	if request.param == 'memory':
+		backend = MemoryCacheBackend()
+	elif request.param == 'sqlite':
+		backend = SQLiteCacheBackend(tmp_path / 'cache.db')
+	else:
+		backend = SharedMemoryCacheBackend(slots=64, slot_size=256)
+	yield backend
+	backend.close()
+
+def test_set_get_delete(backend):
+	assert backend.get('users', 'a') is None
+	backend.set('users', 'a', {'id': 'a', 'username': 'alice'})
+	backend.set('channels', 'a', {'id': 'a', 'name': 'town-square'})
+	assert backend.get('users', 'a') == {'id': 'a', 'username': 'alice'}
+	assert backend.get_many('users', ['a', 'b']) == {'a': {'id': 'a', 'username': 'alice'}}
+
+	backend.set('users', 'a', {'id': 'a', 'username': 'alicia'})
+	assert backend.get('users', 'a')['username'] == 'alicia'
+
+	backend.delete('users', 'a')
+	assert backend.get('users', 'a') is None
+	assert backend.get('channels', 'a') is not None
+
+def test_clear_a_namespace(backend):
+	backend.set('users', 'a', {'id': 'a'})
+	backend.set('posts', 'p', {'id': 'p'})
+	backend.clear('users')
+	assert backend.get('users', 'a') is None
+	assert backend.get('posts', 'p') == {'id': 'p'}
+	backend.clear()
+	assert backend.get('posts', 'p') is None
+
+def test_sqlite_is_shared_between_connections_and_survives_reopening(tmp_path):
+	path = tmp_path / 'cache.db'
+	first = SQLiteCacheBackend(path)
+	second = SQLiteCacheBackend(path)
+	first.set('users', 'a', {'id': 'a'})
+	assert second.get('users', 'a') == {'id': 'a'}
+	first.close()
+	second.close()
+
+	reopened = SQLiteCacheBackend(path)
+	assert reopened.get('users', 'a') == {'id': 'a'}
+	reopened.close()
+
+def test_shared_memory_skips_payloads_bigger_than_a_slot():
+	backend = SharedMemoryCacheBackend(slots=8, slot_size=64)
+	try:
+		backend.set('users', 'a', {'id': 'a'})
+		backend.set('users', 'a', {'id': 'a', 'bio': 'x' * 100})
+		# The old version mustn't be served either
+		assert backend.get('users', 'a') is None
+	finally:
+		backend.close()
+
+_WORKER = textwrap.dedent('''
+	import importlib.util
+	import sys
+
+	spec = importlib.util.spec_from_file_location('mattermost', {init!r}, submodule_search_locations=[{root!r}])
+	sys.modules['mattermost'] = importlib.util.module_from_spec(spec)
+	from mattermost.backends import SharedMemoryCacheBackend
+
+	backend = SharedMemoryCacheBackend({name!r}, create=False, slots=64, slot_size=256)
+	print(backend.get('users', 'a')['username'])
+	backend.set('users', {key!r}, {{'id': {key!r}}})
+	backend.close()
+''')
+
+def _run_worker(name, key, cwd):
+	code = _WORKER.format(init=str(ROOT / '__init__.py'), root=str(ROOT), name=name, key=key)
+	return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=cwd, timeout=60)
+
+def test_shared_memory_outlives_the_processes_attached_to_it(tmp_path):
+	owner = SharedMemoryCacheBackend(slots=64, slot_size=256)
+	try:
+		owner.set('users', 'a', {'id': 'a', 'username': 'alice'})
+		for key in ('first', 'second'):
+			worker = _run_worker(owner.name, key, tmp_path)
+			assert worker.returncode == 0, worker.stderr
+			assert worker.stdout.strip() == 'alice'
+			assert 'leaked' not in worker.stderr
+
+		assert owner.get('users', 'first') == {'id': 'first'}
+		assert owner.get('users', 'second') == {'id': 'second'}
+	finally:
+		owner.close()
+
+def test_shared_memory_close_tolerates_a_block_already_unlinked():
+	owner = SharedMemoryCacheBackend(slots=8, slot_size=64)
+	owner._shm.unlink()
+	owner.close()
@@ -0,0 +1,72 @@
+import mattermost.cache
+from mattermost.cache import CompactPostCache, PostCache, UserCache
+
+class _Channel:
+	def __init__(self, id):
+		self.id = id
+
+class _Post:
+	def __init__(self, id, channel_id):
+		self.id = id
+		self.channel = _Channel(channel_id)
+
+def _payload(id, channel_id, message=''):
+	return {'id': id, 'channel_id': channel_id, 'message': message}
+
+def test_post_cache_evicts_the_least_recently_used():
+	cache = PostCache(max_size=2)
+	for i in range(3):
+		cache.add(_Post(str(i), 'c'))
+	assert '0' not in cache
+	assert [post.id for post in cache.channel_posts('c')] == ['1', '2']
+
+def test_post_cache_moves_a_post_stored_under_another_channel():
+	cache = PostCache()
+	cache.add(_Post('p', 'first'))
+	cache.add(_Post('p', 'second'))
+	assert cache.channel_posts('first') == []
+	assert [post.id for post in cache.channel_posts('second')] == ['p']
+	assert 'first' not in cache._channels
+
+	cache.pop('p')
+	assert cache._channels == {}
+
+def test_compact_post_cache_moves_a_post_stored_under_another_channel():
+	cache = CompactPostCache(materialize=lambda data: data)
+	cache.add_payload(_payload('p', 'first'))
+	cache.add_payload(_payload('p', 'second', 'moved'))
+	assert cache.channel_posts('first') == []
+	assert cache.channel_posts('second') == [_payload('p', 'second', 'moved')]
+
+def test_user_cache_evicts_the_least_recently_used():
+	cache = UserCache(max_size=2)
+	first, second, third = object(), object(), object()
+	cache['first'] = first
+	cache['second'] = second
+	assert cache['first'] is first
+
+	cache['third'] = third
+	assert 'second' not in cache
+	assert cache.get('first') is first and cache.get('third') is third
+	assert cache.evictions == 1
+
+def test_user_cache_expires_users_after_their_ttl(monkeypatch):
+	now = [100.0]
+	monkeypatch.setattr(mattermost.cache.time, 'monotonic', lambda: now[0])
+	cache = UserCache(ttl=10.0)
+	user = object()
+	cache['user'] = user
+
+	now[0] = 109.0
+	assert cache.get('user') is user
+	now[0] = 111.0
+	assert cache.get('user') is None
+	assert len(cache) == 0
+	assert cache.evictions == 1
+
+	# Storing a user again restarts its time to live
+	cache['user'] = user
+	now[0] = 120.0
+	cache['user'] = user
+	now[0] = 125.0
+	assert cache.get('user') is user
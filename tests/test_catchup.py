@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+def test_only_the_most_recently_active_channels_are_tracked(make_state, post_payload):
+	state, _ = make_state(max_posts=100, catch_up_max_channels=2)
+	state._handle_post(post_payload('1', 'a', 1), None)
+	state._handle_post(post_payload('2', 'b', 2), None)
+	state._handle_post(post_payload('3', 'a', 3), None)
+	state._handle_post(post_payload('4', 'c', 4), None)
+	assert state.catch_up.positions() == {'a': 3, 'c': 4}
+
+def test_restore_keeps_the_cap(make_state):
+	state, _ = make_state(max_posts=100, catch_up_max_channels=2)
+	state.catch_up.restore({'a': 1, 'b': 2, 'c': 3})
+	assert state.catch_up.positions() == {'b': 2, 'c': 3}
+
+def test_deleted_channels_are_forgotten(make_state, post_payload):
+	state, _ = make_state(max_posts=100)
+	state._handle_post(post_payload('1', 'a', 1), None)
+	state._handle_post(post_payload('2', 'b', 2), None)
+	state.parsers['CHANNEL_DELETED']({'event': 'channel_deleted', 'data': {'channel_id': 'a', 'delete_at': 5}, 'broadcast': {'team_id': 'team'}})
+	assert state.catch_up.positions() == {'b': 2}
+	assert state._get_channel_posts('a') == []
+
+def test_channels_the_client_user_was_removed_from_are_forgotten(make_state, post_payload):
+	state, _ = make_state(max_posts=100)
+	state._handle_post(post_payload('1', 'a', 1), None)
+	state._handle_post(post_payload('2', 'b', 2), None)
+	removed = state.parsers['USER_REMOVED']
+
+	# Someone else leaving doesn't change anything
+	removed({'event': 'user_removed', 'data': {'user_id': 'other', 'remover_id': 'me'}, 'broadcast': {'channel_id': 'a'}})
+	assert state.catch_up.positions() == {'a': 1, 'b': 2}
+
+	removed({'event': 'user_removed', 'data': {'channel_id': 'b', 'remover_id': 'admin'}, 'broadcast': {'user_id': 'me'}})
+	assert state.catch_up.positions() == {'a': 1}
+
+def _posted(data):
+	return {'event': 'posted', 'data': {'post': json.dumps(data)}, 'broadcast': {'channel_id': data['channel_id']}}
+
+def _hello(connection_id):
+	return {'event': 'hello', 'data': {'connection_id': connection_id}, 'broadcast': {}}
+
+def test_catch_up_starts_from_before_the_events_buffered_behind_hello(make_state, post_payload):
+	async def main():
+		state, dispatched = make_state(max_posts=100)
+		state.catch_up.restore({'a': 1})
+		state.ready_report = object()
+		state._connection_id = 'old'
+		requested = []
+		live = post_payload('live', 'a', 100)
+		missed = post_payload('missed', 'a', 50)
+
+		async def get_channel_posts(channel_id, *, since):
+			requested.append((channel_id, since))
+			return {'order': ['missed', 'live'], 'posts': {'missed': missed, 'live': live}}
+
+		state.http.get_channel_posts = get_channel_posts
+		state.parsers['HELLO'](_hello('new'))
+		# Read off the socket before the catch up task gets to run
+		state.parsers['POSTED'](_posted(live))
+		await state._catch_up_task
+
+		assert requested == [('a', 1)]
+		posts = [args[0].id for event, args in dispatched if event == 'post']
+		assert posts == ['live', 'missed']
+		assert state.catch_up.positions() == {'a': 100}
+
+	asyncio.run(main())
@@ -0,0 +1,131 @@
+import asyncio
+
+from mattermost.backends import MemoryCacheBackend
+from mattermost.client import Client
+
+class _Backend(MemoryCacheBackend):
+	def __init__(self):
+		super().__init__()
+		self.closed = False
+
+	def close(self):
+		self.closed = True
+
+def test_close_leaves_a_shared_cache_backend_open():
+	async def main():
+		backend = _Backend()
+		clients = [Client(cache_backend=backend) for _ in range(2)]
+		for client in clients:
+			await client._async_setup_hook()
+
+		await clients[0].close()
+		assert not backend.closed
+		backend.set('users', 'user', {'id': 'user'})
+		await clients[1].close()
+		assert not backend.closed
+
+	asyncio.run(main())
+
+def test_close_drains_handlers_before_closing_the_state():
+	async def main():
+		client = Client()
+		await client._async_setup_hook()
+		order = []
+		started = asyncio.Event()
+
+		@client.event
+		async def on_post(post):
+			started.set()
+			await asyncio.sleep(0.05)
+			order.append('handler')
+
+		state_close = client._connection.close
+
+		async def close():
+			order.append('state')
+			await state_close()
+
+		client._connection.close = close
+		client.dispatch('post', object())
+		await started.wait()
+		await client.close(drain=True, timeout=1)
+		assert order == ['handler', 'state']
+
+	asyncio.run(main())
+
+def _waiting_client():
+	client = Client(max_posts=100)
+	return client, client._connection
+
+def test_wait_for_resolves_on_the_keyed_id(post_payload):
+	async def main():
+		client, state = _waiting_client()
+		await client._async_setup_hook()
+		by_channel = asyncio.ensure_future(client.wait_for('post', channel_id='a', timeout=1))
+		by_user = asyncio.ensure_future(client.wait_for('post', user_id='author', timeout=1))
+		by_root = asyncio.ensure_future(client.wait_for('post', root_id='thread', timeout=1))
+		await asyncio.sleep(0)
+
+		state._handle_post(post_payload('reply', 'b', user_id='author', root_id='thread'), None)
+		state._handle_post(post_payload('other', 'a'), None)
+
+		assert (await by_user).id == 'reply'
+		assert (await by_root).id == 'reply'
+		assert (await by_channel).id == 'other'
+		await asyncio.sleep(0)
+		assert client._keyed_listeners == {}
+
+	asyncio.run(main())
+
+def test_wait_for_checks_the_extra_keys(post_payload):
+	async def main():
+		client, state = _waiting_client()
+		await client._async_setup_hook()
+		waiter = asyncio.ensure_future(client.wait_for('post', channel_id='a', user_id='author', timeout=1))
+		await asyncio.sleep(0)
+
+		# Right channel, someone else
+		state._handle_post(post_payload('first', 'a', user_id='someone'), None)
+		await asyncio.sleep(0)
+		assert not waiter.done()
+
+		state._handle_post(post_payload('second', 'a', user_id='author'), None)
+		assert (await waiter).id == 'second'
+
+	asyncio.run(main())
+
+def test_wait_for_ignores_other_ids(post_payload):
+	async def main():
+		client, state = _waiting_client()
+		await client._async_setup_hook()
+		waiter = asyncio.ensure_future(client.wait_for('post', channel_id='a', timeout=0.05))
+		await asyncio.sleep(0)
+
+		state._handle_post(post_payload('elsewhere', 'b'), None)
+		try:
+			await waiter
+		except asyncio.TimeoutError:
+			pass
+		else:
+			raise AssertionError('resolved for another channel')
+
+	asyncio.run(main())
+
+def test_timed_out_and_cancelled_keyed_waiters_are_removed():
+	async def main():
+		client, _ = _waiting_client()
+		await client._async_setup_hook()
+		try:
+			await client.wait_for('post', channel_id='a', timeout=0.01)
+		except asyncio.TimeoutError:
+			pass
+
+		waiter = asyncio.ensure_future(client.wait_for('post', user_id='author'))
+		await asyncio.sleep(0)
+		assert list(client._keyed_listeners['post']) == [('user_id', 'author')]
+		waiter.cancel()
+		await asyncio.sleep(0)
+		await asyncio.sleep(0)
+		assert client._keyed_listeners == {}
+
+	asyncio.run(main())
@@ -0,0 +1,94 @@
+import asyncio
+
+from mattermost.client import Client
+from mattermost.executor import EventExecutor
+
+def test_close_stops_workers_running_a_handler_that_swallows_cancellation():
+	async def main():
+		executor = EventExecutor(workers=2)
+		executor.start()
+		started = asyncio.Event()
+
+		async def handler():
+			started.set()
+			try:
+				await asyncio.sleep(60)
+			except asyncio.CancelledError:
+				pass
+
+		executor.submit(handler, 'on_post', key='channel')
+		await started.wait()
+		dropped = await asyncio.wait_for(executor.close(), timeout=1)
+		assert dropped == 1
+		assert executor.stats().running == 0
+
+	asyncio.run(main())
+
+def _client_with_a_running_handler():
+	client = Client(max_event_workers=2)
+	started = asyncio.Event()
+
+	@client.event
+	async def on_post(post):
+		started.set()
+		await asyncio.sleep(60)
+
+	return client, started
+
+def test_client_close_does_not_hang_on_a_running_handler():
+	async def main():
+		client, started = _client_with_a_running_handler()
+		await client._async_setup_hook()
+		client.dispatch('post', object())
+		await started.wait()
+		await asyncio.wait_for(client.close(), timeout=2)
+
+	asyncio.run(main())
+
+def test_client_drain_drops_a_handler_that_outlives_the_timeout():
+	async def main():
+		client, started = _client_with_a_running_handler()
+		await client._async_setup_hook()
+		client.dispatch('post', object())
+		await started.wait()
+		report = await asyncio.wait_for(client.close(drain=True, timeout=0.1), timeout=2)
+		assert report.dropped_handlers == 1
+
+	asyncio.run(main())
+
+def test_handlers_for_the_same_key_run_in_order():
+	async def main():
+		executor = EventExecutor(workers=4)
+		executor.start()
+		seen = []
+
+		def job(i):
+			async def run():
+				await asyncio.sleep(0)
+				seen.append(i)
+			return run
+
+		for i in range(10):
+			executor.submit(job(i), 'on_post', key='channel')
+		await asyncio.wait_for(executor.join(), timeout=1)
+		await executor.close()
+		assert seen == list(range(10))
+
+	asyncio.run(main())
+
+def test_workers_are_named_after_the_handler_they_run():
+	async def main():
+		executor = EventExecutor(workers=1)
+		executor.start()
+		names = []
+
+		async def handler():
+			names.append(asyncio.current_task().get_name())
+
+		executor.submit(handler, 'on_post')
+		await asyncio.wait_for(executor.join(), timeout=1)
+		assert names == ['mattermost.py: on_post']
+		assert executor._tasks[0].get_name() == 'mattermost.py: event worker 0'
+		await executor.close()
+
+	asyncio.run(main())
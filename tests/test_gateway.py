@@ -0,0 +1,84 @@
+import asyncio
+import itertools
+import threading
+
+from mattermost.client import Client
+from mattermost.gateway import GatewayRateLimiter, KeepAliveHandler, LatencyTracker, MattermostWebSocket
+
+class _StubWebSocket:
+	def __init__(self):
+		self.thread_id = threading.get_ident()
+		self._latencies = LatencyTracker()
+		self._max_heartbeat_timeout = 60.0
+		self._seq = itertools.count(1)
+
+	def _next_seq(self):
+		return next(self._seq)
+
+def test_rate_limiter_blocks_once_the_window_is_used_up():
+	limiter = GatewayRateLimiter(count=2, per=60.0)
+	assert not limiter.is_ratelimited()
+	assert limiter.get_delay() == 0.0
+	assert limiter.get_delay() == 0.0
+	assert limiter.is_ratelimited()
+	assert 0.0 < limiter.get_delay() <= 60.0
+
+def test_rate_limiter_resets_after_the_window():
+	limiter = GatewayRateLimiter(count=1, per=60.0)
+	limiter.get_delay()
+	assert limiter.is_ratelimited()
+	limiter.window -= 61.0
+	assert not limiter.is_ratelimited()
+	assert limiter.get_delay() == 0.0
+
+def test_rate_limiter_block_waits_for_the_window_and_uses_a_slot():
+	async def main():
+		limiter = GatewayRateLimiter(count=1, per=0.05)
+		loop = asyncio.get_running_loop()
+		start = loop.time()
+		await limiter.block()
+		await limiter.block()
+		assert loop.time() - start >= 0.04
+		# The send after the wait took the new window's only slot
+		assert limiter.remaining == 0
+		await limiter.block()
+		assert loop.time() - start >= 0.09
+
+	asyncio.run(main())
+
+def test_keepalive_times_the_ping_it_sent():
+	handler = KeepAliveHandler(ws=_StubWebSocket(), interval=30.0)
+	payload = handler.get_payload()
+	assert payload['action'] == 'ping'
+	handler.ack(payload['seq'])
+	assert handler.latency != float('inf')
+	assert not handler._pending_pings
+	# Replies to other actions aren't pings
+	handler.ack(payload['seq'] + 100)
+
+def test_websocket_actions_are_only_rate_limited_when_asked_for():
+	class Socket:
+		def __init__(self):
+			self.sent = []
+
+		async def send_str(self, data):
+			self.sent.append(data)
+
+	async def main():
+		client = Client()
+		await client._async_setup_hook()
+		ws = MattermostWebSocket._for_client(client, Socket())
+		assert ws._rate_limiter is None
+		assert not ws.is_ratelimited()
+
+		client = Client(gateway_rate_limit=(1, 60.0))
+		await client._async_setup_hook()
+		ws = MattermostWebSocket._for_client(client, Socket())
+		ws.token = 'token'
+		await ws.send_as_json({'action': 'user_typing'})
+		assert ws.is_ratelimited()
+		# Authenticating isn't held back
+		await asyncio.wait_for(ws.identify(), timeout=1)
+		assert len(ws.socket.sent) == 2
+
+	asyncio.run(main())
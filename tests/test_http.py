@@ -0,0 +1,50 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from mattermost.http import HTTPClient, Ratelimit, Route
+
+def test_first_response_sets_the_remaining_requests():
+	async def main():
+		ratelimit = Ratelimit(None)
+		response = SimpleNamespace(headers={'X-Ratelimit-Limit': '100', 'X-Ratelimit-Remaining': '99', 'X-Ratelimit-Reset': '1'})
+		ratelimit.update(response)
+		assert (ratelimit.limit, ratelimit.remaining, ratelimit.reset_after) == (100, 99, 1.0)
+
+	asyncio.run(main())
+
+def _server(name):
+	async def me(request):
+		# Sent without a charset like Mattermost does
+		body = f'{{"id": "{name}", "username": "{name}"}}'
+		return web.Response(body=body.encode(), content_type='application/json')
+
+	app = web.Application()
+	app.router.add_get('/api/v4/users/me', me)
+	return TestServer(app)
+
+def test_http_clients_send_requests_to_their_own_server():
+	async def main():
+		async with _server('first') as first_server, _server('second') as second_server:
+			loop = asyncio.get_running_loop()
+			first, second = HTTPClient(loop), HTTPClient(loop)
+			try:
+				first_url, second_url = str(first_server.make_url('')), str(second_server.make_url(''))
+				assert (await first.static_login(first_url, 'first'))['id'] == 'first'
+				assert (await second.static_login(second_url, 'second'))['id'] == 'second'
+
+				assert first.api_url == f'{first_url}/api/v4'
+				assert second.api_url == f'{second_url}/api/v4'
+				assert second.gateway_url() == f'{second_url.replace("http://", "ws://", 1)}/api/v4/websocket'
+
+				# The same route goes to whichever server the client logged in to
+				route = Route('GET', '/users/me')
+				assert (await first.request(route))['id'] == 'first'
+				assert (await second.request(route))['id'] == 'second'
+			finally:
+				await first.close()
+				await second.close()
+
+	asyncio.run(main())
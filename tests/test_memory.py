@@ -0,0 +1,82 @@
+from mattermost.client import Client
+from mattermost.memory import CacheAccountant
+
+def _user(id):
+	return {'id': id, 'username': id, 'create_at': 0, 'update_at': 0, 'delete_at': 0}
+
+def _counting(accountant):
+	# Records the caches that were sampled again
+	sampled = []
+	sample = accountant._sample
+
+	def wrapper(entries):
+		sampled.append(True)
+		return sample(entries)
+
+	accountant._sample = wrapper
+	return sampled
+
+def test_cache_stats_counts_the_entries(post_payload):
+	client = Client()
+	state = client._connection
+	users = [state.store_user(_user(f'user{i}')) for i in range(3)]
+	for i in range(5):
+		state._posts.store(state._materialize_post(post_payload(id=f'post{i}')), post_payload(id=f'post{i}'))
+
+	stats = client.cache_stats()
+	assert stats['users'].entries == len(users)
+	assert stats['posts'].entries == 5
+	assert stats['posts'].estimated_bytes > 0
+	assert stats['members'].entries == 0 and stats['members'].estimated_bytes == 0
+
+def test_caches_are_sampled_again_once_their_size_drifts(make_state, post_payload):
+	state, _ = make_state()
+	accountant = CacheAccountant(state, drift=0.5)
+	for i in range(10):
+		state._handle_post(post_payload(id=f'post{i}'), None)
+
+	accountant.usage()
+	sampled = _counting(accountant)
+	for i in range(10, 14):
+		state._handle_post(post_payload(id=f'post{i}'), None)
+	accountant.usage()
+	assert not sampled
+
+	for i in range(14, 20):
+		state._handle_post(post_payload(id=f'post{i}'), None)
+	accountant.usage()
+	assert sampled == [True]
+	assert accountant._estimates['posts'].entries == 20
+
+def test_a_full_cache_is_sampled_again_once_the_estimate_is_old(make_state, post_payload):
+	# A full LRU cache never changes size, only the estimate's age catches the churn
+	state, _ = make_state(max_posts=10)
+	accountant = CacheAccountant(state, max_age=600.0)
+	for i in range(10):
+		state._handle_post(post_payload(id=f'post{i}'), None)
+	accountant.usage()
+
+	sampled = _counting(accountant)
+	for i in range(10, 30):
+		state._handle_post(post_payload(id=f'post{i}', message='x' * 1000), None)
+	accountant.usage()
+	assert not sampled
+
+	before = accountant._estimates['posts'].bytes_per_entry
+	accountant._estimates['posts'].measured_at -= 601.0
+	accountant.usage()
+	assert sampled == [True]
+	assert accountant._estimates['posts'].bytes_per_entry > before
+
+def test_sampling_walks_a_bounded_number_of_entries(make_state):
+	state, _ = make_state()
+	accountant = CacheAccountant(state, sample_size=8)
+	walked = []
+
+	def entries():
+		while True:
+			walked.append(True)
+			yield [0] * 10
+
+	assert accountant._sample(entries()) > 0
+	assert len(walked) <= 32
@@ -0,0 +1,26 @@
+import asyncio
+
+from mattermost.monitor import LoopLagMonitor
+
+def _capture_in(task_name):
+	async def main():
+		monitor = LoopLagMonitor()
+		monitor.loop = asyncio.get_running_loop()
+
+		async def run():
+			return monitor._capture(1.0)
+
+		return await asyncio.get_running_loop().create_task(run(), name=task_name)
+
+	return asyncio.run(main())
+
+def test_stall_is_attributed_to_the_running_handler():
+	report = _capture_in('mattermost.py: on_post')
+	assert report.event == 'on_post'
+	assert report.task_name == 'mattermost.py: on_post'
+
+def test_stall_in_a_library_task_has_no_event():
+	for name in ('mattermost.py: bootstrap', 'mattermost.py: catch up', 'mattermost.py: event worker 0'):
+		report = _capture_in(name)
+		assert report.event is None
+		assert report.task_name == name
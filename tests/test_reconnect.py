@@ -0,0 +1,178 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+import mattermost.client
+from mattermost.client import Client
+from mattermost.errors import ConnectionClosed
+
+GATEWAY = 'ws://mattermost.test/api/v4/websocket'
+
+class _StubSocket:
+	"""Plays back a list of gateway frames, then closes with close_code"""
+
+	def __init__(self, frames, *, close_code=1006, on_exhausted=None):
+		self._frames = list(frames)
+		self._on_exhausted = on_exhausted
+		self.sent = []
+		self.closed = False
+		self.close_code = None
+		self._final_code = close_code
+
+	async def receive(self, timeout=None):
+		if self._frames:
+			return aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, json.dumps(self._frames.pop(0)), None)
+		if self._on_exhausted is not None:
+			await self._on_exhausted()
+		self.closed = True
+		self.close_code = self._final_code
+		return aiohttp.WSMessage(aiohttp.WSMsgType.CLOSED, None, None)
+
+	async def send_str(self, data):
+		self.sent.append(json.loads(data))
+
+	async def close(self, *, code=1000, message=b''):
+		self.closed = True
+		self.close_code = code
+		return True
+
+class _Backoff:
+	delays = []
+
+	def __init__(self):
+		self.attempts = 0
+
+	def delay(self):
+		self.attempts += 1
+		_Backoff.delays.append(self.attempts)
+		return 0.0
+
+def _hello(connection_id, seq=0):
+	return {'event': 'hello', 'data': {'connection_id': connection_id}, 'broadcast': {}, 'seq': seq}
+
+def _event(seq):
+	return {'event': 'typing', 'data': {}, 'broadcast': {}, 'seq': seq}
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+	_Backoff.delays = []
+	monkeypatch.setattr(mattermost.client, 'ExponentialBackoff', _Backoff)
+
+def _client(sockets):
+	# sockets are built with the client so the last one can close it
+	client = Client()
+	urls = []
+	disconnects = []
+	scripted = sockets(client)
+
+	async def ws_connect(url, **kwargs):
+		urls.append(url)
+		socket = scripted.pop(0)
+		if isinstance(socket, BaseException):
+			raise socket
+		return socket
+
+	async def no_bootstrap(start, positions=None):
+		pass
+
+	@client.event
+	async def on_disconnect():
+		disconnects.append(True)
+
+	client.http.gateway_url = lambda: GATEWAY
+	client.http.ws_connect = ws_connect
+	client._connection._delay_ready = no_bootstrap
+	return client, urls, disconnects
+
+def _run(client, **kwargs):
+	async def main():
+		await client._async_setup_hook()
+		await asyncio.wait_for(client.connect(**kwargs), timeout=5)
+		await asyncio.sleep(0)
+
+	asyncio.run(main())
+
+def test_resumes_with_the_connection_id_and_last_sequence():
+	client, urls, disconnects = _client(lambda client: [
+		_StubSocket([_hello('first', 0), _event(1), _event(5)]),
+		_StubSocket([_hello('first', 0)], on_exhausted=client.close)
+	])
+	_run(client)
+
+	assert urls == [GATEWAY, f'{GATEWAY}?connection_id=first&sequence_number=5']
+	assert _Backoff.delays == [1]
+	assert len(disconnects) >= 1
+
+def test_authenticates_every_connection():
+	sockets = []
+
+	def build(client):
+		sockets.extend([
+			_StubSocket([_hello('first')]),
+			_StubSocket([_hello('first')], on_exhausted=client.close)
+		])
+		return list(sockets)
+
+	client, urls, _ = _client(build)
+	_run(client)
+
+	for socket in sockets:
+		assert socket.sent[0]['action'] == 'authentication_challenge'
+
+def test_backs_off_on_every_failed_connect():
+	client, urls, _ = _client(lambda client: [
+		OSError('refused'),
+		aiohttp.ClientError('refused'),
+		_StubSocket([_hello('first')], on_exhausted=client.close)
+	])
+	_run(client)
+
+	assert urls == [GATEWAY, GATEWAY, GATEWAY]
+	assert _Backoff.delays == [1, 2]
+
+def test_starts_a_new_connection_without_a_connection_id():
+	client, urls, _ = _client(lambda client: [
+		_StubSocket([{'event': 'hello', 'data': {}, 'broadcast': {}}]),
+		_StubSocket([_hello('second')], on_exhausted=client.close)
+	])
+	_run(client)
+
+	assert urls == [GATEWAY, GATEWAY]
+
+def test_no_reconnect_closes_after_a_dropped_connection():
+	client, urls, disconnects = _client(lambda client: [
+		_StubSocket([_hello('first')]),
+		_StubSocket([_hello('first')])
+	])
+	_run(client, reconnect=False)
+
+	assert urls == [GATEWAY]
+	assert client.is_closed()
+	assert disconnects
+	assert _Backoff.delays == []
+
+def test_no_reconnect_returns_quietly_when_closed_normally():
+	client, urls, _ = _client(lambda client: [_StubSocket([_hello('first')], close_code=1000)])
+	_run(client, reconnect=False)
+
+	assert urls == [GATEWAY]
+	assert client.is_closed()
+
+def test_no_reconnect_raises_when_the_connect_fails():
+	client, urls, _ = _client(lambda client: [OSError('refused')])
+	with pytest.raises(OSError):
+		_run(client, reconnect=False)
+
+	assert client.is_closed()
+	assert _Backoff.delays == []
+
+def test_reconnects_after_a_normal_close_when_reconnecting():
+	client, urls, _ = _client(lambda client: [
+		_StubSocket([_hello('first')], close_code=1000),
+		_StubSocket([_hello('first')], on_exhausted=client.close)
+	])
+	_run(client)
+
+	assert len(urls) == 2
@@ -0,0 +1,45 @@
+import asyncio
+import json
+
+from mattermost.client import Client
+from mattermost.replay import GatewayRecorder, GatewayReplayer
+
+def _post_frame(seq):
+	post = {
+		'id': f'post{seq}',
+		'user_id': 'user',
+		'channel_id': 'channel',
+		'create_at': seq,
+		'update_at': seq,
+		'delete_at': 0,
+		'props': {},
+		'hashtag': '',
+		'message': 'hello',
+		'type': ''
+	}
+	return json.dumps({'event': 'posted', 'data': {'post': json.dumps(post)}, 'broadcast': {}, 'seq': seq})
+
+def test_replaying_a_hello_does_not_start_the_bootstrap(tmp_path):
+	path = tmp_path / 'gateway.jsonl.gz'
+	with GatewayRecorder(path) as recorder:
+		recorder.record(json.dumps({'event': 'hello', 'data': {'connection_id': 'recorded'}, 'broadcast': {}, 'seq': 0}))
+		recorder.record(_post_frame(1))
+		recorder.record(json.dumps({'event': 'hello', 'data': {'connection_id': 'another'}, 'broadcast': {}, 'seq': 0}))
+
+	async def main():
+		client = Client()
+		events = []
+		state = client._connection
+		dispatch = state.dispatch
+		state.dispatch = lambda event, *args: (events.append(event), dispatch(event, *args))
+
+		result = await GatewayReplayer(path).replay(client)
+		assert result.frames == 3
+		assert result.event_counts == {'hello': 2, 'posted': 1}
+		assert state._ready_task is None
+		assert state._catch_up_task is None
+		assert not state._replaying
+		assert 'post' in events
+		assert 'ready' not in events
+
+	asyncio.run(main())
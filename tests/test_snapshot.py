@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+from mattermost.client import Client
+from mattermost.snapshot import dump_snapshot, load_snapshot, write_snapshot
+
+def test_snapshot_keeps_the_catch_up_positions_on_the_server_clock(tmp_path, make_state, post_payload):
+	path = tmp_path / 'snapshot.json.gz'
+	state, _ = make_state(max_posts=100)
+	state._handle_post(post_payload('first', 'a', 1000), None)
+	state._handle_post(post_payload('second', 'b', 2000), None)
+	write_snapshot(dump_snapshot(state), path)
+
+	restored = Client(max_posts=100)._connection
+	snapshot = load_snapshot(restored, path)
+	assert restored.catch_up.positions() == {'a': 1000, 'b': 2000}
+	assert snapshot.since == 2000
+	assert snapshot.posts == 2
+
+def test_close_snapshots_what_draining_handlers_changed(tmp_path, post_payload):
+	path = tmp_path / 'snapshot.json.gz'
+
+	async def main():
+		client = Client(max_posts=100, snapshot_path=str(path))
+		await client._async_setup_hook()
+		state = client._connection
+		state.user = SimpleNamespace(id='me')
+		started = asyncio.Event()
+
+		@client.event
+		async def on_post(post):
+			started.set()
+			await asyncio.sleep(0.05)
+			state._handle_post(post_payload('late', 'c', 3000), None)
+
+		state._handle_post(post_payload('first', 'a', 1000), None)
+		await started.wait()
+		await client.close(drain=True, timeout=1)
+
+	asyncio.run(main())
+
+	restored = Client(max_posts=100)._connection
+	snapshot = load_snapshot(restored, path)
+	assert snapshot.posts == 2
+	assert restored.catch_up.positions() == {'a': 1000, 'c': 3000}
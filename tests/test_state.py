@@ -0,0 +1,114 @@
+import asyncio
+import json
+import sys
+
+import mattermost.cache
+from mattermost.cache import CachePolicy
+from mattermost.client import Client
+from mattermost.member import Member
+from mattermost.state import ChunkRequest
+from mattermost.team import Team
+
+def test_post_edit_dispatches_the_post_before_and_after(make_state, post_payload):
+	async def main():
+		state, dispatched = make_state()
+		state._handle_post(post_payload(message='before'), None)
+		state._handle_post_edit(post_payload(message='after', update_at=2, edit_at=2, props={'key': 'value'}, hashtag='#tag'))
+
+		older, post = next(args for event, args in dispatched if event == 'post_edit')
+		assert older.message == 'before'
+		assert (post.message, post.update_at, post.edit_at) == ('after', 2, 2)
+		assert post.props == {'key': 'value'}
+		assert post.hashtag == '#tag'
+		assert state._get_post('post').message == 'after'
+
+	asyncio.run(main())
+
+def test_posts_share_the_repeating_ids_but_not_their_own(make_state, post_payload):
+	# Interned strings are never freed, a post's own id must stay a fresh string
+	state, _ = make_state()
+	shared = {key: sys.intern(f'{key[0]}{"x" * 25}') for key in ('id', 'user_id', 'root_id')}
+	data = json.loads(json.dumps(post_payload(id=shared['id'], user_id=shared['user_id'], root_id=shared['root_id'])))
+
+	post = state._materialize_post(data)
+	assert post.id == shared['id'] and post.id is not shared['id']
+	assert post.user_id is shared['user_id']
+	assert post.root_id is shared['root_id']
+
+def test_user_updated_updates_the_cached_user_in_place(make_state, monkeypatch):
+	now = [100.0]
+	monkeypatch.setattr(mattermost.cache.time, 'monotonic', lambda: now[0])
+	state, dispatched = make_state(max_users=10, user_ttl=60.0)
+	user = state.store_user({'id': 'user', 'username': 'before'})
+
+	now[0] = 150.0
+	state.parsers['USER_UPDATED']({'event': 'user_updated', 'data': {'user': {'id': 'user', 'username': 'after'}}, 'broadcast': {}})
+	assert user.name == 'after'
+	# The update restarted its time to live
+	now[0] = 170.0
+	assert state.get_user('user') is user
+
+	older, updated = next(args for event, args in dispatched if event == 'user_update')
+	assert older.name == 'before'
+	assert updated is user
+
+def test_user_updated_for_an_uncached_user_only_dispatches_the_raw_event(make_state):
+	state, dispatched = make_state(max_users=10)
+	state.parsers['USER_UPDATED']({'event': 'user_updated', 'data': {'user': {'id': 'user', 'username': 'after'}}, 'broadcast': {}})
+	assert [event for event, _ in dispatched] == ['raw_user_update']
+	assert state.get_user('user') is None
+
+def _dm(user_id):
+	return {'id': f'dm-{user_id}', 'recipients': [{'id': user_id, 'username': user_id}]}
+
+async def _no_private_post(user_id):
+	raise AssertionError('start_private_post should not be called')
+
+def test_dm_channel_ids_outlive_the_dm_cache(make_state):
+	async def main():
+		state, _ = make_state(cache_policy=CachePolicy(dms=1))
+		state.http.start_private_post = _no_private_post
+		user = state.store_user({'id': 'first', 'username': 'first'})
+		state.add_dm_channel(_dm('first'))
+		state.add_dm_channel(_dm('second'))
+		assert 'dm-first' not in state._private_channels
+		assert user.dm_channel is None
+
+		channel = await user.create_dm()
+		assert channel.id == 'dm-first'
+		assert channel.recipient is user
+
+	asyncio.run(main())
+
+def test_dm_channel_ids_are_saved_and_loaded(make_state, tmp_path):
+	async def main():
+		path = str(tmp_path / 'dms.json')
+		state, _ = make_state(dm_map_path=path)
+		state.add_dm_channel(_dm('user'))
+		state.save_dm_map()
+
+		restarted, _ = make_state(dm_map_path=path)
+		assert restarted._get_dm_channel_id('user') == 'dm-user'
+
+		restarted.http.start_private_post = _no_private_post
+		user = restarted.store_user({'id': 'user', 'username': 'user'})
+		assert (await user.create_dm()).id == 'dm-user'
+
+	asyncio.run(main())
+
+def test_chunk_request_caches_only_new_members():
+	async def main():
+		client = Client()
+		state = client._connection
+		team = Team(data={attr: None for attr in Team.__slots__} | {'id': 'team'}, state=state)
+		cached = Member(data={'user_id': 'cached'}, team=team, state=state)
+		team._add_member(cached)
+
+		request = ChunkRequest('team', asyncio.get_running_loop(), {'team': team}.get)
+		members = [Member(data={'user_id': user_id}, team=team, state=state) for user_id in ('cached', 'new')]
+		request.add_members(members)
+		assert request.buffer == members
+		assert team._members['cached'] is cached
+		assert team._members['new'] is members[1]
+
+	asyncio.run(main())
@@ -0,0 +1,79 @@
+import asyncio
+
+from mattermost.team import Team
+
+class _Pages:
+	"""Serves total members a page at a time, page n takes delay(n) seconds"""
+
+	def __init__(self, total, delay=lambda page: 0.0):
+		self.total = total
+		self.delay = delay
+		self.pages = []
+		self.running = 0
+		self.most_running = 0
+
+	async def get_team_members(self, team_id, *, page, per_page):
+		self.pages.append(page)
+		self.running += 1
+		self.most_running = max(self.most_running, self.running)
+		try:
+			await asyncio.sleep(self.delay(page))
+		finally:
+			self.running -= 1
+		start = page * per_page
+		return [{'team_id': team_id, 'user_id': f'user{i}'} for i in range(start, min(start + per_page, self.total))]
+
+	async def get_users_by_ids(self, user_ids):
+		return [{'id': user_id, 'username': user_id} for user_id in user_ids]
+
+def _team(make_state, pages):
+	state, _ = make_state()
+	state.http.get_team_members = pages.get_team_members
+	state.http.get_users_by_ids = pages.get_users_by_ids
+	return Team(data={attr: None for attr in Team.__slots__} | {'id': 'team'}, state=state)
+
+async def _ids(team, **kwargs):
+	return [member.id async for member in team.fetch_members(**kwargs)]
+
+def test_fetch_members_yields_pages_in_order_unless_told_otherwise(make_state):
+	# The first page is the slowest to arrive
+	pages = _Pages(30, delay=lambda page: 0.03 if page == 0 else 0.0)
+	team = _team(make_state, pages)
+
+	ordered = asyncio.run(_ids(team, limit=None, per_page=10, concurrency=3))
+	assert ordered == [f'user{i}' for i in range(30)]
+
+	unordered = asyncio.run(_ids(team, limit=None, per_page=10, concurrency=3, ordered=False))
+	assert unordered == ordered[10:] + ordered[:10]
+
+def test_fetch_members_stops_at_the_limit(make_state):
+	pages = _Pages(1000)
+	team = _team(make_state, pages)
+
+	ids = asyncio.run(_ids(team, limit=25, per_page=10, concurrency=8))
+	assert ids == [f'user{i}' for i in range(25)]
+	assert sorted(pages.pages) == [0, 1, 2]
+
+def test_fetch_members_keeps_at_most_concurrency_pages_in_flight(make_state):
+	pages = _Pages(95, delay=lambda page: 0.01)
+	team = _team(make_state, pages)
+
+	ids = asyncio.run(_ids(team, limit=None, per_page=10, concurrency=4))
+	assert len(ids) == 95
+	assert pages.most_running == 4
+	# Every page after the short one is empty, at most a window's worth is fetched past it
+	assert max(pages.pages) < 10 + 4
+
+def test_fetch_members_caches_the_members_and_shares_their_users(make_state):
+	pages = _Pages(20)
+	team = _team(make_state, pages)
+
+	async def main():
+		members = [member async for member in team.fetch_members(limit=None, per_page=10)]
+		again = [member async for member in team.fetch_members(limit=None, per_page=10, cache=False)]
+		return members, again
+
+	members, again = asyncio.run(main())
+	assert set(team._members) == {f'user{i}' for i in range(20)}
+	assert all(team._members[member.id] is member for member in members)
+	assert all(first._user is second._user for first, second in zip(members, again))
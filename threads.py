@@ -6,7 +6,9 @@ from datetime import datetime
 # Local imports
 from .abc import Postable, _purge_helper
 from .errors import ClientException
-from .utils import MISSING, parse_time
+from . import utils
+from .utils import MISSING
+from .mixins import Hashable
 
 __all__ = [
 	'Thread',
@@ -48,7 +50,7 @@ class Thread(Postable, Hashable):
 		return f'<Thread id={self.id}'
 
 	def _from_data(self, data: ThreadPayload) -> None:
-		self.id: str = data['id']
+		self.id: str = utils._intern_id(data['id'])
 		self.reply_count: int = data['reply_count']
 		self.last_reply_at: datetime = data['last_reply_at']
 		self.last_viewed_at: datetime = data['last_viewed_at']
@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional, TYPE_CHECKING, Union
 
 # Local imports
 import mattermost.abc
+from . import utils
 from .utils import MISSING
 
 if TYPE_CHECKING:
@@ -63,7 +64,7 @@ class BaseUser(_UserTag):
 
 	def _update(self, data: Union[UserPayload, PartialUserPayload]) -> None:
 		self.name = data['username']
-		self.id = data['id']
+		self.id = utils._intern_id(data['id'])
 		self.bot = data.get('bot', False)
 		self.system = data.get('system', False)
 
@@ -152,5 +153,10 @@ class User(BaseUser, mattermost.abc.Postable):
 			return found
 
 		state = self._state
-		data: DMChannelPayload = await state.http.start_private_post(self.id)
+		channel_id = state._get_dm_channel_id(self.id)
+		if channel_id is not None:
+			# The channel was opened before, no need to ask the server for it again
+			data: DMChannelPayload = {'id': channel_id, 'recipients': [self._to_minimal_user_json()]} # type: ignore
+		else:
+			data = await state.http.start_private_post(self.id)
 		return state.add_dm_channel(data)
@@ -1,4 +1,19 @@
-from typing import Any
+import functools
+import json
+import sys
+from typing import (
+	Any,
+	Collection,
+	Iterator,
+	List,
+	Sequence,
+	SupportsIndex,
+	TypeVar,
+	Union,
+	overload
+)
+
+T_co = TypeVar('T_co', covariant=True)
 
 class _MissingSentinel:
 	__slots__ = ()
@@ -15,4 +30,57 @@ class _MissingSentinel:
 	def __repr__(self) -> str:
 		return '...'
 
-MISSING: Any = _MissingSentinel()
\ No newline at end of file
+MISSING: Any = _MissingSentinel()
+
+def _to_json(obj: Any) -> str:
+	return json.dumps(obj, separators=(',', ':'), ensure_ascii=True)
+
+_from_json = json.loads
+
+def _intern_id(value: Any) -> Any:
+	# Only for ids that repeat across payloads (user, channel, team, root),
+	# interned strings are never freed so post ids must not go through here
+	return sys.intern(value) if type(value) is str else value
+
+class SequenceProxy(Sequence[T_co]):
+	"""A read-only proxy of a collection, copied to a list the first time it's indexed"""
+
+	def __init__(self, proxied: Collection[T_co]) -> None:
+		self.__proxied: Collection[T_co] = proxied
+
+	@functools.cached_property
+	def __copied(self) -> List[T_co]:
+		self.__proxied = list(self.__proxied)
+		return self.__proxied
+
+	def __repr__(self) -> str:
+		return f'SequenceProxy({self.__proxied!r})'
+
+	@overload
+	def __getitem__(self, idx: SupportsIndex) -> T_co:
+		...
+
+	@overload
+	def __getitem__(self, idx: slice) -> List[T_co]:
+		...
+
+	def __getitem__(self, idx: Union[SupportsIndex, slice]) -> Union[T_co, List[T_co]]:
+		return self.__copied[idx]
+
+	def __len__(self) -> int:
+		return len(self.__proxied)
+
+	def __contains__(self, item: Any) -> bool:
+		return item in self.__copied
+
+	def __iter__(self) -> Iterator[T_co]:
+		return iter(self.__copied)
+
+	def __reversed__(self) -> Iterator[T_co]:
+		return reversed(self.__copied)
+
+	def index(self, value: Any, *args: SupportsIndex) -> int:
+		return self.__copied.index(value, *args)
+
+	def count(self, value: Any) -> int:
+		return self.__copied.count(value)